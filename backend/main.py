@@ -24,6 +24,9 @@ from src.config import config
 from src.config import Config
 from src.utils.logger import log
 from src.utils.credentials_store import credentials_store
+from src.utils.security_master import security_master
+from src.utils.rate_limiter import request_priority, PRIORITY_DASHBOARD
+from src.utils.cache import api_cache
 from middleware import check_auto_trading_feature,check_manual_trading_feature
 # ===== LOAD STORED CREDENTIALS (after logger is initialized) =====
 config.load_dhan_credentials()
@@ -39,26 +42,8 @@ except Exception as e:
 orchestrator: Optional[TradingOrchestrator] = None
 active_websockets: List[WebSocket] = []
 
-# Rate limiting cache
-_api_call_cache = {}
-_min_api_interval = 2.0  # Minimum 2 seconds between calls
-
-
 uvicorn_logger = logging.getLogger("uvicorn.access")
 
-async def rate_limit_check(api_name: str, min_interval: float = 2.0):
-    """Check and enforce rate limiting."""
-    last_call = _api_call_cache.get(api_name)
-
-    if last_call:
-        elapsed = (datetime.now() - last_call).total_seconds()
-        if elapsed < min_interval:
-            wait_time = min_interval - elapsed
-            await asyncio.sleep(wait_time)
-
-    _api_call_cache[api_name] = datetime.now()
-
-
 
 # ==================== UTILITY FUNCTIONS ====================
 
@@ -97,12 +82,40 @@ def clean_json_data(obj):
 
 # ==================== LIFECYCLE MANAGEMENT ====================
 
+async def futures_rollover_loop():
+    """Keep the configured futures security IDs on the contract to trade."""
+    while True:
+        try:
+            if await security_master.wait_ready():
+                security_master.apply_futures_rollover()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            log.error(f"❌ Futures rollover check failed: {e}")
+        
+        await asyncio.sleep(Config.FUTURES_ROLLOVER_CHECK_INTERVAL)
+
+async def scrip_master_update_check():
+    """Apply any scrip master update (delta or full) once the master is loaded."""
+    try:
+        if await security_master.wait_ready():
+            result = await asyncio.to_thread(security_master.check_for_updates)
+            if result.get("updated"):
+                log.info(f"📦 Scrip master updated to {result['version']} ({result['mode']})")
+    except Exception as e:
+        log.error(f"❌ Scrip master update check failed: {e}")
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Lifecycle manager for FastAPI app."""
     global orchestrator
     log.info("🚀 Starting Trade Yoda API Server...")
     
+    # Load the security master off the event loop
+    security_master.start_background_load()
+    rollover_task = asyncio.create_task(futures_rollover_loop())
+    update_task = asyncio.create_task(scrip_master_update_check())
+    
     # Startup
     try:
         orchestrator = TradingOrchestrator(config)
@@ -115,6 +128,8 @@ async def lifespan(app: FastAPI):
     
     # Shutdown
     log.info("🛑 Shutting down Trade Yoda API Server...")
+    rollover_task.cancel()
+    update_task.cancel()
     if orchestrator and orchestrator.is_running:
         orchestrator.shutdown()
     log.info("✅ Shutdown complete")
@@ -172,7 +187,18 @@ async def health_check():
     return {
         "status": "healthy",
         "timestamp": datetime.now().isoformat(),
-        "orchestrator_running": orchestrator.is_running if orchestrator else False
+        "orchestrator_running": orchestrator.is_running if orchestrator else False,
+        "security_master": security_master.status(),
+        "dhan_api": orchestrator.data_agent.dhan.aio.metrics() if orchestrator else None,
+        "option_chain_poller": orchestrator.chain_poller.metrics() if orchestrator else None,
+        "market_feed": orchestrator.data_agent.feed_metrics() if orchestrator else None,
+        "feed_subscriptions": orchestrator.subscriptions.metrics() if orchestrator else None,
+        "volume_profile": orchestrator.volume_profile.metrics() if orchestrator else None,
+        "session_profiles": orchestrator.session_profiles.metrics() if orchestrator else None,
+        "caches": {
+            "data_agent": orchestrator.data_agent.cache.stats() if orchestrator else None,
+            "api": api_cache.stats()
+        }
     }
 
 # ==================== SYSTEM ENDPOINTS ====================
@@ -260,7 +286,8 @@ async def stop_trading():
 async def get_futures_status():
     """Get current futures contract status."""
     try:
-        from src.utils.security_master import security_master
+        if not await security_master.wait_ready(timeout=30):
+            raise HTTPException(status_code=503, detail="Security master not loaded")
 
         # Get both Nifty and BankNifty futures
         nifty_futures = security_master.get_current_futures_contract("NIFTY")
@@ -280,11 +307,33 @@ async def get_futures_status():
                 "days_to_expiry": (banknifty_futures['expiry_date'] - datetime.now()).days if banknifty_futures else None
             }
         }
+    except HTTPException:
+        raise
     except Exception as e:
         log.error(f"Error getting futures status: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+#==============INSTRUMENT SEARCH===================
+@app.get("/api/instruments/search")
+async def search_instruments(q: str, limit: int = 20, offset: int = 0):
+    """Typeahead search over instrument symbols (prefix, then fuzzy)."""
+    try:
+        if not await security_master.wait_ready(timeout=30):
+            raise HTTPException(status_code=503, detail="Security master not loaded")
+
+        limit = max(1, min(limit, 100))
+        offset = max(0, offset)
+
+        result = await asyncio.to_thread(security_master.search_instruments, q, limit, offset)
+        return clean_json_data(result)
+    except HTTPException:
+        raise
+    except Exception as e:
+        log.error(f"Error searching instruments: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 #==============CONTINOUS MONITORING===================
 @app.post("/api/start-continuous")
 async def start_continuous_monitoring():
@@ -448,7 +497,9 @@ async def get_active_trades():
         if not orchestrator:
             return {"trades": [], "mode": "none"}
 
-        trades = orchestrator.get_active_trades()
+        trades = await api_cache.get_or_fetch(
+            "active_trades", "all", lambda: asyncio.to_thread(orchestrator.get_active_trades)
+        )
         mode = "paper" if orchestrator.config.USE_SANDBOX else "live"
 
         return {
@@ -467,7 +518,10 @@ async def get_total_pnl():
         if not orchestrator:
             return {"total_pnl": 0}
 
-        pnl_data = orchestrator.get_total_pnl()
+        pnl_data = await api_cache.get_or_fetch(
+            "pnl", "total", lambda: asyncio.to_thread(orchestrator.get_total_pnl),
+            should_cache=lambda data: "error" not in data
+        )
         return pnl_data
     except Exception as e:
         log.error(f"Get P&L error: {e}")
@@ -486,7 +540,8 @@ async def get_positions():
                 "message": "Paper trading mode - no real positions"
             }
         
-        positions = orchestrator.data_agent.get_positions()
+        with request_priority(PRIORITY_DASHBOARD):
+            positions = await orchestrator.data_agent.get_positions_async(allow_stale=True)
         return positions
     except Exception as e:
         log.error(f"Get positions error: {e}")
@@ -506,7 +561,8 @@ async def get_orders():
                 "message": "Paper trading mode - no real orders"
             }
         
-        orders = orchestrator.data_agent.get_orders()
+        with request_priority(PRIORITY_DASHBOARD):
+            orders = await orchestrator.data_agent.get_orders_async(allow_stale=True)
         return orders
     except Exception as e:
         log.error(f"Get orders error: {e}")
@@ -561,8 +617,6 @@ async def get_trade_statistics():
 async def get_live_price():
     """Get live price for active instrument with market status."""
     try:
-        # ===== RATE LIMIT: 2 seconds minimum =====
-        await rate_limit_check("market_quotes", min_interval=2.0)
         if not orchestrator:
             return {
                 "success": False,
@@ -577,10 +631,11 @@ async def get_live_price():
         is_market_open = validate_market_hours()
 
         # Fetch live quote
-        quotes = orchestrator.data_agent.fetch_market_quotes(
-            securities=[config.NIFTY_FUTURES_SECURITY_ID],
-            exchange_segment=config.NIFTY_FUTURES_EXCHANGE
-        )
+        with request_priority(PRIORITY_DASHBOARD):
+            quotes = await orchestrator.data_agent.fetch_market_quotes_async(
+                securities=[config.NIFTY_FUTURES_SECURITY_ID],
+                exchange_segment=config.NIFTY_FUTURES_EXCHANGE
+            )
 
         live_quote = quotes.get(str(config.NIFTY_FUTURES_SECURITY_ID), {})
         price = live_quote.get("LTP")
@@ -910,7 +965,8 @@ async def update_dhan_credentials(credentials: dict):
 
         # CRITICAL: Reinitialize orchestrator's Dhan connections
         if orchestrator:
-            from dhanhq import dhanhq, DhanContext
+            from dhanhq import DhanContext
+            from src.utils.dhan_client import get_dhan_client
 
             # Create new context
             new_context = DhanContext(client_id, access_token)
@@ -921,13 +977,13 @@ async def update_dhan_credentials(credentials: dict):
             # Reinitialize data agent
             if orchestrator.data_agent:
                 orchestrator.data_agent.dhan_context = new_context
-                orchestrator.data_agent.dhan = dhanhq(new_context)
+                orchestrator.data_agent.dhan = get_dhan_client(new_context)
                 log.info("✅ Data agent updated with new credentials")
 
             # Reinitialize execution agent
             if orchestrator.execution_agent:
                 orchestrator.execution_agent.dhan_context = new_context
-                orchestrator.execution_agent.dhan = dhanhq(new_context)
+                orchestrator.execution_agent.dhan = get_dhan_client(new_context)
                 log.info("✅ Execution agent updated with new credentials")
 
             log.info("✅ Dhan credentials updated successfully across all agents")
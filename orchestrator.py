@@ -3,7 +3,6 @@ import asyncio
 from datetime import datetime, timedelta, date
 import pandas as pd
 from typing import Dict, Optional
-from dhanhq import MarketFeed
 
 def ensure_str_date(val):
     if isinstance(val, date):
@@ -19,6 +18,11 @@ from src.agents import (
     ExecutionAgent
 )
 from src.utils.logger import log
+from src.utils.option_chain_poller import OptionChainPoller, chains_equal
+from src.utils.option_chain_archive import option_chain_archive
+from src.utils.rate_limiter import request_priority, min_request_interval, PRIORITY_TRADING
+from src.utils.subscription_manager import SubscriptionManager, make_instrument
+from src.utils.volume_profile import VolumeProfileAccumulator, SessionProfiles
 from src.utils.helpers import (
     get_nearest_expiry,
     validate_market_hours,
@@ -42,6 +46,25 @@ class TradingOrchestrator:
         self.analysis_cache = {}
         self.is_running = False
         self.monitoring_task = None
+        # Each round fits the option chain bucket with one request to spare for the trade cycle
+        poll_interval = max(
+            cfg.OPTION_CHAIN_POLL_SECONDS,
+            min_request_interval("option_chain", cfg.OPTION_CHAIN_POLL_EXPIRIES + 1),
+        )
+        self.chain_poller = OptionChainPoller(
+            fetch=self._fetch_polled_chain,
+            expiries=self._poll_expiries,
+            interval=poll_interval,
+        )
+        self.subscriptions = SubscriptionManager(
+            start_feed=self.data_agent.start_live_feed,
+            update_feed=self.data_agent.update_subscriptions,
+            is_running=lambda: self.data_agent.is_running,
+            strikes_each_side=cfg.OPTION_FEED_STRIKES_EACH_SIDE,
+        )
+        self.chain_poller.subscribe(self._on_chain_update)
+        self.volume_profile = VolumeProfileAccumulator(window=cfg.VP_SESSIONS, value_area_pct=cfg.VP_VALUE_AREA)
+        self.session_profiles = SessionProfiles(value_area_pct=cfg.VP_VALUE_AREA)
         
         # ===== TRADE MANAGEMENT =====
         self.last_trade_times = {}  # Track last trade time per zone
@@ -58,11 +81,98 @@ class TradingOrchestrator:
         try:
             self.config.validate()
             self.is_running = True
+            if not self.config.USE_BACKTEST_MODE:
+                self._start_futures_feed()
+                self.chain_poller.start()
             log.info("✅ Trading system started")
         except Exception as e:
             log.error(f"❌ Failed to start system: {e}")
             raise
 
+    def _start_futures_feed(self):
+        """Stream the analysis futures contract so zone cycles can use live candles."""
+        self._sync_futures_subscription()
+        if not self.data_agent.is_running:
+            log.warning("⚠️ Futures feed not started - zone cycles will use REST history")
+
+    def _sync_futures_subscription(self):
+        """Point the "futures" group at the active contract (follows rollovers and instrument switches)."""
+        self.subscriptions.set_group("futures", [
+            make_instrument(self.config.NIFTY_FUTURES_EXCHANGE, self.config.NIFTY_FUTURES_SECURITY_ID)
+        ])
+        self.subscriptions.sync()
+
+    def _on_chain_update(self, event: Dict):
+        """Re-centre the streamed option strikes when the nearest expiry's spot moves."""
+        try:
+            instrument = self.config.get_active_instrument()
+            expiry = get_nearest_expiry(instrument)
+            if event["expiry"] != expiry or not self.data_agent.is_running:
+                return
+            from src.utils.security_master import security_master
+            if not security_master.is_ready:
+                return
+            strikes = security_master.option_strikes(instrument["symbol"], expiry)
+            moved = self.subscriptions.recenter_options(
+                instrument["symbol"], expiry, event.get("spot_price"), strikes, self._resolve_option_ids
+            )
+            if moved:
+                self.subscriptions.sync()
+        except Exception as e:
+            log.error(f"❌ Option subscription update error: {e}")
+
+    @staticmethod
+    def _resolve_option_ids(symbol: str, expiry: str, strikes) -> list:
+        """Call and put security IDs for strikes (unlisted contracts skipped)."""
+        from src.utils.security_master import security_master
+        resolved = security_master.resolve_chain(symbol, expiry, strikes)
+        ids = pd.concat([resolved["call_security_id"], resolved["put_security_id"]])
+        return ids.dropna().astype("int64").tolist()
+
+    def _refresh_position_subscriptions(self):
+        """Stream every open position's contract."""
+        instruments = [
+            make_instrument(trade.get("exchange_segment") or "NSE_FNO", trade["security_id"])
+            for trade in self.get_active_trades()
+            if trade.get("security_id") and trade.get("status") != "CLOSED"
+        ]
+        self.subscriptions.set_group("positions", instruments)
+        self.subscriptions.sync()
+
+    def _poll_expiries(self) -> list:
+        """Nearest OPTION_CHAIN_POLL_EXPIRIES expiries of the active instrument."""
+        instrument = self.config.get_active_instrument()
+        expiries = [get_nearest_expiry(instrument)]
+        while len(expiries) < self.config.OPTION_CHAIN_POLL_EXPIRIES:
+            after = datetime.strptime(expiries[-1], "%Y-%m-%d") + timedelta(days=1)
+            expiries.append(get_nearest_expiry(instrument, base_date=after))
+        return expiries
+
+    def _fetch_polled_chain(self, expiry: str) -> pd.DataFrame:
+        """Option chain fetch used by the background poller (archived when enabled)."""
+        option_chain = self.data_agent.fetch_option_chain(
+            self.config.INSTRUMENT_INDEX_SECURITY_ID,
+            self.config.INSTRUMENT_INDEX_EXCHANGE,
+            expiry
+        )
+        if self.config.OPTION_CHAIN_ARCHIVE and not option_chain.empty and validate_market_hours():
+            previous = self.chain_poller.latest(expiry)
+            if previous is None or not chains_equal(previous, option_chain):
+                option_chain_archive.append(self.config.get_active_instrument()["symbol"], expiry, option_chain)
+        return option_chain
+
+    async def _get_option_chain(self, expiry: str) -> pd.DataFrame:
+        """Latest polled option chain, fetching on demand when it is missing or stale."""
+        option_chain = self.chain_poller.latest(expiry, max_age=self.config.OPTION_CHAIN_MAX_AGE_SECONDS)
+        if option_chain is not None:
+            return option_chain
+        log.info(f"📡 No fresh polled chain for {expiry} - fetching on demand")
+        return await self.data_agent.fetch_option_chain_async(
+            self.config.INSTRUMENT_INDEX_SECURITY_ID,
+            self.config.INSTRUMENT_INDEX_EXCHANGE,
+            expiry
+        )
+
     def _handle_order_update(self, order_data: dict):
         try:
             data = order_data.get("Data", {})
@@ -229,7 +339,8 @@ class TradingOrchestrator:
                 log.info("🧪 Backtest mode active - loading historical data")
                 from_date = ensure_str_date(self.config.BACKTEST_FROM)
                 to_date = ensure_str_date(self.config.BACKTEST_TO)
-                df_15min = self.data_agent.fetch_historical_data(
+                df_15min = await asyncio.to_thread(
+                    self.data_agent.fetch_historical_data,
                     security_id=self.config.NIFTY_FUTURES_SECURITY_ID,
                     exchange_segment=self.config.NIFTY_FUTURES_EXCHANGE,
                     instrument_type=self.config.ANALYSIS_INSTRUMENT_TYPE,
@@ -244,21 +355,31 @@ class TradingOrchestrator:
                 end_date = datetime.now()
                 start_date = end_date - timedelta(days=5)
                 log.info("Fetching FUTURES Data")
-                df_15min = self.data_agent.fetch_historical_data(
+                await asyncio.to_thread(self._sync_futures_subscription)
+                df_15min = await asyncio.to_thread(
+                    self.data_agent.get_live_candles,
                     security_id=self.config.NIFTY_FUTURES_SECURITY_ID,
                     exchange_segment=self.config.NIFTY_FUTURES_EXCHANGE,
                     instrument_type=self.config.ANALYSIS_INSTRUMENT_TYPE,
                     timeframe=str(self.config.ZONE_TIMEFRAME),
-                    from_date=start_date.strftime("%Y-%m-%d"),
-                    to_date=end_date.strftime("%Y-%m-%d"),
                 )
+                if df_15min.empty:
+                    df_15min = await asyncio.to_thread(
+                        self.data_agent.fetch_historical_data,
+                        security_id=self.config.NIFTY_FUTURES_SECURITY_ID,
+                        exchange_segment=self.config.NIFTY_FUTURES_EXCHANGE,
+                        instrument_type=self.config.ANALYSIS_INSTRUMENT_TYPE,
+                        timeframe=str(self.config.ZONE_TIMEFRAME),
+                        from_date=start_date.strftime("%Y-%m-%d"),
+                        to_date=end_date.strftime("%Y-%m-%d"),
+                    )
             
             if df_15min.empty:
                 log.warning("⚠️ No 15-min data available")
                 return None
 
             # Fetch live quote
-            quotes = self.data_agent.fetch_market_quotes(
+            quotes = await self.data_agent.fetch_market_quotes_async(
                 securities=[self.config.NIFTY_FUTURES_SECURITY_ID],
                 exchange_segment=self.config.NIFTY_FUTURES_EXCHANGE
             )
@@ -270,7 +391,8 @@ class TradingOrchestrator:
             
             # STEP 1: Rule-based zone identification (FULL METADATA)
             log.info("📊 Running rule-based zone identification...")
-            vp_data = self.tech_agent.calculate_volume_profile(df_15min, self.config.VP_VALUE_AREA)
+            vp_data = self._get_volume_profile(df_15min)
+            session_profile = self._get_session_profile(df_15min)
             order_blocks = self.tech_agent.identify_order_blocks(df_15min, self.config.OB_LOOKBACK)
             fvgs = self.tech_agent.identify_fair_value_gaps(df_15min)
             rule_based_zones = self.tech_agent.identify_supply_demand_zones(df_15min, vp_data, order_blocks, fvgs)
@@ -284,6 +406,12 @@ class TradingOrchestrator:
             log.info(f"      VAH: {vp_data.get('vah', 0):.2f}")
             log.info(f"      VAL: {vp_data.get('val', 0):.2f}")
             log.info(f"      HVN Count: {len(vp_data.get('high_volume_nodes', []))}")
+            if session_profile:
+                log.info(
+                    f"   Composite ({session_profile['composite_sessions']} sessions): "
+                    f"POC {session_profile['composite_poc']:.2f}, VAH {session_profile['composite_vah']:.2f}, "
+                    f"VAL {session_profile['composite_val']:.2f}, naked POCs: {len(session_profile['naked_pocs'])}"
+                )
 
             # Log top zones
             demand_zones = rule_based_zones.get('demand_zones', [])
@@ -315,6 +443,7 @@ class TradingOrchestrator:
                 "bb_position": tech_indicators.get('bb_position'),
                 "recent_candlestick_patterns": tech_indicators.get('candlestick_patterns', [])[-5:],
                 "recent_chart_patterns": tech_indicators.get('chart_patterns', [])[-3:],
+                "session_profile": session_profile,
             }
 
             # STEP 2: LLM Enhancement (VALIDATION + RANKING)
@@ -365,6 +494,54 @@ class TradingOrchestrator:
             log.error(traceback.format_exc())
             return None
 
+    def _get_volume_profile(self, df: pd.DataFrame) -> Dict:
+        """
+        Volume profile for the zone cycle.
+
+        Live candles update the rolling profile incrementally (only new and
+        expired candles are applied); backtests and an empty rolling profile
+        fall back to a full calculation.
+        """
+        if not self.config.USE_BACKTEST_MODE:
+            try:
+                self.volume_profile.sync(df)
+                vp_data = self.volume_profile.snapshot()
+                if vp_data:
+                    return vp_data
+            except Exception as e:
+                log.error(f"❌ Rolling volume profile error: {e}")
+        return self.tech_agent.calculate_volume_profile(df, self.config.VP_VALUE_AREA)
+
+    def _get_session_profile(self, df: pd.DataFrame) -> Dict:
+        """
+        Multi-session volume profile context from the cached per-day profiles.
+
+        Returns:
+            dict with the composite POC/VAH/VAL over VP_COMPOSITE_SESSIONS,
+            the prior session's levels, the developing POC and the nearest
+            naked POCs (empty on failure or without volume)
+        """
+        try:
+            key = self.config.NIFTY_FUTURES_SECURITY_ID
+            self.session_profiles.update(key, df)
+            composite = self.session_profiles.composite(key, self.config.VP_COMPOSITE_SESSIONS)
+            if not composite:
+                return {}
+            sessions = self.session_profiles.sessions(key)
+            developing = self.session_profiles.developing_poc(key)
+            return {
+                "composite_sessions": composite["sessions_analyzed"],
+                "composite_poc": composite["poc"],
+                "composite_vah": composite["vah"],
+                "composite_val": composite["val"],
+                "prior_session": self.session_profiles.day_profile(key, sessions[-2]) if len(sessions) > 1 else {},
+                "developing_poc": developing[-1]["poc"] if developing else None,
+                "naked_pocs": self.session_profiles.naked_pocs(key)[:5],
+            }
+        except Exception as e:
+            log.error(f"❌ Session volume profile error: {e}")
+            return {}
+
     def _merge_llm_and_rule_zones(
         self,
         rule_based_zones: Dict,
@@ -457,6 +634,12 @@ class TradingOrchestrator:
 
     async def run_trade_identification_cycle(self) -> Optional[Dict]:
         """3-minute cycle for trade identification with deduplication."""
+        # Trade-path requests are served ahead of the poller and dashboard
+        with request_priority(PRIORITY_TRADING):
+            return await self._identify_trade()
+
+    async def _identify_trade(self) -> Optional[Dict]:
+        """Trade identification and execution (run at PRIORITY_TRADING)."""
         log.info("🎯 Trade identification cycle starting...")
         
         if self.config.NO_TRADES_ON_EXPIRY and self.config.is_expiry_day():
@@ -484,7 +667,7 @@ class TradingOrchestrator:
                 log.info("⚠️ Trade skipped: Maximum positions reached")
                 return None
 
-            quotes = self.data_agent.fetch_market_quotes(
+            quotes = await self.data_agent.fetch_market_quotes_async(
                 securities=[self.config.NIFTY_FUTURES_SECURITY_ID],
                 exchange_segment=self.config.NIFTY_FUTURES_EXCHANGE
             )
@@ -507,11 +690,14 @@ class TradingOrchestrator:
                 return None
 
             expiry = get_nearest_expiry(self.config.get_active_instrument())
-            option_chain = self.data_agent.fetch_option_chain(
-                self.config.NIFTY_INDEX_SECURITY_ID,
-                self.config.NIFTY_INDEX_EXCHANGE,
-                expiry
-            )
+            option_chain = await self._get_option_chain(expiry)
+            
+            # Resolve every strike's contract IDs once for selection and execution
+            from src.utils.security_master import security_master
+            if await security_master.wait_ready(timeout=5):
+                security_master.attach_security_ids(
+                    option_chain, self.config.get_active_instrument()["symbol"], expiry
+                )
             
             option_analysis = self.options_agent.analyze_option_chain(
                 option_chain, current_price, zones
@@ -741,35 +927,27 @@ class TradingOrchestrator:
             if setup.get("needs_live_price"):
                 log.info(f"🔍 Fetching live option chain for strike {setup['strike']}...")
                 expiry = setup.get("expiry") or get_nearest_expiry(self.config.get_active_instrument())
-                option_chain = self.data_agent.fetch_option_chain(
+                option_chain = await self.data_agent.fetch_option_chain_async(
                     self.config.INSTRUMENT_INDEX_SECURITY_ID,
                     self.config.INSTRUMENT_INDEX_EXCHANGE,
                     expiry
                 )
                 
-                if not option_chain or option_chain.get("status") != "success":
+                if option_chain is None or option_chain.empty:
                     log.error("❌ Failed to fetch fresh option chain")
                     return {"success": False, "error": "Could not fetch live option prices"}
                 
                 strike = setup["selected_strike"]
-                option_type = "CE" if setup["option_type"] == "CALL" else "PE"
-                
-                strike_data = None
-                for chain_strike in option_chain.get("data", []):
-                    if chain_strike.get("strike_price") == strike:
-                        if option_type == "CE":
-                            strike_data = chain_strike.get("call_options", {})
-                        else:
-                            strike_data = chain_strike.get("put_options", {})
-                        break
+                ltp_col = "call_ltp" if setup["option_type"] == "CALL" else "put_ltp"
                 
-                if not strike_data:
+                strike_rows = option_chain.loc[option_chain["strike"] == float(strike), ltp_col]
+                if strike_rows.empty:
                     log.error(f"❌ Strike {strike} not found")
                     return {"success": False, "error": "Strike not found"}
                 
-                live_premium = strike_data.get("LTP") or strike_data.get("ltp")
+                live_premium = float(strike_rows.iloc[0])
                 
-                if not live_premium or live_premium == 0:
+                if pd.isna(live_premium) or live_premium == 0:
                     log.warning(f"⚠️ No live price, using estimate")
                     live_premium = setup["entry_premium"]
                 else:
@@ -785,12 +963,20 @@ class TradingOrchestrator:
             instrument = self.config.get_active_instrument()
             symbol = instrument["symbol"]
             
-            security_id = security_master.get_option_security_id(
-                symbol=symbol,
-                strike=setup["selected_strike"],
-                option_type=setup["option_type"],
-                expiry=expiry
-            )
+            # Prefer the ID resolved with the option chain
+            security_id = setup.get("security_id")
+            
+            if not security_id:
+                if not await security_master.wait_ready(timeout=30):
+                    log.error("❌ Security master not ready")
+                    return {"success": False, "error": "Security master not loaded"}
+                
+                security_id = security_master.get_option_security_id(
+                    symbol=symbol,
+                    strike=setup["selected_strike"],
+                    option_type=setup["option_type"],
+                    expiry=expiry
+                )
             
             if not security_id:
                 log.error(f"❌ Could not find security ID")
@@ -830,7 +1016,7 @@ class TradingOrchestrator:
             }
             
             #result = self.execution_agent.place_bracket_or_super_order(order_params)
-            result = self.execution_agent.place_super_order(order_params)
+            result = await self.execution_agent.place_super_order_async(order_params)
 
             if result["success"]:
                 record["order_ids"] = result
@@ -921,6 +1107,7 @@ class TradingOrchestrator:
                 "option_type": self._extract_option_type_from_symbol(position.get("tradingSymbol", "")),
                 "expiry": position.get("expiryDate"),
                 "security_id": position.get("securityId"),
+                "exchange_segment": position.get("exchangeSegment"),
 
                 # Prices
                 "entry_price": buy_avg if net_qty > 0 else sell_avg,
@@ -952,6 +1139,7 @@ class TradingOrchestrator:
                 "strike": self._extract_strike_from_symbol(order.get("tradingSymbol", "")),
                 "option_type": self._extract_option_type_from_symbol(order.get("tradingSymbol", "")),
                 "security_id": order.get("securityId"),
+                "exchange_segment": order.get("exchangeSegment"),
 
                 # Order details
                 "entry_price": float(order.get("price", 0)),
@@ -1005,8 +1193,8 @@ class TradingOrchestrator:
                     "mode": "paper"
                 }
             
-            # Live trading - fetch from Dhan using data agent
-            positions = self.data_agent.get_positions()
+            # Live trading - fetch from Dhan using data agent (display only, stale is fine)
+            positions = self.data_agent.get_positions(allow_stale=True)
             
             if positions.get("status") == "success":
                 total_realized = 0
@@ -1066,6 +1254,9 @@ class TradingOrchestrator:
                     await self.run_trade_identification_cycle()
                     last_trade_check = current_time
                 
+                if not self.config.USE_BACKTEST_MODE:
+                    await asyncio.to_thread(self._refresh_position_subscriptions)
+                
                 await asyncio.sleep(30)
                 
             except asyncio.CancelledError:
@@ -1082,6 +1273,11 @@ class TradingOrchestrator:
     def shutdown(self):
         log.info("🛑 Shutting down trading system...")
         self.is_running = False
+        if hasattr(self, "chain_poller"):
+            self.chain_poller.stop()
+            option_chain_archive.close()
+        if hasattr(self, "data_agent"):
+            self.data_agent.stop_live_feed()
         if hasattr(self, "execution_agent"):
             self.execution_agent.stop_order_updates()
         log.info("✅ System shutdown complete")
@@ -5,52 +5,73 @@ from dhanhq import dhanhq, MarketFeed
 import threading
 import asyncio
 import requests
-import queue
 import time
-from typing import Dict, Optional
+import numpy as np
+from typing import Dict, Optional, Tuple
+from src.config import Config
 from src.utils.logger import log
+from src.utils.tick_store import TickStore, TICK_DTYPE
+from src.utils.candle_aggregator import CandleAggregator
+from src.utils.candle_store import candle_store
+from src.utils.dhan_client import get_dhan_client
+from src.utils.rate_limiter import backoff_delay
+from src.utils.single_flight import SingleFlight
+from src.utils.cache import TTLCache
+from src.utils.option_chain import parse_option_chain, greeks_coverage
+from src.utils.feed_supervisor import FeedSupervisor
+
+# Seconds each kind of response stays fresh
+CACHE_TTLS = {
+    'positions': 10,
+    'orders': 5,
+    'quotes': 3,
+    'funds': 30,
+    'holdings': 60,
+}
+
+# Extra seconds a stale response is served while it refreshes in the background
+# (positions and orders only when the caller allows it, e.g. dashboard reads)
+CACHE_STALE_TTLS = {
+    'positions': 20,
+    'orders': 10,
+    'quotes': 2,
+    'funds': 60,
+    'holdings': 120,
+}
+
+# Minutes newer than this may not be published by the history API yet, so
+# they are not remembered as backfilled
+BACKFILL_SETTLE_SECONDS = 120
+
+
+def _is_success(response) -> bool:
+    return bool(response) and response.get("status") == "success"
 
 
 class DataCollectionAgent:
     """Agent responsible for fetching and streaming Dhan market data."""
     
-    def __init__(self, dhan_context):
+    def __init__(self, dhan_context, tick_buffer_depth: Optional[int] = None):
         self.dhan_context = dhan_context
-        self.dhan = dhanhq(dhan_context)
+        self.dhan = get_dhan_client(dhan_context)
         self.market_feed = None
-        self.live_data_queue = queue.Queue()
+        self.feed_supervisor = None
+        self._candle_sources: Dict[str, Tuple[str, str]] = {}
+        self.tick_store = TickStore(tick_buffer_depth or Config.TICK_BUFFER_DEPTH)
+        self.candles = CandleAggregator()
+        self.candle_store = candle_store
+        self._inflight = SingleFlight("data_agent")
         self.latest_data = {}
         self.is_running = False
         self.subscribed_instruments = []
         
-        # ===== ADD CACHING =====
-        self._cache = {}
-        self._cache_ttl = {
-            'positions': 10,      # Cache positions for 10 seconds
-            'orders': 5,          # Cache orders for 5 seconds
-            'quotes': 3,          # Cache quotes for 3 seconds
-            'funds': 30,          # Cache funds for 30 seconds
-            'holdings': 60,       # Cache holdings for 60 seconds
-        }
-    
-    def _get_cached(self, key: str) -> Optional[Dict]:
-        """Get cached data if still valid."""
-        if key in self._cache:
-            data, timestamp = self._cache[key]
-            ttl = self._cache_ttl.get(key.split('_')[0], 5)
-            age = (datetime.now() - timestamp).total_seconds()
-            
-            if age < ttl:
-                log.debug(f"📦 Cache HIT for {key} (age: {age:.1f}s)")
-                return data
-            else:
-                log.debug(f"⏰ Cache EXPIRED for {key} (age: {age:.1f}s)")
-        
-        return None
-    
-    def _set_cache(self, key: str, data: Dict):
-        """Set cache data with timestamp."""
-        self._cache[key] = (data, datetime.now())
+        # ===== CACHING =====
+        self.cache = TTLCache(
+            ttls=CACHE_TTLS,
+            stale_ttls=CACHE_STALE_TTLS,
+            max_entries=Config.DATA_CACHE_MAX_ENTRIES,
+            name="data_agent",
+        )
     
     def start_live_feed(self, instruments):
         """Start real-time market feed (WebSocket) v2.2."""
@@ -64,15 +85,25 @@ class DataCollectionAgent:
                 instruments,
                 version="v2"
             )
+            self.feed_supervisor = FeedSupervisor(
+                self.market_feed,
+                on_message=self._process_market_data,
+                on_reconnect=self._backfill_feed_gap,
+                heartbeat_seconds=Config.FEED_HEARTBEAT_SECONDS,
+                stale_seconds=Config.FEED_STALE_SECONDS,
+                backoff_base=Config.FEED_RECONNECT_BASE_SECONDS,
+                backoff_max=Config.FEED_RECONNECT_MAX_SECONDS,
+            )
             
-            feed_thread = threading.Thread(
+            self.subscribed_instruments = list(instruments)
+            self.is_running = True
+            self.feed_thread = threading.Thread(
                 target=self._market_feed_loop,
                 name="MarketFeedWorker",
                 daemon=True
             )
-            feed_thread.start()
+            self.feed_thread.start()
 
-            self.is_running = True
             log.info(f"✅ Market feed started successfully")
             return True
 
@@ -83,31 +114,16 @@ class DataCollectionAgent:
             return False
 
     def _market_feed_loop(self):
-        """Background thread for market feed with its own event loop."""
+        """Background thread running the supervised market feed on its own event loop."""
         log.info("🔌 Market feed thread started")
         
         loop = asyncio.new_event_loop()
         asyncio.set_event_loop(loop)
-        
-        async def feed_worker():
-            """Async worker that handles the feed."""
-            while self.is_running:
-                try:
-                    await self.market_feed.connect()
-                    response = await self.market_feed.get_data()
-                    
-                    if response:
-                        self._process_market_data(response)
-                        
-                except Exception as e:
-                    if self.is_running:
-                        log.error(f"❌ Feed error: {e}")
-                        await asyncio.sleep(2)
-                    else:
-                        break
+        # MarketFeed dispatches (un)subscribe sends to feed.loop; point it at the loop owning the socket
+        self.market_feed.loop = loop
         
         try:
-            loop.run_until_complete(feed_worker())
+            loop.run_until_complete(self.feed_supervisor.run(lambda: self.is_running))
         except Exception as e:
             log.error(f"❌ Market feed thread error: {e}")
             import traceback
@@ -125,9 +141,10 @@ class DataCollectionAgent:
             security_id = str(data.get("security_id", ""))
 
             if security_id:
-                data["received_at"] = datetime.now()
+                received_at = datetime.now()
+                data["received_at"] = received_at
                 self.latest_data[security_id] = data
-                self.live_data_queue.put(data)
+                self._record_tick(security_id, data, received_at.timestamp())
 
                 if not hasattr(self, '_log_count'):
                     self._log_count = {}
@@ -140,6 +157,73 @@ class DataCollectionAgent:
         except Exception as e:
             log.error(f"Error processing market data: {e}")
 
+    def update_subscriptions(self, subscribe, unsubscribe) -> bool:
+        """
+        Change the running feed's instruments.
+        
+        Args:
+            subscribe: Instruments to add ((exchange, security_id, mode) tuples)
+            unsubscribe: Instruments to drop
+        
+        Returns:
+            True if applied (the list is also used when the feed reconnects);
+            unsubscribed securities' ticks and candles are released
+        """
+        try:
+            if not self.is_running or not self.market_feed:
+                return False
+            if unsubscribe:
+                self.market_feed.unsubscribe_symbols(list(unsubscribe))
+            if subscribe:
+                self.market_feed.subscribe_symbols(list(subscribe))
+            self.subscribed_instruments = list(self.market_feed.instruments)
+            
+            # Free tick buffers and candles of securities no longer streamed
+            streamed = {str(instrument[1]) for instrument in self.subscribed_instruments}
+            for security_id in {str(instrument[1]) for instrument in unsubscribe or ()} - streamed:
+                self.tick_store.discard(security_id)
+                self.candles.discard(security_id)
+                self.latest_data.pop(security_id, None)
+                self._candle_sources.pop(security_id, None)
+            return True
+        except Exception as e:
+            log.error(f"❌ Feed subscription update error: {e}")
+            return False
+    
+    def _backfill_feed_gap(self, gap_start: float, gap_end: float):
+        """
+        Fill data missed while the feed was down: candle gaps and stale LTPs.
+        
+        Args:
+            gap_start: Epoch seconds of the last message before the outage
+            gap_end: Epoch seconds of the reconnect
+        """
+        for security_id, (exchange_segment, instrument_type) in list(self._candle_sources.items()):
+            gaps = self.candles.gaps(security_id, gap_end)
+            if gaps:
+                self._backfill_candles(security_id, exchange_segment, instrument_type, gaps)
+        
+        by_segment: Dict[str, list] = {}
+        for instrument in list(self.market_feed.instruments):
+            segment = self.market_feed.get_exchange_segment(instrument[0])
+            by_segment.setdefault(segment, []).append(str(instrument[1]))
+        
+        refreshed = 0
+        for segment, securities in by_segment.items():
+            for security_id, quote in self.fetch_market_quotes(securities, segment).items():
+                latest = self.latest_data.get(security_id)
+                if quote.get("LTP") is None or (latest and latest["received_at"].timestamp() >= gap_end):
+                    continue
+                self.latest_data[security_id] = {
+                    **(latest or {}), **quote, "received_at": datetime.now(), "source": "rest"
+                }
+                refreshed += 1
+        log.info(f"🩹 Feed gap backfilled: {refreshed} quote(s) refreshed")
+    
+    def feed_metrics(self) -> Optional[Dict]:
+        """Feed health (connection, last tick age, reconnects, messages/sec), None if no feed."""
+        return self.feed_supervisor.metrics() if self.feed_supervisor else None
+    
     def stop_live_feed(self):
         """Stop market feed."""
         try:
@@ -156,10 +240,136 @@ class DataCollectionAgent:
             return
         security_id = str(message.get("security_id", ""))
         if security_id:
-            message["received_at"] = datetime.now()
+            received_at = datetime.now()
+            message["received_at"] = received_at
             self.latest_data[security_id] = message
-            self.live_data_queue.put(message)
+            self._record_tick(security_id, message, received_at.timestamp())
+    
+    def _record_tick(self, security_id: str, message: Dict, timestamp: float):
+        """Append a feed message to the tick store and roll it into the live candles."""
+        if self.tick_store.record(message, timestamp):
+            tick = self.tick_store.get(security_id).last()
+            self.candles.on_tick(security_id, timestamp, float(tick["ltp"]), int(tick["volume"]))
+    
+    def get_recent_ticks(self, security_id, n: Optional[int] = None) -> np.ndarray:
+        """
+        Get recent ticks for a security (copy, chronological).
+        
+        Args:
+            security_id: Security ID
+            n: Number of ticks (None for everything buffered)
+        
+        Returns:
+            Structured array with timestamp, ltp, volume, oi, bid, ask
+        """
+        buffer = self.tick_store.get(security_id)
+        if buffer is None:
+            return np.empty(0, dtype=TICK_DTYPE)
+        return buffer.latest(n)
+    
+    def get_tick_views(self, security_id) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Get zero-copy views of a security's tick buffer (oldest segment first).
+        
+        Views alias the live buffer and are overwritten as new ticks arrive.
         
+        Args:
+            security_id: Security ID
+        
+        Returns:
+            (older, newer) structured array views
+        """
+        return self.tick_store.buffer(security_id).segments()
+        
+    def get_live_candles(
+        self,
+        security_id,
+        exchange_segment,
+        instrument_type,
+        timeframe="15",
+        lookback_days: Optional[int] = None,
+    ) -> pd.DataFrame:
+        """
+        Get candles from the live aggregator, seeding or backfilling via REST only when needed.
+        
+        The first call seeds the aggregator with 1-min history; later calls
+        fetch history only for in-session gaps (e.g. while the feed was down).
+        
+        Args:
+            security_id: Security ID
+            exchange_segment: Exchange segment (e.g. NSE_FNO)
+            instrument_type: Instrument type (e.g. FUTIDX)
+            timeframe: Candle interval in minutes (1, 3, 5 or 15)
+            lookback_days: Seed history length (defaults to Config.CANDLE_SEED_DAYS)
+        
+        Returns:
+            DataFrame with timestamp, open, high, low, close, volume (empty if unsupported/unavailable)
+        """
+        try:
+            if not self.candles.supports(timeframe):
+                log.warning(f"⚠️ {timeframe}-min candles not aggregated live")
+                return pd.DataFrame()
+            
+            key = str(security_id)
+            now = datetime.now()
+            self._candle_sources[key] = (exchange_segment, instrument_type)
+            if not self.candles.is_seeded(key):
+                days = lookback_days or Config.CANDLE_SEED_DAYS
+                from_date = (now - timedelta(days=days)).strftime("%Y-%m-%d")
+                to_date = now.strftime("%Y-%m-%d")
+                log.info(f"🕯️ Seeding live candles for {key} from {from_date}")
+                history = self.fetch_historical_data(
+                    security_id=security_id,
+                    exchange_segment=exchange_segment,
+                    instrument_type=instrument_type,
+                    timeframe="1",
+                    from_date=from_date,
+                    to_date=to_date,
+                )
+                if history.empty:
+                    return pd.DataFrame()
+                self.candles.seed(key, history)
+            else:
+                gaps = self.candles.gaps(key, now.timestamp())
+                if gaps:
+                    self._backfill_candles(security_id, exchange_segment, instrument_type, gaps)
+            
+            return self.candles.get_candles(key, int(timeframe))
+        
+        except Exception as e:
+            log.error(f"❌ Live candle error: {str(e)}")
+            import traceback
+            log.error(traceback.format_exc())
+            return pd.DataFrame()
+    
+    def _backfill_candles(self, security_id, exchange_segment, instrument_type, gaps):
+        """
+        Fetch 1-min history covering candle gaps and merge it into the aggregator.
+        
+        Gaps are marked as backfilled unless a request failed, so minutes that
+        stay empty (no trades, holidays) are not requested again.
+        """
+        first = pd.to_datetime(gaps[0][0], unit="s")
+        last = pd.to_datetime(gaps[-1][1], unit="s")
+        log.info(f"🩹 Backfilling {len(gaps)} candle gap(s) for {security_id}: {first} → {last} UTC")
+        
+        failed = []
+        
+        def fetch(start, end, native_interval):
+            df = self._fetch_intraday(security_id, exchange_segment, instrument_type, native_interval, start, end)
+            if df is None:
+                failed.append((start, end))
+            return df
+        
+        history = self.candle_store.get_candles(
+            security_id, exchange_segment, 1, first.strftime("%Y-%m-%d"), last.strftime("%Y-%m-%d"), fetch
+        )
+        if not history.empty:
+            self.candles.seed(security_id, history)
+        if not failed:
+            settled = int(time.time()) - BACKFILL_SETTLE_SECONDS
+            self.candles.mark_backfilled(security_id, [(start, min(end, settled)) for start, end in gaps if start < settled])
+    
     def fetch_historical_data(
         self,
         security_id,
@@ -170,97 +380,115 @@ class DataCollectionAgent:
         to_date=None,
         oi=False
     ):
-        """Fetch historical intraday minute data using new v2.2 API."""
+        """
+        Fetch intraday candles, serving closed days from the local candle store.
+        
+        Only days missing from the store (plus the current day) are requested
+        from Dhan. Without a date range the request goes straight to the API.
+        
+        Args:
+            security_id: Security ID
+            exchange_segment: Exchange segment (e.g. NSE_FNO)
+            instrument_type: Instrument type (e.g. FUTIDX)
+            timeframe: Candle interval in minutes (non-native intervals are resampled from 1-min)
+            from_date: First day, YYYY-MM-DD (inclusive)
+            to_date: Last day, YYYY-MM-DD (inclusive)
+            oi: Include open interest
+        
+        Returns:
+            DataFrame with open, high, low, close, volume and timestamp (UTC)
+        """
         try:
-            params = {
-                "security_id": security_id,
-                "exchange_segment": exchange_segment,
-                "instrument_type": instrument_type,
-                "from_date": from_date,
-                "to_date": to_date,
-            }
-            result = self.dhan.intraday_minute_data(**params)
-            
-            if not result or result.get("status") != "success":
-                return pd.DataFrame()
-            
-            df = pd.DataFrame(result["data"])
-            df["timestamp"] = pd.to_datetime(df["timestamp"], unit="s")
-            df = df.sort_values("timestamp")
-            return df
+            interval = int(timeframe)
+            
+            if not from_date or not to_date:
+                df = self._fetch_intraday(security_id, exchange_segment, instrument_type, interval, from_date, to_date, oi)
+                return df if df is not None else pd.DataFrame()
+            
+            def fetch(start, end, native_interval):
+                return self._fetch_intraday(security_id, exchange_segment, instrument_type, native_interval, start, end, oi)
+            
+            key = ("history", str(security_id), exchange_segment, interval, str(from_date), str(to_date), oi)
+            return self._inflight.do_sync(
+                key,
+                lambda: self.candle_store.get_candles(
+                    security_id, exchange_segment, interval, from_date, to_date, fetch, oi=oi
+                ),
+                copy_result=pd.DataFrame.copy,
+            )
         
         except Exception as e:
             log.error(f"❌ Historical fetch error: {str(e)}")
             return pd.DataFrame()
     
+    def _fetch_intraday(self, security_id, exchange_segment, instrument_type, interval, from_date, to_date, oi=False):
+        """
+        Request intraday candles from Dhan.
+        
+        Returns:
+            DataFrame sorted by timestamp, or None if the request failed
+        """
+        result = self.dhan.intraday_minute_data(
+            security_id=security_id,
+            exchange_segment=exchange_segment,
+            instrument_type=instrument_type,
+            from_date=from_date,
+            to_date=to_date,
+            interval=interval,
+            oi=oi,
+        )
+        
+        if not result or result.get("status") != "success":
+            log.warning(f"⚠️ Intraday data request failed: {result.get('remarks') if result else result}")
+            return None
+        
+        df = pd.DataFrame(result["data"])
+        if df.empty:
+            return df
+        df["timestamp"] = pd.to_datetime(df["timestamp"], unit="s")
+        df = df.sort_values("timestamp")
+        return df
+    
     def fetch_option_chain(self, security_id, exchange_segment, expiry_date, max_retries=3):
-        """Fetch option chain with proper data transformation including Greeks."""
+        """Fetch option chain (sync wrapper over fetch_option_chain_async)."""
+        return self.dhan.run(self.fetch_option_chain_async(security_id, exchange_segment, expiry_date, max_retries))
+    
+    async def fetch_option_chain_async(self, security_id, exchange_segment, expiry_date, max_retries=3):
+        """Fetch option chain; concurrent callers for the same expiry share one request."""
+        key = ("option_chain", str(security_id), exchange_segment, str(expiry_date))
+        return await self._inflight.do(
+            key,
+            lambda: self._fetch_option_chain(security_id, exchange_segment, expiry_date, max_retries),
+            copy_result=pd.DataFrame.copy,
+        )
+    
+    async def _fetch_option_chain(self, security_id, exchange_segment, expiry_date, max_retries=3):
+        """Fetch an option chain snapshot as flat numeric columns (see parse_option_chain)."""
         for attempt in range(max_retries):
             try:
-                time.sleep(3)
+                log.debug(f"Fetching option chain {security_id}/{exchange_segment} {expiry_date} (attempt {attempt + 1}/{max_retries})")
                 
-                log.info(f"Fetching option chain (attempt {attempt + 1}/{max_retries})")
-                log.info(f"  Security: {security_id}, Exchange: {exchange_segment}, Expiry: {expiry_date}")
-                
-                chain = self.dhan.option_chain(
+                chain = await self.dhan.aio.option_chain(
                     under_security_id=int(security_id),
                     under_exchange_segment=exchange_segment,
                     expiry=str(expiry_date)
                 )
                 
                 if chain and chain.get("status") == "success":
-                    outer_data = chain.get("data", {})
-                    inner_data = outer_data.get("data", {})
+                    inner_data = chain.get("data", {}).get("data", {})
                     option_chain_data = inner_data.get("oc", {})
-                    spot_price = inner_data.get("last_price", 0)
                     
                     if not option_chain_data:
                         log.warning("Empty option chain in response")
                         return pd.DataFrame()
                     
-                    rows = []
-                    for strike_str, strike_data in option_chain_data.items():
-                        strike = float(strike_str)
-                        
-                        ce_data = strike_data.get("ce", {})
-                        pe_data = strike_data.get("pe", {})
-                        
-                        call_greeks = ce_data.get('greeks', {})
-                        put_greeks = pe_data.get('greeks', {})
-                        
-                        row = {
-                            'strike': strike,
-                            'call_oi': ce_data.get('oi', 0),
-                            'call_volume': ce_data.get('volume', 0),
-                            'call_iv': ce_data.get('implied_volatility', 0),
-                            'call_ltp': ce_data.get('last_price', 0),
-                            'call_oi_change': ce_data.get('oi', 0) - ce_data.get('previous_oi', 0),
-                            'call_greeks': call_greeks,
-                            'put_oi': pe_data.get('oi', 0),
-                            'put_volume': pe_data.get('volume', 0),
-                            'put_iv': pe_data.get('implied_volatility', 0),
-                            'put_ltp': pe_data.get('last_price', 0),
-                            'put_oi_change': pe_data.get('oi', 0) - pe_data.get('previous_oi', 0),
-                            'put_greeks': put_greeks,
-                        }
-                        rows.append(row)
-                    
-                    df = pd.DataFrame(rows)
-                    df = df.sort_values('strike')
-                    
-                    has_call_greeks = df['call_greeks'].apply(lambda x: isinstance(x, dict) and len(x) > 0).sum()
-                    has_put_greeks = df['put_greeks'].apply(lambda x: isinstance(x, dict) and len(x) > 0).sum()
-                    
-                    log.info(f"✅ Processed {len(df)} strikes from option chain")
-                    log.info(f"   Spot price: {spot_price}")
-                    log.info(f"   Strike range: {df['strike'].min()} to {df['strike'].max()}")
-                    log.info(f"   Strikes with call Greeks: {has_call_greeks}/{len(df)}")
-                    log.info(f"   Strikes with put Greeks: {has_put_greeks}/{len(df)}")
-                    
-                    if has_call_greeks > 0:
-                        sample_strike = df[df['call_greeks'].apply(lambda x: isinstance(x, dict) and len(x) > 0)].iloc[0]
-                        log.info(f"   Sample call Greeks at strike {sample_strike['strike']}: {sample_strike['call_greeks']}")
-                    
+                    df = parse_option_chain(option_chain_data)
+                    df.attrs["spot_price"] = inner_data.get("last_price", 0)
+                    call_greeks, put_greeks = greeks_coverage(df)
+                    log.info(
+                        f"✅ Processed {len(df)} strikes from option chain "
+                        f"(spot {inner_data.get('last_price', 0)}, greeks C:{call_greeks} P:{put_greeks})"
+                    )
                     return df
                 else:
                     remarks = chain.get("remarks", {})
@@ -270,8 +498,7 @@ class DataCollectionAgent:
             except Exception as e:
                 log.error(f"Attempt {attempt + 1} failed: {str(e)}")
                 if attempt < max_retries - 1:
-                    time.sleep(5)
-                    continue
+                    await asyncio.sleep(backoff_delay(attempt))
                 else:
                     import traceback
                     log.error(traceback.format_exc())
@@ -280,130 +507,132 @@ class DataCollectionAgent:
         return pd.DataFrame()
 
     def fetch_market_quotes(self, securities, exchange_segment="NSE_FNO"):
+        """Fetch market quotes (sync wrapper over fetch_market_quotes_async)."""
+        return self.dhan.run(self.fetch_market_quotes_async(securities, exchange_segment))
+    
+    async def fetch_market_quotes_async(self, securities, exchange_segment="NSE_FNO"):
+        """Fetch market quotes; concurrent callers for the same securities share one request."""
+        key = ("quotes", exchange_segment, tuple(str(sec) for sec in securities))
+        return await self._inflight.do(key, lambda: self._fetch_market_quotes(securities, exchange_segment))
+    
+    async def _fetch_market_quotes(self, securities, exchange_segment="NSE_FNO"):
         """Fetch market quote data with caching."""
         try:
-            # Create cache key
-            cache_key = f"quotes_{exchange_segment}_{'_'.join(map(str, securities))}"
-            
-            # Check cache first
-            cached = self._get_cached(cache_key)
-            if cached is not None:
-                return cached
-            
-            # Fetch from API
-            securities = [int(sec) if isinstance(sec, str) else sec for sec in securities]
-            
-            log.debug(f"Fetching quotes for {exchange_segment}: {securities}")
-            
-            response = self.dhan.ticker_data(
-                securities={exchange_segment: securities}
+            key = (exchange_segment, tuple(str(sec) for sec in securities))
+            return await self.cache.get_or_fetch(
+                "quotes",
+                key,
+                lambda: self._request_market_quotes(securities, exchange_segment),
+                should_cache=bool,
             )
-            
-            if not response or response.get("status") != "success":
-                log.error(f"API returned error: {response}")
-                # Return cached data even if expired
-                if cache_key in self._cache:
-                    log.warning("⚠️ Using expired cache due to API error")
-                    return self._cache[cache_key][0]
-                return {}
-            
-            outer_data = response.get("data", {})
-            inner_data = outer_data.get("data", {})
-            exchange_data = inner_data.get(exchange_segment, {})
-            
-            quotes = {}
-            for sec_id_str, quote_data in exchange_data.items():
-                quotes[sec_id_str] = {
-                    "LTP": quote_data.get("last_price"),
-                    "security_id": sec_id_str,
-                    "exchange_segment": exchange_segment
-                }
-            
-            # Cache the result
-            self._set_cache(cache_key, quotes)
-            
-            log.debug(f"Processed quotes: {quotes}")
-            return quotes
-            
         except Exception as e:
             log.error(f"Market quote error: {str(e)}")
-            # Try to return cached data
-            if 'cache_key' in locals() and cache_key in self._cache:
-                log.warning("⚠️ Using cached data due to exception")
-                return self._cache[cache_key][0]
             return {}
+    
+    async def _request_market_quotes(self, securities, exchange_segment):
+        """Request LTPs from Dhan ({} on failure)."""
+        securities = [int(sec) if isinstance(sec, str) else sec for sec in securities]
+        
+        log.debug(f"Fetching quotes for {exchange_segment}: {securities}")
+        
+        response = await self.dhan.aio.ticker_data(
+            securities={exchange_segment: securities}
+        )
+        
+        if not response or response.get("status") != "success":
+            log.error(f"API returned error: {response}")
+            return {}
+        
+        outer_data = response.get("data", {})
+        inner_data = outer_data.get("data", {})
+        exchange_data = inner_data.get(exchange_segment, {})
+        
+        quotes = {}
+        for sec_id_str, quote_data in exchange_data.items():
+            quotes[sec_id_str] = {
+                "LTP": quote_data.get("last_price"),
+                "security_id": sec_id_str,
+                "exchange_segment": exchange_segment
+            }
+        
+        log.debug(f"Processed quotes: {quotes}")
+        return quotes
 
-    def get_positions(self) -> Dict:
+    def get_positions(self, allow_stale: bool = False) -> Dict:
+        """Get all positions (sync wrapper over get_positions_async)."""
+        return self.dhan.run(self.get_positions_async(allow_stale))
+    
+    async def get_positions_async(self, allow_stale: bool = False) -> Dict:
+        """
+        Get all positions; concurrent callers share one request.
+        
+        Args:
+            allow_stale: Serve a stale cached response while it refreshes
+                (dashboard reads only; trading decisions need fresh positions)
+        """
+        return await self._inflight.do(("positions", allow_stale), lambda: self._get_positions(allow_stale))
+    
+    async def _get_positions(self, allow_stale: bool = False) -> Dict:
         """Get all positions from Dhan with caching."""
         try:
-            cache_key = "positions_all"
-            
-            # Check cache
-            cached = self._get_cached(cache_key)
-            if cached is not None:
-                return cached
-            
-            # Fetch from API
-            positions = self.dhan.get_positions()
-            
-            if positions.get("status") == "success":
-                log.info(f"✅ Fetched {len(positions.get('data', []))} positions from Dhan")
-                self._set_cache(cache_key, positions)
-            else:
-                log.warning(f"⚠️ Failed to fetch positions: {positions.get('remarks')}")
-                # Return cached even if expired
-                if cache_key in self._cache:
-                    return self._cache[cache_key][0]
-            
-            return positions
-            
+            return await self.cache.get_or_fetch(
+                "positions", "all", self._request_positions, should_cache=_is_success, allow_stale=allow_stale
+            )
         except Exception as e:
             log.error(f"Error fetching positions: {e}")
-            # Return cached data if available
-            cache_key = "positions_all"
-            if cache_key in self._cache:
-                log.warning("⚠️ Using cached positions due to error")
-                return self._cache[cache_key][0]
             return {
                 "status": "error",
                 "error": str(e),
                 "data": []
             }
+    
+    async def _request_positions(self) -> Dict:
+        """Request positions from Dhan (uncached)."""
+        positions = await self.dhan.aio.get_positions()
+        
+        if positions.get("status") == "success":
+            log.info(f"✅ Fetched {len(positions.get('data', []))} positions from Dhan")
+        else:
+            log.warning(f"⚠️ Failed to fetch positions: {positions.get('remarks')}")
+        return positions
 
-    def get_orders(self) -> Dict:
+    def get_orders(self, allow_stale: bool = False) -> Dict:
+        """Get all orders (sync wrapper over get_orders_async)."""
+        return self.dhan.run(self.get_orders_async(allow_stale))
+    
+    async def get_orders_async(self, allow_stale: bool = False) -> Dict:
+        """
+        Get all orders; concurrent callers share one request.
+        
+        Args:
+            allow_stale: Serve a stale cached response while it refreshes
+                (dashboard reads only; trading decisions need fresh orders)
+        """
+        return await self._inflight.do(("orders", allow_stale), lambda: self._get_orders(allow_stale))
+    
+    async def _get_orders(self, allow_stale: bool = False) -> Dict:
         """Get all orders from Dhan with caching."""
         try:
-            cache_key = "orders_all"
-            
-            # Check cache
-            cached = self._get_cached(cache_key)
-            if cached is not None:
-                return cached
-            
-            # Fetch from API
-            orders = self.dhan.get_order_list()
-            
-            if orders.get("status") == "success":
-                log.info(f"✅ Fetched {len(orders.get('data', []))} orders from Dhan")
-                self._set_cache(cache_key, orders)
-            else:
-                log.warning(f"⚠️ Failed to fetch orders: {orders.get('remarks')}")
-                if cache_key in self._cache:
-                    return self._cache[cache_key][0]
-            
-            return orders
-            
+            return await self.cache.get_or_fetch(
+                "orders", "all", self._request_orders, should_cache=_is_success, allow_stale=allow_stale
+            )
         except Exception as e:
             log.error(f"Error fetching orders: {e}")
-            cache_key = "orders_all"
-            if cache_key in self._cache:
-                log.warning("⚠️ Using cached orders due to error")
-                return self._cache[cache_key][0]
             return {
                 "status": "error",
                 "error": str(e),
                 "data": []
             }
+    
+    async def _request_orders(self) -> Dict:
+        """Request orders from Dhan (uncached)."""
+        orders = await self.dhan.aio.get_order_list()
+        
+        if orders.get("status") == "success":
+            log.info(f"✅ Fetched {len(orders.get('data', []))} orders from Dhan")
+        else:
+            log.warning(f"⚠️ Failed to fetch orders: {orders.get('remarks')}")
+        return orders
 
     def get_trade_book(self, order_id: str) -> Dict:
         """Get trade book for specific order."""
@@ -424,66 +653,64 @@ class DataCollectionAgent:
             }
 
     def get_fund_limits(self) -> Dict:
+        """Get fund limits (sync wrapper over get_fund_limits_async)."""
+        return self.dhan.run(self.get_fund_limits_async())
+    
+    async def get_fund_limits_async(self) -> Dict:
+        """Get fund limits; concurrent callers share one request."""
+        return await self._inflight.do("funds", self._get_fund_limits)
+    
+    async def _get_fund_limits(self) -> Dict:
         """Get fund limits with caching."""
         try:
-            cache_key = "funds_limits"
-            
-            cached = self._get_cached(cache_key)
-            if cached is not None:
-                return cached
-            
-            funds = self.dhan.get_fund_limits()
-            
-            if funds.get("status") == "success":
-                log.info(f"✅ Fetched fund limits from Dhan")
-                self._set_cache(cache_key, funds)
-            else:
-                if cache_key in self._cache:
-                    return self._cache[cache_key][0]
-            
-            return funds
-            
+            return await self.cache.get_or_fetch("funds", "all", self._request_funds, should_cache=_is_success)
         except Exception as e:
             log.error(f"Error fetching fund limits: {e}")
-            cache_key = "funds_limits"
-            if cache_key in self._cache:
-                return self._cache[cache_key][0]
             return {
                 "status": "error",
                 "error": str(e),
                 "data": {}
             }
+    
+    async def _request_funds(self) -> Dict:
+        """Request fund limits from Dhan (uncached)."""
+        funds = await self.dhan.aio.get_fund_limits()
+        
+        if funds.get("status") == "success":
+            log.info(f"✅ Fetched fund limits from Dhan")
+        else:
+            log.warning(f"⚠️ Failed to fetch fund limits: {funds.get('remarks')}")
+        return funds
 
     def get_holdings(self) -> Dict:
+        """Get holdings (sync wrapper over get_holdings_async)."""
+        return self.dhan.run(self.get_holdings_async())
+    
+    async def get_holdings_async(self) -> Dict:
+        """Get holdings; concurrent callers share one request."""
+        return await self._inflight.do("holdings", self._get_holdings)
+    
+    async def _get_holdings(self) -> Dict:
         """Get holdings from Dhan with caching."""
         try:
-            cache_key = "holdings_all"
-            
-            cached = self._get_cached(cache_key)
-            if cached is not None:
-                return cached
-            
-            holdings = self.dhan.get_holdings()
-            
-            if holdings.get("status") == "success":
-                log.info(f"✅ Fetched {len(holdings.get('data', []))} holdings from Dhan")
-                self._set_cache(cache_key, holdings)
-            else:
-                if cache_key in self._cache:
-                    return self._cache[cache_key][0]
-            
-            return holdings
-            
+            return await self.cache.get_or_fetch("holdings", "all", self._request_holdings, should_cache=_is_success)
         except Exception as e:
             log.error(f"Error fetching holdings: {e}")
-            cache_key = "holdings_all"
-            if cache_key in self._cache:
-                return self._cache[cache_key][0]
             return {
                 "status": "error",
                 "error": str(e),
                 "data": []
             }
+    
+    async def _request_holdings(self) -> Dict:
+        """Request holdings from Dhan (uncached)."""
+        holdings = await self.dhan.aio.get_holdings()
+        
+        if holdings.get("status") == "success":
+            log.info(f"✅ Fetched {len(holdings.get('data', []))} holdings from Dhan")
+        else:
+            log.warning(f"⚠️ Failed to fetch holdings: {holdings.get('remarks')}")
+        return holdings
 
     def get_trade_history(self, from_date: str, to_date: str, page_number: int = 0) -> Dict:
         """Get trade history for date range."""
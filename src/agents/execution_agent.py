@@ -1,11 +1,10 @@
 """Execution agent compatible with DhanHQ v2.2 (OrderUpdate synchronous)."""
-import requests
-import json
 import ssl, certifi, websocket
 import threading, time
 from datetime import datetime
 from dhanhq import DhanContext, dhanhq, OrderUpdate
 from src.utils.logger import log
+from src.utils.dhan_client import get_dhan_client
 
 # ----- SSL and certifi -----
 ssl_context = ssl.create_default_context(cafile=certifi.where())
@@ -19,7 +18,7 @@ class ExecutionAgent:
 
     def __init__(self, dhan_context: DhanContext):
         self.dhan_context = dhan_context
-        self.dhan = dhanhq(dhan_context)
+        self.dhan = get_dhan_client(dhan_context)
         self.order_update_client: OrderUpdate | None = None
         self.active_orders: dict = {}
         self.is_running = False
@@ -150,6 +149,10 @@ class ExecutionAgent:
             return {"success": False, "error": str(e)}
 
     def place_super_order(self, order_params):
+        """Place a Super Order (sync wrapper over place_super_order_async)."""
+        return self.dhan.run(self.place_super_order_async(order_params))
+
+    async def place_super_order_async(self, order_params):
         """
         Place a Super Order directly via the Dhan API.
         
@@ -160,31 +163,17 @@ class ExecutionAgent:
             dict response from Dhan
         """
         try:
-            # Get access token and client ID
-            # You can fetch from your credential store/config, or pass into ExecutionAgent
-            dhan_client_id = self.dhan_context.client_id
-            access_token = self.dhan_context.access_token
-
-            headers = {
-                "Content-Type": "application/json",
-                "access-token": access_token,
-            }
-            url = "https://api.dhan.co/v2/super/orders"
-
-            # Ensure required params
             payload = order_params.copy()
-            if "dhanClientId" not in payload:
-                payload["dhanClientId"] = dhan_client_id
 
             log.info(f"Sending Super Order API request: {payload}")
-            response = requests.post(url, headers=headers, data=json.dumps(payload), timeout=10)
-            if response.status_code == 200:
-                result = response.json()
+            response = await self.dhan.aio.post_super_order(payload)
+            if response.get("status") == "success":
+                result = response.get("data") or {}
                 log.info(f"Super order response: {result}")
                 return {"success": True, **result}
             else:
-                log.error(f"Super order error: {response.status_code} {response.text}")
-                return {"success": False, "status_code": response.status_code, "error": response.text}
+                log.error(f"Super order error: {response.get('status_code')} {response.get('remarks')}")
+                return {"success": False, "status_code": response.get("status_code"), "error": response.get("remarks")}
 
         except Exception as e:
             log.error(f"Exception placing super order: {e}")
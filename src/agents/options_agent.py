@@ -24,8 +24,7 @@ class OptionsAnalysisAgent:
             option_chain: Option chain DataFrame with columns:
                         strike, call_oi, call_volume, call_iv, call_ltp, call_oi_change,
                         put_oi, put_volume, put_iv, put_ltp, put_oi_change,
-                        call_greeks (dict with delta, theta, gamma, vega),
-                        put_greeks (dict with delta, theta, gamma, vega)
+                        call_/put_ delta, theta, gamma, vega (float, NaN when missing)
             spot_price: Current spot price
             zones: Supply/demand zones
       
@@ -42,107 +41,12 @@ class OptionsAnalysisAgent:
             log.info(f"Analyzing option chain with {len(option_chain)} strikes")
             log.info(f"Spot price: {spot_price}")
 
-            # ===== EXTRACT GREEKS AND THETA =====
-            # Process calls
-            if 'call_greeks' in option_chain.columns and 'call_ltp' in option_chain.columns:
-                option_chain['call_theta_daily'] = option_chain['call_greeks'].apply(
-                    lambda g: g.get('theta', None) if isinstance(g, dict) and g else None
-                )
-                option_chain['call_delta'] = option_chain['call_greeks'].apply(
-                    lambda g: g.get('delta', None) if isinstance(g, dict) and g else None
-                )
-                option_chain['call_gamma'] = option_chain['call_greeks'].apply(
-                    lambda g: g.get('gamma', None) if isinstance(g, dict) and g else None
-                )
-                option_chain['call_vega'] = option_chain['call_greeks'].apply(
-                    lambda g: g.get('vega', None) if isinstance(g, dict) and g else None
-                )
-                
-                # ===== FILTER: Keep only rows with valid Greeks =====
-                # Valid = non-null, non-zero theta and delta
-                option_chain['call_has_valid_greeks'] = (
-                    option_chain['call_theta_daily'].notna() & 
-                    (option_chain['call_theta_daily'] != 0) &
-                    option_chain['call_delta'].notna() &
-                    (option_chain['call_delta'] != 0) &
-                    (option_chain['call_ltp'] > 0)
-                )
-                
-                # Calculate theta metrics only for valid rows
-                option_chain['call_theta_hourly'] = option_chain.apply(
-                    lambda row: row['call_theta_daily'] / 6.5 if row.get('call_has_valid_greeks', False) else None,
-                    axis=1
-                )
-                option_chain['call_theta_abs_hourly'] = option_chain['call_theta_hourly'].abs()
-                
-                # Decay percentage
-                option_chain['call_decay_pct_hourly'] = option_chain.apply(
-                    lambda row: (abs(row['call_theta_hourly']) / row['call_ltp'] * 100) 
-                    if row.get('call_has_valid_greeks', False) and row['call_ltp'] > 0 else None,
-                    axis=1
-                )
-                
-                # Quality score
-                option_chain['call_quality_score'] = option_chain.apply(
-                    lambda row: theta_calculator.get_theta_quality_score(
-                        row['call_theta_daily'],
-                        row['call_ltp'],
-                        row['call_delta']
-                    ) if row.get('call_has_valid_greeks', False) else None,
-                    axis=1
-                )
-                
-                # Log how many valid calls we have
-                valid_calls = option_chain['call_has_valid_greeks'].sum()
-                log.info(f"✅ Found {valid_calls} CALL strikes with valid Greeks")
-            
-            # Process puts (same logic)
-            if 'put_greeks' in option_chain.columns and 'put_ltp' in option_chain.columns:
-                option_chain['put_theta_daily'] = option_chain['put_greeks'].apply(
-                    lambda g: g.get('theta', None) if isinstance(g, dict) and g else None
-                )
-                option_chain['put_delta'] = option_chain['put_greeks'].apply(
-                    lambda g: g.get('delta', None) if isinstance(g, dict) and g else None
-                )
-                option_chain['put_gamma'] = option_chain['put_greeks'].apply(
-                    lambda g: g.get('gamma', None) if isinstance(g, dict) and g else None
-                )
-                option_chain['put_vega'] = option_chain['put_greeks'].apply(
-                    lambda g: g.get('vega', None) if isinstance(g, dict) and g else None
-                )
-                
-                # Filter valid puts
-                option_chain['put_has_valid_greeks'] = (
-                    option_chain['put_theta_daily'].notna() & 
-                    (option_chain['put_theta_daily'] != 0) &
-                    option_chain['put_delta'].notna() &
-                    (option_chain['put_delta'] != 0) &
-                    (option_chain['put_ltp'] > 0)
-                )
-                
-                option_chain['put_theta_hourly'] = option_chain.apply(
-                    lambda row: row['put_theta_daily'] / 6.5 if row.get('put_has_valid_greeks', False) else None,
-                    axis=1
-                )
-                option_chain['put_theta_abs_hourly'] = option_chain['put_theta_hourly'].abs()
-                
-                option_chain['put_decay_pct_hourly'] = option_chain.apply(
-                    lambda row: (abs(row['put_theta_hourly']) / row['put_ltp'] * 100) 
-                    if row.get('put_has_valid_greeks', False) and row['put_ltp'] > 0 else None,
-                    axis=1
-                )
-                
-                option_chain['put_quality_score'] = option_chain.apply(
-                    lambda row: theta_calculator.get_theta_quality_score(
-                        row['put_theta_daily'],
-                        row['put_ltp'],
-                        row['put_delta']
-                    ) if row.get('put_has_valid_greeks', False) else None,
-                    axis=1
-                )
-                
-                valid_puts = option_chain['put_has_valid_greeks'].sum()
-                log.info(f"✅ Found {valid_puts} PUT strikes with valid Greeks")
+            # ===== THETA METRICS FROM FLAT GREEK COLUMNS =====
+            for side in ("call", "put"):
+                if f'{side}_delta' in option_chain.columns and f'{side}_ltp' in option_chain.columns:
+                    self._add_theta_metrics(option_chain, side, theta_calculator)
+                    valid = option_chain[f'{side}_has_valid_greeks'].sum()
+                    log.info(f"✅ Found {valid} {side.upper()} strikes with valid Greeks")
 
             # Analyze calls and puts (existing methods will now have theta data)
             call_analysis = self._analyze_calls(option_chain, spot_price)
@@ -246,6 +150,37 @@ class OptionsAnalysisAgent:
             log.error(f"Theta distribution analysis error: {e}")
             return {}
 
+    @staticmethod
+    def _add_theta_metrics(option_chain: pd.DataFrame, side: str, theta_calculator):
+        """
+        Add validity flag and theta metrics for one side of the chain in place.
+
+        Args:
+            option_chain: Chain with flat {side}_theta/_delta/_ltp columns
+            side: "call" or "put"
+            theta_calculator: Calculator providing get_theta_quality_score
+        """
+        theta = option_chain[f'{side}_theta'].to_numpy(dtype=np.float64)
+        delta = option_chain[f'{side}_delta'].to_numpy(dtype=np.float64)
+        ltp = option_chain[f'{side}_ltp'].to_numpy(dtype=np.float64)
+
+        # Valid = non-null, non-zero theta and delta with a traded premium
+        valid = ~np.isnan(theta) & (theta != 0) & ~np.isnan(delta) & (delta != 0) & (ltp > 0)
+        theta_hourly = np.where(valid, theta / 6.5, np.nan)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            decay_pct = np.where(valid, np.abs(theta_hourly) / ltp * 100, np.nan)
+
+        quality = np.full(len(option_chain), np.nan)
+        for i in np.flatnonzero(valid):
+            quality[i] = theta_calculator.get_theta_quality_score(theta[i], ltp[i], delta[i])
+
+        option_chain[f'{side}_theta_daily'] = theta
+        option_chain[f'{side}_has_valid_greeks'] = valid
+        option_chain[f'{side}_theta_hourly'] = theta_hourly
+        option_chain[f'{side}_theta_abs_hourly'] = np.abs(theta_hourly)
+        option_chain[f'{side}_decay_pct_hourly'] = decay_pct
+        option_chain[f'{side}_quality_score'] = quality
+
     def _analyze_calls(self, df: pd.DataFrame, spot: float) -> Dict:
         """Analyze call options - only valid strikes."""
         try:
@@ -751,6 +686,12 @@ class OptionsAnalysisAgent:
                 log.warning(f"⚠️ Invalid option premium at strike {selected_strike}")
                 return {}
             
+            # ============ CONTRACT ID (RESOLVED WITH THE CHAIN) ============
+            id_col = 'call_security_id' if trade_direction == "CALL" else 'put_security_id'
+            option_security_id = None
+            if id_col in strike_data.columns and pd.notna(strike_data[id_col].iloc[0]):
+                option_security_id = int(strike_data[id_col].iloc[0])
+            
             # ============ EXTRACT GREEKS (IF AVAILABLE) ============
             theta_hourly = 0
             delta = 0.5  # Default ATM delta
@@ -829,6 +770,7 @@ class OptionsAnalysisAgent:
                 'selection_method': selection_method,  # Track how strike was selected
                 # Option premiums
                 'option_type': trade_direction,
+                'security_id': option_security_id,
                 'entry_price': float(option_entry_premium),
                 'target_price': float(option_target_premium),
                 'stop_loss': float(option_stop_premium),
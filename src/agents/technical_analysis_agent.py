@@ -4,6 +4,18 @@ import numpy as np
 from typing import Dict, List, Tuple
 from src.config import config
 from src.utils.logger import log
+from src.utils import volume_profile
+
+
+def _forward_windows(values: np.ndarray, index: np.ndarray, offset: int, width: int) -> np.ndarray:
+    """
+    values[i + offset : i + offset + width] for every i in index, as rows.
+    
+    Positions past the end of values are NaN.
+    """
+    padded = np.concatenate([values.astype(np.float64), np.full(offset + width, np.nan)])
+    windows = np.lib.stride_tricks.sliding_window_view(padded, width)
+    return windows[index + offset]
 
 
 class TechnicalAnalysisAgent:
@@ -28,6 +40,10 @@ class TechnicalAnalysisAgent:
         - Buy/Sell delta per price level
         - High Volume Nodes (HVN) and Low Volume Nodes (LVN)
         - Session-based calculation
+        - Candle/bin overlaps computed as arrays (src/utils/volume_profile.py)
+        
+        `sessions` is a number of candles; per-trading-day and composite
+        profiles come from volume_profile.SessionProfiles.
         """
         try:
             if df.empty:
@@ -41,123 +57,34 @@ class TechnicalAnalysisAgent:
             
             price_min = recent_df["low"].min()
             price_max = recent_df["high"].max()
-            price_range = price_max - price_min
-            
-            if price_range == 0:
-                return {}
             
             # Adaptive bin size (10 points for Nifty)
-            num_bins = max(50, int(price_range / 10))
-            bin_size = price_range / num_bins
-            
-            volume_profile = {}
-            
-            # Initialize bins
-            for i in range(num_bins):
-                bin_low = price_min + (i * bin_size)
-                bin_high = bin_low + bin_size
-                bin_mid = round((bin_low + bin_high) / 2, 2)
-                
-                volume_profile[bin_mid] = {
-                    'price_low': bin_low,
-                    'price_high': bin_high,
-                    'total_volume': 0,
-                    'buy_volume': 0,
-                    'sell_volume': 0,
-                    'delta': 0,
-                    'touch_count': 0
-                }
-            
-            # Weighted volume distribution
-            for idx, row in recent_df.iterrows():
-                candle_range = row["high"] - row["low"]
-                
-                for price_level, data in volume_profile.items():
-                    # Calculate overlap
-                    overlap_low = max(row["low"], data['price_low'])
-                    overlap_high = min(row["high"], data['price_high'])
-                    
-                    if overlap_low < overlap_high:
-                        # Weighted distribution
-                        overlap_pct = (overlap_high - overlap_low) / candle_range if candle_range > 0 else 1
-                        weighted_volume = row["volume"] * overlap_pct
-                        
-                        data['total_volume'] += weighted_volume
-                        data['touch_count'] += 1
-                        
-                        # Buy/Sell classification
-                        if row["close"] > row["open"]:
-                            data['buy_volume'] += weighted_volume
-                        else:
-                            data['sell_volume'] += weighted_volume
-                        
-                        data['delta'] = data['buy_volume'] - data['sell_volume']
-            
-            # Find POC (Point of Control)
-            if volume_profile:
-                poc_price, poc_data = max(volume_profile.items(), key=lambda x: x[1]['total_volume'])
-            else:
-                return {}
-            
-            # Calculate Value Area
-            total_volume = sum(v['total_volume'] for v in volume_profile.values())
-            if total_volume == 0:
+            num_bins, bin_size = volume_profile.profile_grid(price_min, price_max)
+            if num_bins == 0:
                 return {}
             
-            target_va_volume = total_volume * (value_area / 100)
+            bin_lows, bin_highs = volume_profile.bin_edges(price_min, bin_size, num_bins)
+            keys, bins = volume_profile.bin_keys(bin_lows, bin_highs)
+            bin_lows, bin_highs = bin_lows[bins], bin_highs[bins]
             
-            sorted_levels = sorted(
-                volume_profile.items(),
-                key=lambda x: x[1]['total_volume'],
-                reverse=True
+            # Weighted volume distribution, buy/sell split by candle direction
+            state = volume_profile.accumulate(
+                bin_lows, bin_highs,
+                recent_df["low"].to_numpy(), recent_df["high"].to_numpy(), recent_df["volume"].to_numpy(),
+                recent_df["close"].to_numpy() > recent_df["open"].to_numpy()
             )
             
-            va_volume = 0
-            va_high = 0
-            va_low = float('inf')
-            va_levels = []
+            result = volume_profile.summarize(keys, bin_lows, bin_highs, state, value_area)
+            if not result:
+                return {}
             
-            for price, data in sorted_levels:
-                va_volume += data['total_volume']
-                va_high = max(va_high, data['price_high'])
-                va_low = min(va_low, data['price_low'])
-                va_levels.append(price)
-                
-                if va_volume >= target_va_volume:
-                    break
-            
-            # Identify HVN and LVN
-            avg_volume = total_volume / len(volume_profile)
-            
-            hvn_levels = [
-                {'price': price, 'volume': data['total_volume'], 'delta': data['delta']}
-                for price, data in volume_profile.items()
-                if data['total_volume'] > avg_volume * 1.5
-            ]
-            
-            lvn_levels = [
-                {'price': price, 'volume': data['total_volume']}
-                for price, data in volume_profile.items()
-                if data['total_volume'] < avg_volume * 0.5
-            ]
-            
-            log.info(f"Volume Profile: POC={poc_price:.2f}, VAH={va_high:.2f}, VAL={va_low:.2f}")
-            log.info(f"   HVN count: {len(hvn_levels)}, LVN count: {len(lvn_levels)}")
+            poc_data = result["volume_profile"][result["poc"]]
+            log.info(f"Volume Profile: POC={result['poc']:.2f}, VAH={result['vah']:.2f}, VAL={result['val']:.2f}")
+            log.info(f"   HVN count: {len(result['high_volume_nodes'])}, LVN count: {len(result['low_volume_nodes'])}")
             log.info(f"   POC Delta: {poc_data['delta']:.0f} (Buy: {poc_data['buy_volume']:.0f}, Sell: {poc_data['sell_volume']:.0f})")
             
-            return {
-                "poc": poc_price,
-                "poc_volume": poc_data['total_volume'],
-                "poc_delta": poc_data['delta'],
-                "vah": va_high,
-                "val": va_low,
-                "value_area_levels": va_levels,
-                "high_volume_nodes": hvn_levels,
-                "low_volume_nodes": lvn_levels,
-                "volume_profile": volume_profile,
-                "total_volume": total_volume,
-                "sessions_analyzed": len(recent_df)
-            }
+            result["sessions_analyzed"] = len(recent_df)
+            return result
             
         except Exception as e:
             log.error(f"Volume profile calculation error: {str(e)}")
@@ -180,6 +107,7 @@ class TechnicalAnalysisAgent:
         - Zone respect tracking (bounces)
         - Strength scoring (0-100)
         - Mitigation tracking
+        - Conditions on shifted arrays, zone tests over a sliding window of the next 8 candles
         """
         if lookback is None:
             lookback = self.config.OB_LOOKBACK
@@ -190,107 +118,66 @@ class TechnicalAnalysisAgent:
             if len(df) < lookback + 10:
                 return []
             
-            for i in range(lookback, len(df) - 2):
-                current = df.iloc[i]
-                next_candle = df.iloc[i + 1]
-                
-                # BULLISH ORDER BLOCK
-                if current["close"] < current["open"]:  # Down candle
-                    impulse_move = next_candle["close"] - next_candle["open"]
-                    ob_size = current["high"] - current["low"]
-                    
-                    if ob_size > 0 and impulse_move > ob_size * 1.5:
-                        # Volume confirmation
-                        volume_confirmed = next_candle["volume"] > current["volume"] * 1.2
-                        
-                        if volume_confirmed:
-                            # Check if zone was respected
-                            tested = False
-                            bounced = False
-                            touch_count = 0
-                            
-                            for j in range(i + 2, min(i + 10, len(df))):
-                                test_candle = df.iloc[j]
-                                
-                                # Price tested the zone
-                                if (test_candle["low"] <= current["high"] and 
-                                    test_candle["low"] >= current["low"]):
-                                    tested = True
-                                    touch_count += 1
-                                    
-                                    # Price bounced (closed above zone)
-                                    if test_candle["close"] > current["high"]:
-                                        bounced = True
-                            
-                            # Calculate strength (0-100)
-                            impulse_strength = min(50, (impulse_move / ob_size) * 20)
-                            volume_strength = min(30, (next_candle["volume"] / current["volume"]) * 15)
-                            respect_strength = 20 if bounced else (10 if tested else 0)
-                            
-                            total_strength = impulse_strength + volume_strength + respect_strength
-                            
-                            # Only add if strength >= 50
-                            if total_strength >= 50:
-                                order_blocks.append({
-                                    "type": "demand",
-                                    "zone_top": float(current["high"]),
-                                    "zone_bottom": float(current["low"]),
-                                    "zone_mid": float((current["high"] + current["low"]) / 2),
-                                    "timestamp": current["timestamp"],
-                                    "strength": float(total_strength),
-                                    "tested": tested,
-                                    "respected": bounced,
-                                    "touch_count": touch_count,
-                                    "mitigated": False,
-                                    "volume_ratio": float(next_candle["volume"] / current["volume"]),
-                                    "impulse_size": float(impulse_move)
-                                })
-                
-                # BEARISH ORDER BLOCK
-                elif current["close"] > current["open"]:  # Up candle
-                    impulse_move = current["open"] - next_candle["close"]
-                    ob_size = current["high"] - current["low"]
-                    
-                    if ob_size > 0 and impulse_move > ob_size * 1.5:
-                        volume_confirmed = next_candle["volume"] > current["volume"] * 1.2
-                        
-                        if volume_confirmed:
-                            tested = False
-                            bounced = False
-                            touch_count = 0
-                            
-                            for j in range(i + 2, min(i + 10, len(df))):
-                                test_candle = df.iloc[j]
-                                
-                                if (test_candle["high"] >= current["low"] and 
-                                    test_candle["high"] <= current["high"]):
-                                    tested = True
-                                    touch_count += 1
-                                    
-                                    if test_candle["close"] < current["low"]:
-                                        bounced = True
-                            
-                            impulse_strength = min(50, (impulse_move / ob_size) * 20)
-                            volume_strength = min(30, (next_candle["volume"] / current["volume"]) * 15)
-                            respect_strength = 20 if bounced else (10 if tested else 0)
-                            
-                            total_strength = impulse_strength + volume_strength + respect_strength
-                            
-                            if total_strength >= 50:
-                                order_blocks.append({
-                                    "type": "supply",
-                                    "zone_top": float(current["high"]),
-                                    "zone_bottom": float(current["low"]),
-                                    "zone_mid": float((current["high"] + current["low"]) / 2),
-                                    "timestamp": current["timestamp"],
-                                    "strength": float(total_strength),
-                                    "tested": tested,
-                                    "respected": bounced,
-                                    "touch_count": touch_count,
-                                    "mitigated": False,
-                                    "volume_ratio": float(next_candle["volume"] / current["volume"]),
-                                    "impulse_size": float(impulse_move)
-                                })
+            o, h, l, c, v = (df[col].to_numpy() for col in ("open", "high", "low", "close", "volume"))
+            n = len(df)
+            
+            # Candidate candle i and its impulse candle i + 1
+            i = np.arange(lookback, n - 2)
+            nxt = i + 1
+            ob_size = h[i] - l[i]
+            demand = c[i] < o[i]  # Down candle -> bullish OB
+            supply = c[i] > o[i]  # Up candle -> bearish OB
+            impulse_move = np.where(demand, c[nxt] - o[nxt], o[i] - c[nxt])
+            
+            candidate = (
+                (demand | supply)
+                & (ob_size > 0)
+                & (impulse_move > ob_size * 1.5)
+                & (v[nxt] > v[i] * 1.2)  # Volume confirmation
+            )
+            i, impulse_move, ob_size, demand = i[candidate], impulse_move[candidate], ob_size[candidate], demand[candidate]
+            nxt = i + 1
+            
+            # Zone tests over candles i + 2 .. i + 9 (NaN padding past the end never tests)
+            window_low = _forward_windows(l, i, 2, 8)
+            window_high = _forward_windows(h, i, 2, 8)
+            window_close = _forward_windows(c, i, 2, 8)
+            top, bottom = h[i][:, None], l[i][:, None]
+            touches = np.where(
+                demand[:, None],
+                (window_low <= top) & (window_low >= bottom),
+                (window_high >= bottom) & (window_high <= top),
+            )
+            bounces = touches & np.where(demand[:, None], window_close > top, window_close < bottom)
+            touch_count = touches.sum(axis=1)
+            tested = touch_count > 0
+            bounced = bounces.any(axis=1)
+            
+            # Strength (0-100)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                volume_ratio = v[nxt] / v[i]
+                impulse_strength = np.minimum(50, (impulse_move / ob_size) * 20)
+                volume_strength = np.minimum(30, volume_ratio * 15)
+            respect_strength = np.where(bounced, 20, np.where(tested, 10, 0))
+            total_strength = impulse_strength + volume_strength + respect_strength
+            
+            timestamps = df["timestamp"]
+            for k in np.flatnonzero(total_strength >= 50).tolist():
+                idx = i[k]
+                order_blocks.append({
+                    "type": "demand" if demand[k] else "supply",
+                    "zone_top": float(h[idx]),
+                    "zone_bottom": float(l[idx]),
+                    "zone_mid": float((h[idx] + l[idx]) / 2),
+                    "timestamp": timestamps.iloc[idx],
+                    "strength": float(total_strength[k]),
+                    "tested": bool(tested[k]),
+                    "respected": bool(bounced[k]),
+                    "touch_count": int(touch_count[k]),
+                    "mitigated": False,
+                    "volume_ratio": float(volume_ratio[k]),
+                    "impulse_size": float(impulse_move[k])
+                })
             
             # Sort by strength
             order_blocks = sorted(order_blocks, key=lambda x: x["strength"], reverse=True)[:10]
@@ -325,6 +212,7 @@ class TechnicalAnalysisAgent:
         - Fill percentage tracking
         - Confidence scoring
         - Only returns valid (unfilled) FVGs
+        - Gaps from shifted high/low arrays, fills from first-touch tests over the next 18 candles
         """
         if min_gap_pct is None:
             min_gap_pct = self.config.FVG_MIN_SIZE * 100  # Convert to percentage
@@ -335,102 +223,72 @@ class TechnicalAnalysisAgent:
             if len(df) < 3:
                 return []
             
-            for i in range(1, len(df) - 1):
-                candle_1 = df.iloc[i - 1]
-                candle_2 = df.iloc[i]
-                candle_3 = df.iloc[i + 1]
-                
-                # BULLISH FVG
-                bullish_gap = candle_3["low"] - candle_1["high"]
-                gap_pct = (bullish_gap / candle_1["high"]) * 100
-                
-                if bullish_gap > 0 and gap_pct >= min_gap_pct:
-                    # Classify FVG size
-                    if gap_pct >= 1.0:
-                        gap_class = 'large'
-                        confidence = 90
-                    elif gap_pct >= 0.5:
-                        gap_class = 'medium'
-                        confidence = 75
-                    else:
-                        gap_class = 'small'
-                        confidence = 60
-                    
-                    # Track fill percentage
-                    filled_pct = 0
-                    fully_filled = False
-                    
-                    for j in range(i + 2, min(i + 20, len(df))):
-                        future = df.iloc[j]
-                        
-                        if future["low"] <= candle_1["high"]:
-                            fill_level = candle_1["high"]
-                            filled_pct = ((candle_3["low"] - fill_level) / bullish_gap) * 100
-                            
-                            if future["low"] <= candle_3["low"]:
-                                fully_filled = True
-                                break
-                    
-                    if not fully_filled:  # Only add valid FVGs
-                        fvgs.append({
-                            "type": "bullish",
-                            "gap_top": float(candle_3["low"]),
-                            "gap_bottom": float(candle_1["high"]),
-                            "gap_mid": float((candle_3["low"] + candle_1["high"]) / 2),
-                            "gap_size": float(bullish_gap),
-                            "gap_pct": float(gap_pct),
-                            "classification": gap_class,
-                            "timestamp": candle_2["timestamp"],
-                            "confidence": confidence,
-                            "filled_pct": float(filled_pct),
-                            "fully_filled": fully_filled,
-                            "valid": True
-                        })
-                
-                # BEARISH FVG
-                bearish_gap = candle_1["low"] - candle_3["high"]
-                gap_pct = (bearish_gap / candle_1["low"]) * 100
+            h, l = df["high"].to_numpy(), df["low"].to_numpy()
+            
+            # Middle candle i of every triple (i - 1, i, i + 1)
+            i = np.arange(1, len(df) - 1)
+            prev, nxt = i - 1, i + 1
+            
+            with np.errstate(divide="ignore", invalid="ignore"):
+                # BULLISH FVG: candle 3 low above candle 1 high
+                bullish_gap = l[nxt] - h[prev]
+                bullish_pct = (bullish_gap / h[prev]) * 100
+                # BEARISH FVG: candle 3 high below candle 1 low
+                bearish_gap = l[prev] - h[nxt]
+                bearish_pct = (bearish_gap / l[prev]) * 100
+            
+            bullish = (bullish_gap > 0) & (bullish_pct >= min_gap_pct)
+            bearish = (bearish_gap > 0) & (bearish_pct >= min_gap_pct)
+            
+            # One row per gap, ordered by candle and bullish before bearish
+            is_bullish = np.concatenate([np.ones(bullish.sum(), dtype=bool), np.zeros(bearish.sum(), dtype=bool)])
+            mid = np.concatenate([i[bullish], i[bearish]])
+            order = np.lexsort((~is_bullish, mid))
+            is_bullish, mid = is_bullish[order], mid[order]
+            gap = np.concatenate([bullish_gap[bullish], bearish_gap[bearish]])[order]
+            gap_pct = np.concatenate([bullish_pct[bullish], bearish_pct[bearish]])[order]
+            top = np.where(is_bullish, l[mid + 1], l[mid - 1])
+            bottom = np.where(is_bullish, h[mid - 1], h[mid + 1])
+            
+            # Fill tracking over candles i + 2 .. i + 19. Bullish: a low at or below the
+            # gap bottom fills it completely. Bearish: a high at the gap top fills it, a
+            # high into the gap marks it (-100%, as the filled_pct arithmetic has always given).
+            future_low = _forward_windows(l, mid, 2, 18)
+            future_high = _forward_windows(h, mid, 2, 18)
+            fully_filled = np.where(
+                is_bullish,
+                (future_low <= bottom[:, None]).any(axis=1),
+                (future_high >= top[:, None]).any(axis=1),
+            )
+            entered = ~is_bullish & (future_high >= bottom[:, None]).any(axis=1)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                entered_pct = ((bottom - top) / gap) * 100
+            filled_pct = np.where(entered, entered_pct, 0.0)
+            
+            timestamps = df["timestamp"]
+            for k in np.flatnonzero(~fully_filled).tolist():  # Only add valid FVGs
+                # Classify FVG size
+                if gap_pct[k] >= 1.0:
+                    gap_class, confidence = 'large', 90
+                elif gap_pct[k] >= 0.5:
+                    gap_class, confidence = 'medium', 75
+                else:
+                    gap_class, confidence = 'small', 60
                 
-                if bearish_gap > 0 and gap_pct >= min_gap_pct:
-                    if gap_pct >= 1.0:
-                        gap_class = 'large'
-                        confidence = 90
-                    elif gap_pct >= 0.5:
-                        gap_class = 'medium'
-                        confidence = 75
-                    else:
-                        gap_class = 'small'
-                        confidence = 60
-                    
-                    filled_pct = 0
-                    fully_filled = False
-                    
-                    for j in range(i + 2, min(i + 20, len(df))):
-                        future = df.iloc[j]
-                        
-                        if future["high"] >= candle_3["high"]:
-                            fill_level = candle_3["high"]
-                            filled_pct = ((fill_level - candle_1["low"]) / bearish_gap) * 100
-                            
-                            if future["high"] >= candle_1["low"]:
-                                fully_filled = True
-                                break
-                    
-                    if not fully_filled:
-                        fvgs.append({
-                            "type": "bearish",
-                            "gap_top": float(candle_1["low"]),
-                            "gap_bottom": float(candle_3["high"]),
-                            "gap_mid": float((candle_1["low"] + candle_3["high"]) / 2),
-                            "gap_size": float(bearish_gap),
-                            "gap_pct": float(gap_pct),
-                            "classification": gap_class,
-                            "timestamp": candle_2["timestamp"],
-                            "confidence": confidence,
-                            "filled_pct": float(filled_pct),
-                            "fully_filled": fully_filled,
-                            "valid": True
-                        })
+                fvgs.append({
+                    "type": "bullish" if is_bullish[k] else "bearish",
+                    "gap_top": float(top[k]),
+                    "gap_bottom": float(bottom[k]),
+                    "gap_mid": float((top[k] + bottom[k]) / 2),
+                    "gap_size": float(gap[k]),
+                    "gap_pct": float(gap_pct[k]),
+                    "classification": gap_class,
+                    "timestamp": timestamps.iloc[mid[k]],
+                    "confidence": confidence,
+                    "filled_pct": float(filled_pct[k]),
+                    "fully_filled": False,
+                    "valid": True
+                })
             
             bullish_count = sum(1 for fvg in fvgs if fvg["type"] == "bullish")
             bearish_count = sum(1 for fvg in fvgs if fvg["type"] == "bearish")
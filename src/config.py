@@ -104,12 +104,45 @@ class Config:
     ORDER_QUANTITY = 1
     USE_SUPER_ORDER = True
     NO_TRADES_ON_EXPIRY = True
+    
+    # Switch futures to the next contract this many days before expiry
+    FUTURES_ROLLOVER_DAYS: float = float(os.getenv("FUTURES_ROLLOVER_DAYS", "1"))
+    FUTURES_ROLLOVER_CHECK_INTERVAL: int = int(os.getenv("FUTURES_ROLLOVER_CHECK_INTERVAL", "3600"))
 
     # Timeframes
     ZONE_TIMEFRAME: int = int(os.getenv("ZONE_TIMEFRAME", "15"))
     TRADE_TIMEFRAME: int = int(os.getenv("TRADE_TIMEFRAME", "5"))
     ZONE_REFRESH_INTERVAL: int = int(os.getenv("ZONE_REFRESH_INTERVAL", "15"))
     
+    # Live feed ticks retained per security (ring buffer, oldest dropped)
+    TICK_BUFFER_DEPTH: int = int(os.getenv("TICK_BUFFER_DEPTH", "20000"))
+    
+    # Max cached API responses held by the data agent (LRU beyond this)
+    DATA_CACHE_MAX_ENTRIES: int = int(os.getenv("DATA_CACHE_MAX_ENTRIES", "512"))
+    
+    # Background option chain polling (nearest expiries; requests are rate limited to 1 per 3s,
+    # so the interval is raised to leave room for every expiry plus one trade-cycle fetch)
+    OPTION_CHAIN_POLL_SECONDS: float = float(os.getenv("OPTION_CHAIN_POLL_SECONDS", "5"))
+    OPTION_CHAIN_POLL_EXPIRIES: int = int(os.getenv("OPTION_CHAIN_POLL_EXPIRIES", "2"))
+    # Oldest polled snapshot the trade cycle will use before fetching on demand
+    OPTION_CHAIN_MAX_AGE_SECONDS: float = float(os.getenv("OPTION_CHAIN_MAX_AGE_SECONDS", "20"))
+    # Option strikes streamed on the live feed: ATM +/- this many (calls and puts)
+    OPTION_FEED_STRIKES_EACH_SIDE: int = int(os.getenv("OPTION_FEED_STRIKES_EACH_SIDE", "5"))
+    # Persist polled snapshots to the Parquet option chain archive
+    OPTION_CHAIN_ARCHIVE: bool = os.getenv("OPTION_CHAIN_ARCHIVE", "true").lower() == "true"
+    # Days of archived option chains kept (older day directories are pruned, 0 keeps all)
+    OPTION_CHAIN_ARCHIVE_DAYS: int = int(os.getenv("OPTION_CHAIN_ARCHIVE_DAYS", "30"))
+    
+    # Market feed supervision: receive timeout before a ping, silence (market hours) that forces
+    # a reconnect, and the exponential reconnect backoff range
+    FEED_HEARTBEAT_SECONDS: float = float(os.getenv("FEED_HEARTBEAT_SECONDS", "10"))
+    FEED_STALE_SECONDS: float = float(os.getenv("FEED_STALE_SECONDS", "60"))
+    FEED_RECONNECT_BASE_SECONDS: float = float(os.getenv("FEED_RECONNECT_BASE_SECONDS", "1"))
+    FEED_RECONNECT_MAX_SECONDS: float = float(os.getenv("FEED_RECONNECT_MAX_SECONDS", "60"))
+    
+    # Days of 1-min history used to seed the live candle aggregator
+    CANDLE_SEED_DAYS: int = int(os.getenv("CANDLE_SEED_DAYS", "5"))
+    
     # ===== TRADE MANAGEMENT PARAMETERS =====
     # Maximum trades per day
     MAX_TRADES_PER_DAY = int(os.getenv("MAX_TRADES_PER_DAY", "5"))
@@ -127,6 +160,9 @@ class Config:
     # User can select: NIFTY or BANKNIFTY
     SELECTED_INSTRUMENT: str = os.getenv("SELECTED_INSTRUMENT", "NIFTY")
     
+    # Scrip master segments to keep in memory (comma-separated, e.g. "NSE_FNO,IDX_I"); empty keeps all
+    SECURITY_MASTER_SEGMENTS: str = os.getenv("SECURITY_MASTER_SEGMENTS", "")
+    
     # Nifty Configuration
     NIFTY_CONFIG = {
         "symbol": "NIFTY",
@@ -284,6 +320,9 @@ class Config:
     # Technical Indicators
     VP_SESSIONS: int = int(os.getenv("VP_SESSIONS", "24"))
     VP_VALUE_AREA: float = float(os.getenv("VP_VALUE_AREA", "70"))
+    VP_SESSION_BIN_SIZE: float = float(os.getenv("VP_SESSION_BIN_SIZE", "5"))  # Points per bin of per-day profiles
+    VP_SESSION_CACHE_DAYS: int = int(os.getenv("VP_SESSION_CACHE_DAYS", "30"))
+    VP_COMPOSITE_SESSIONS: int = int(os.getenv("VP_COMPOSITE_SESSIONS", "5"))
     OB_LOOKBACK: int = int(os.getenv("OB_LOOKBACK", "20"))
     FVG_MIN_SIZE: float = float(os.getenv("FVG_MIN_SIZE", "0.001"))
     
@@ -305,6 +344,8 @@ class Config:
     
     # Database
     DATABASE_URL: str = os.getenv("DATABASE_URL", f"sqlite:///{DATA_DIR}/trades.db")
+    CANDLE_DB_PATH: str = os.getenv("CANDLE_DB_PATH", str(DATA_DIR / "candles.db"))
+    OPTION_CHAIN_ARCHIVE_DIR: str = os.getenv("OPTION_CHAIN_ARCHIVE_DIR", str(DATA_DIR / "option_chain"))
     
     # Streamlit
     STREAMLIT_SERVER_PORT: int = int(os.getenv("STREAMLIT_SERVER_PORT", "8501"))
@@ -0,0 +1,217 @@
+"""Namespaced TTL + LRU cache with stale-while-revalidate."""
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+from src.utils.logger import log
+
+
+class TTLCache:
+    """
+    Thread-safe cache keyed by (namespace, key).
+
+    Each namespace has its own TTL and stale window: a value younger than
+    the TTL is fresh; until TTL + stale window it can still be served while
+    a background refresh runs (stale-while-revalidate). The whole cache is
+    bounded and evicts least recently used entries.
+    """
+
+    def __init__(
+        self,
+        ttls: Optional[Dict[str, float]] = None,
+        stale_ttls: Optional[Dict[str, float]] = None,
+        default_ttl: float = 5.0,
+        max_entries: int = 1024,
+        name: str = "cache",
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            ttls: namespace -> seconds a value stays fresh
+            stale_ttls: namespace -> extra seconds a stale value may be served while refreshing
+            default_ttl: TTL for namespaces not listed
+            max_entries: Max entries across all namespaces
+            name: Label used in logs
+        """
+        self.ttls = dict(ttls or {})
+        self.stale_ttls = dict(stale_ttls or {})
+        self.default_ttl = default_ttl
+        self.max_entries = max_entries
+        self.name = name
+        self._entries: "OrderedDict[Tuple[str, Hashable], Tuple[Any, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._refreshing = set()
+        self._tasks = set()
+        self._counters: Dict[str, Dict[str, int]] = {}
+
+    def _count(self, namespace: str, field: str):
+        counters = self._counters.setdefault(namespace, {"hits": 0, "stale_hits": 0, "misses": 0, "evictions": 0})
+        counters[field] += 1
+
+    def ttl(self, namespace: str) -> float:
+        return self.ttls.get(namespace, self.default_ttl)
+
+    def _lookup(self, namespace: str, key: Hashable) -> Tuple[Any, Optional[float]]:
+        """Value and age for a key (age None when absent). Caller holds the lock."""
+        entry = self._entries.get((namespace, key))
+        if entry is None:
+            return None, None
+        self._entries.move_to_end((namespace, key))
+        value, stored_at = entry
+        return value, time.monotonic() - stored_at
+
+    def get(self, namespace: str, key: Hashable) -> Optional[Any]:
+        """
+        Get a fresh value.
+
+        Args:
+            namespace: Cache namespace (selects the TTL)
+            key: Key within the namespace
+
+        Returns:
+            The value, or None if missing or expired
+        """
+        with self._lock:
+            value, age = self._lookup(namespace, key)
+            if age is not None and age < self.ttl(namespace):
+                self._count(namespace, "hits")
+                return value
+            self._count(namespace, "misses")
+            return None
+
+    def peek(self, namespace: str, key: Hashable) -> Optional[Any]:
+        """Get a value regardless of age (e.g. as a fallback when the source fails)."""
+        with self._lock:
+            value, _ = self._lookup(namespace, key)
+            return value
+
+    def set(self, namespace: str, key: Hashable, value: Any):
+        """Store a value, evicting the least recently used entries beyond max_entries."""
+        with self._lock:
+            self._entries[(namespace, key)] = (value, time.monotonic())
+            self._entries.move_to_end((namespace, key))
+            while len(self._entries) > self.max_entries:
+                (evicted_namespace, _), _ = self._entries.popitem(last=False)
+                self._count(evicted_namespace, "evictions")
+
+    def invalidate(self, namespace: Optional[str] = None, key: Optional[Hashable] = None):
+        """
+        Drop entries.
+
+        Args:
+            namespace: Namespace to drop (None for everything)
+            key: Single key within the namespace (None for the whole namespace)
+        """
+        with self._lock:
+            if namespace is None:
+                self._entries.clear()
+            elif key is not None:
+                self._entries.pop((namespace, key), None)
+            else:
+                for entry_key in [k for k in self._entries if k[0] == namespace]:
+                    del self._entries[entry_key]
+
+    async def get_or_fetch(
+        self,
+        namespace: str,
+        key: Hashable,
+        fetch: Callable[[], Awaitable[Any]],
+        should_cache: Callable[[Any], bool] = lambda value: value is not None,
+        allow_stale: bool = True,
+    ) -> Any:
+        """
+        Serve from cache, refreshing stale values in the background and fetching misses.
+
+        When a fetch fails (raises or returns a value rejected by should_cache)
+        the last cached value is returned if there is one, however old.
+
+        Args:
+            namespace: Cache namespace
+            key: Key within the namespace
+            fetch: Zero-argument coroutine function loading the value
+            should_cache: Whether a fetched value is good enough to store
+            allow_stale: Serve a value inside the stale window (False fetches once the TTL is over)
+
+        Returns:
+            Cached or freshly fetched value
+        """
+        with self._lock:
+            value, age = self._lookup(namespace, key)
+            ttl = self.ttl(namespace)
+            if age is not None and age < ttl:
+                self._count(namespace, "hits")
+                return value
+            if allow_stale and age is not None and age < ttl + self.stale_ttls.get(namespace, 0.0):
+                self._count(namespace, "stale_hits")
+                self._refresh_in_background(namespace, key, fetch, should_cache)
+                return value
+            self._count(namespace, "misses")
+
+        try:
+            fetched = await fetch()
+        except Exception as e:
+            fallback = self.peek(namespace, key)
+            if fallback is None:
+                raise
+            log.warning(f"⚠️ {self.name}: using expired {namespace} after error: {e}")
+            return fallback
+
+        if should_cache(fetched):
+            self.set(namespace, key, fetched)
+            return fetched
+
+        fallback = self.peek(namespace, key)
+        if fallback is not None:
+            log.warning(f"⚠️ {self.name}: using expired {namespace} after failed fetch")
+            return fallback
+        return fetched
+
+    def _refresh_in_background(self, namespace, key, fetch, should_cache):
+        """Start one refresh task per key on the running loop. Caller holds the lock."""
+        if (namespace, key) in self._refreshing:
+            return
+        self._refreshing.add((namespace, key))
+
+        async def refresh():
+            try:
+                fetched = await fetch()
+                if should_cache(fetched):
+                    self.set(namespace, key, fetched)
+            except Exception as e:
+                log.warning(f"⚠️ {self.name}: background refresh of {namespace} failed: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard((namespace, key))
+
+        task = asyncio.get_running_loop().create_task(refresh())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict:
+        """Size and per-namespace hit/stale/miss/eviction counters."""
+        with self._lock:
+            sizes: Dict[str, int] = {}
+            for namespace, _ in self._entries:
+                sizes[namespace] = sizes.get(namespace, 0) + 1
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "namespaces": {
+                    namespace: {**counters, "size": sizes.get(namespace, 0), "ttl": self.ttl(namespace)}
+                    for namespace, counters in self._counters.items()
+                },
+            }
+
+
+# Short-lived responses shared by the API layer
+api_cache = TTLCache(
+    ttls={"pnl": 5.0, "active_trades": 3.0},
+    stale_ttls={"pnl": 10.0, "active_trades": 5.0},
+    max_entries=256,
+    name="api_cache",
+)
@@ -0,0 +1,429 @@
+"""Streaming OHLCV candles built incrementally from market feed ticks."""
+import threading
+from datetime import datetime, timezone
+import numpy as np
+import pandas as pd
+from typing import Dict, Iterable, List, Optional, Tuple
+from src.utils.logger import log
+
+# Candle intervals maintained for every security (minutes)
+DEFAULT_INTERVALS = (1, 3, 5, 15)
+
+# Buckets are aligned to the 09:15 IST open, i.e. 03:45 UTC seconds-of-day
+SESSION_ANCHOR_SECONDS = (3 * 60 + 45) * 60
+
+# Session close (15:30 IST) as UTC seconds-of-day
+SESSION_CLOSE_SECONDS = SESSION_ANCHOR_SECONDS + 375 * 60
+
+CANDLE_COLUMNS = ['timestamp', 'open', 'high', 'low', 'close', 'volume']
+
+
+def bucket_start(timestamp, interval_minutes: int):
+    """
+    Start of the candle containing a timestamp.
+
+    Args:
+        timestamp: Epoch seconds (scalar or NumPy array)
+        interval_minutes: Candle length in minutes
+
+    Returns:
+        Epoch seconds of the bucket start (same shape as input)
+    """
+    width = interval_minutes * 60
+    return timestamp - (timestamp - SESSION_ANCHOR_SECONDS) % width
+
+
+def frame_to_epoch(df: pd.DataFrame) -> np.ndarray:
+    """Convert a history frame's (UTC-naive) timestamp column to int64 epoch seconds."""
+    return df['timestamp'].to_numpy(dtype='datetime64[s]').astype(np.int64)
+
+
+def resample_candles(df: pd.DataFrame, interval_minutes: int) -> pd.DataFrame:
+    """
+    Resample 1-minute candles to a coarser interval on session-aligned buckets.
+
+    Args:
+        df: Frame with timestamp, open, high, low, close, volume
+        interval_minutes: Target interval in minutes
+
+    Returns:
+        Resampled frame with CANDLE_COLUMNS
+    """
+    if df.empty:
+        return pd.DataFrame(columns=CANDLE_COLUMNS)
+
+    epoch = frame_to_epoch(df)
+    buckets = bucket_start(epoch, interval_minutes)
+    grouped = df.assign(_bucket=buckets).sort_values('timestamp').groupby('_bucket', sort=True)
+    out = grouped.agg(
+        open=('open', 'first'),
+        high=('high', 'max'),
+        low=('low', 'min'),
+        close=('close', 'last'),
+        volume=('volume', 'sum'),
+    ).reset_index()
+    out.insert(0, 'timestamp', pd.to_datetime(out.pop('_bucket'), unit='s'))
+    return out[CANDLE_COLUMNS]
+
+
+def subtract_ranges(ranges: List[Tuple[int, int]], covered: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """
+    Remove covered spans from a list of ranges.
+
+    Args:
+        ranges: (start, end) ranges, oldest first
+        covered: Sorted, non-overlapping (start, end) ranges to remove
+
+    Returns:
+        The uncovered parts of ranges, oldest first
+    """
+    result = []
+    for start, end in ranges:
+        for covered_start, covered_end in covered:
+            if covered_end <= start:
+                continue
+            if covered_start >= end:
+                break
+            if covered_start > start:
+                result.append((start, covered_start))
+            start = max(start, covered_end)
+            if start >= end:
+                break
+        if start < end:
+            result.append((start, end))
+    return result
+
+
+class CandleSeries:
+    """Candles of one interval for one security, keyed by bucket start."""
+
+    def __init__(self, interval_minutes: int, max_candles: int = 5000):
+        """
+        Initialize the series.
+
+        Args:
+            interval_minutes: Candle length in minutes
+            max_candles: Oldest candles beyond this are dropped
+        """
+        self.interval = interval_minutes
+        self.max_candles = max_candles
+        self._candles: Dict[int, List[float]] = {}
+        self._current: Optional[int] = None
+
+    def __len__(self) -> int:
+        return len(self._candles)
+
+    @property
+    def current_start(self) -> Optional[int]:
+        """Bucket start of the candle still forming (None if no ticks yet)."""
+        return self._current
+
+    def update(self, timestamp: float, price: float, volume: float = 0.0) -> bool:
+        """
+        Apply one tick.
+
+        Args:
+            timestamp: Epoch seconds
+            price: Traded price
+            volume: Volume traded since the previous tick
+
+        Returns:
+            True if the tick opened a new candle
+        """
+        start = int(bucket_start(int(timestamp), self.interval))
+        candle = self._candles.get(start)
+        opened = candle is None
+        if opened:
+            self._candles[start] = [price, price, price, price, volume]
+            if self._current is not None and start < self._current:
+                self._sort()
+            self._trim()
+        else:
+            if price > candle[1]:
+                candle[1] = price
+            if price < candle[2]:
+                candle[2] = price
+            candle[3] = price
+            candle[4] += volume
+        if self._current is None or start >= self._current:
+            self._current = start
+        return opened
+
+    def merge(self, starts: np.ndarray, values: np.ndarray):
+        """
+        Overwrite candles with history, leaving the forming candle to live ticks.
+
+        Args:
+            starts: Bucket start epochs
+            values: (n, 5) array of open, high, low, close, volume
+        """
+        for start, row in zip(starts.tolist(), values.tolist()):
+            if self._current is not None and start >= self._current:
+                continue
+            self._candles[start] = row
+        self._sort()
+        self._trim()
+
+    def _sort(self):
+        self._candles = dict(sorted(self._candles.items()))
+
+    def _trim(self):
+        excess = len(self._candles) - self.max_candles
+        if excess > 0:
+            for start in list(self._candles)[:excess]:
+                del self._candles[start]
+
+    def starts(self) -> np.ndarray:
+        """Bucket start epochs in chronological order."""
+        return np.fromiter(self._candles.keys(), dtype=np.int64, count=len(self._candles))
+
+    def to_frame(self, include_partial: bool = True) -> pd.DataFrame:
+        """
+        Get the candles as a DataFrame.
+
+        Args:
+            include_partial: Include the candle that is still forming
+
+        Returns:
+            Frame with CANDLE_COLUMNS, timestamps UTC-naive like the history API
+        """
+        starts = self.starts()
+        if not include_partial and self._current is not None and len(starts) and starts[-1] == self._current:
+            starts = starts[:-1]
+        if len(starts) == 0:
+            return pd.DataFrame(columns=CANDLE_COLUMNS)
+
+        values = np.array([self._candles[s] for s in starts.tolist()], dtype=np.float64)
+        return pd.DataFrame({
+            'timestamp': pd.to_datetime(starts, unit='s'),
+            'open': values[:, 0],
+            'high': values[:, 1],
+            'low': values[:, 2],
+            'close': values[:, 3],
+            'volume': values[:, 4],
+        })
+
+
+class CandleAggregator:
+    """
+    Builds multi-interval candles from market feed ticks.
+
+    Feed volume is the cumulative day volume, so each tick contributes the
+    difference from the previous tick of the same security (a drop means a
+    new session). History seeds the series once; later REST calls only fill
+    the gaps reported by `gaps()`. Ranges already backfilled are remembered
+    (see `mark_backfilled`), so minutes without trades and exchange holidays
+    are fetched once rather than on every call.
+    """
+
+    def __init__(self, intervals: Iterable[int] = DEFAULT_INTERVALS, max_candles: int = 5000):
+        """
+        Initialize the aggregator.
+
+        Args:
+            intervals: Candle intervals in minutes
+            max_candles: Candles retained per security and interval
+        """
+        self.intervals = tuple(sorted(set(int(i) for i in intervals)))
+        if 1 not in self.intervals:
+            self.intervals = (1,) + self.intervals
+        self.max_candles = max_candles
+        self._series: Dict[str, Dict[int, CandleSeries]] = {}
+        self._last_volume: Dict[str, int] = {}
+        self._seeded = set()
+        self._backfilled: Dict[str, List[Tuple[int, int]]] = {}
+        self._lock = threading.Lock()
+
+    def _series_for(self, security_id: str) -> Dict[int, CandleSeries]:
+        series = self._series.get(security_id)
+        if series is None:
+            series = {i: CandleSeries(i, self.max_candles) for i in self.intervals}
+            self._series[security_id] = series
+        return series
+
+    def supports(self, interval_minutes) -> bool:
+        """Whether an interval is maintained."""
+        try:
+            return int(interval_minutes) in self.intervals
+        except (TypeError, ValueError):
+            return False
+
+    def on_tick(self, security_id, timestamp: float, price: float, cumulative_volume: int = 0):
+        """
+        Apply one tick to every interval.
+
+        Args:
+            security_id: Security ID
+            timestamp: Epoch seconds
+            price: Last traded price
+            cumulative_volume: Day volume reported by the feed
+        """
+        if price is None or not np.isfinite(price):
+            return
+        key = str(security_id)
+        with self._lock:
+            previous = self._last_volume.get(key)
+            if previous is None:
+                traded = 0
+            elif cumulative_volume >= previous:
+                traded = cumulative_volume - previous
+            else:
+                traded = cumulative_volume
+            self._last_volume[key] = cumulative_volume
+
+            for series in self._series_for(key).values():
+                series.update(timestamp, price, traded)
+
+    def seed(self, security_id, history: pd.DataFrame) -> int:
+        """
+        Merge 1-minute history into every interval.
+
+        Args:
+            security_id: Security ID
+            history: 1-minute frame with timestamp, open, high, low, close, volume
+
+        Returns:
+            Number of 1-minute candles merged
+        """
+        key = str(security_id)
+        if history is None or history.empty:
+            return 0
+
+        with self._lock:
+            series = self._series_for(key)
+            for interval, target in series.items():
+                frame = history if interval == 1 else resample_candles(history, interval)
+                values = frame[['open', 'high', 'low', 'close', 'volume']].to_numpy(dtype=np.float64)
+                target.merge(frame_to_epoch(frame), values)
+            self._seeded.add(key)
+
+        log.info(f"🕯️ Seeded candles for {key} with {len(history)} 1-min bars")
+        return len(history)
+
+    def is_seeded(self, security_id) -> bool:
+        """Whether history has been merged for a security."""
+        return str(security_id) in self._seeded
+
+    def get_candles(self, security_id, interval_minutes: int, include_partial: bool = True) -> pd.DataFrame:
+        """
+        Get candles for a security.
+
+        Args:
+            security_id: Security ID
+            interval_minutes: One of the maintained intervals
+            include_partial: Include the candle that is still forming
+
+        Returns:
+            Frame with CANDLE_COLUMNS (empty if unknown)
+        """
+        with self._lock:
+            series = self._series.get(str(security_id), {}).get(int(interval_minutes))
+            if series is None:
+                return pd.DataFrame(columns=CANDLE_COLUMNS)
+            return series.to_frame(include_partial)
+
+    def last_candle_start(self, security_id) -> Optional[int]:
+        """Epoch seconds of the newest 1-minute candle."""
+        with self._lock:
+            series = self._series.get(str(security_id), {}).get(1)
+            if series is None or len(series) == 0:
+                return None
+            return int(series.starts()[-1])
+
+    def gaps(self, security_id, now: float, session_close_seconds: int = SESSION_CLOSE_SECONDS) -> List[Tuple[int, int]]:
+        """
+        Find missing 1-minute ranges that need a REST backfill.
+
+        Only gaps inside a weekday session are reported: an overnight jump
+        between the last candle of one day and the first of the next is
+        expected, and ranges already backfilled are left out.
+
+        Args:
+            security_id: Security ID
+            now: Current epoch seconds
+            session_close_seconds: UTC seconds-of-day of the session close
+
+        Returns:
+            List of (from_epoch, to_epoch) ranges, oldest first
+        """
+        key = str(security_id)
+        with self._lock:
+            series = self._series.get(key, {}).get(1)
+            starts = series.starts() if series is not None else np.empty(0, dtype=np.int64)
+            backfilled = list(self._backfilled.get(key, ()))
+
+        if len(starts) == 0:
+            return []
+
+        day = 86400
+        found = []
+        if len(starts) > 1:
+            step = np.diff(starts)
+            same_day = (starts[1:] // day) == (starts[:-1] // day)
+            for i in np.flatnonzero(same_day & (step > 60)).tolist():
+                session = int(starts[i] // day) * day
+                begin = max(int(starts[i]) + 60, session + SESSION_ANCHOR_SECONDS)
+                end = min(int(starts[i + 1]), session + session_close_seconds)
+                if end > begin:
+                    found.append((begin, end))
+
+        # Trailing gap: feed silent since the last candle while the session is open
+        last = int(starts[-1])
+        current = int(bucket_start(int(now), 1))
+        today = (current // day) * day
+        if datetime.fromtimestamp(today, timezone.utc).weekday() < 5:
+            begin = max(last + 60, today + SESSION_ANCHOR_SECONDS)
+            end = min(current, today + session_close_seconds)
+            if end > begin:
+                found.append((begin, end))
+        return subtract_ranges(found, backfilled)
+
+    def mark_backfilled(self, security_id, ranges: List[Tuple[int, int]]):
+        """
+        Record ranges already requested from the history API.
+
+        Minutes still missing afterwards had no trades (or the exchange was
+        closed), so `gaps()` stops reporting them.
+
+        Args:
+            security_id: Security ID
+            ranges: (from_epoch, to_epoch) ranges that were backfilled
+        """
+        key = str(security_id)
+        with self._lock:
+            merged = []
+            for start, end in sorted(self._backfilled.get(key, []) + [tuple(r) for r in ranges]):
+                if merged and start <= merged[-1][1]:
+                    merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+                else:
+                    merged.append((start, end))
+            self._backfilled[key] = merged
+
+    def securities(self) -> list:
+        """Securities with candles."""
+        return list(self._series)
+
+    def discard(self, security_id) -> bool:
+        """
+        Release a security's candles (e.g. once it is unsubscribed from the feed).
+
+        Args:
+            security_id: Security ID
+
+        Returns:
+            True if candles were released
+        """
+        key = str(security_id)
+        with self._lock:
+            self._last_volume.pop(key, None)
+            self._seeded.discard(key)
+            self._backfilled.pop(key, None)
+            return self._series.pop(key, None) is not None
+
+    def clear(self):
+        """Drop all candles."""
+        with self._lock:
+            self._series.clear()
+            self._last_volume.clear()
+            self._seeded.clear()
+            self._backfilled.clear()
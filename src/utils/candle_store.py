@@ -0,0 +1,281 @@
+"""On-disk intraday candle cache with incremental fetch of missing days."""
+import sqlite3
+import threading
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from src.utils.logger import log
+from src.utils.candle_aggregator import resample_candles, frame_to_epoch
+
+# Intervals the Dhan intraday endpoint serves natively (minutes)
+NATIVE_INTERVALS = (1, 5, 15, 25, 60)
+
+# Candle timestamps are UTC-naive; trading days are IST calendar days
+IST_OFFSET_SECONDS = 5 * 3600 + 30 * 60
+
+CANDLE_FIELDS = ['open', 'high', 'low', 'close', 'volume', 'open_interest']
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS candles (
+    security_id TEXT NOT NULL,
+    exchange_segment TEXT NOT NULL,
+    interval INTEGER NOT NULL,
+    ts INTEGER NOT NULL,
+    day TEXT NOT NULL,
+    open REAL, high REAL, low REAL, close REAL, volume REAL, open_interest REAL,
+    PRIMARY KEY (security_id, exchange_segment, interval, ts)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS candle_days (
+    security_id TEXT NOT NULL,
+    exchange_segment TEXT NOT NULL,
+    interval INTEGER NOT NULL,
+    day TEXT NOT NULL,
+    rows INTEGER NOT NULL,
+    fetched_at TEXT NOT NULL,
+    oi INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (security_id, exchange_segment, interval, day)
+) WITHOUT ROWID;
+"""
+
+# fetch(from_date, to_date, interval) -> history frame, or None when the request failed
+Fetcher = Callable[[str, str, int], pd.DataFrame]
+
+
+def _as_date(value) -> date:
+    """Accept date, datetime or YYYY-MM-DD[ ...] strings."""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return datetime.strptime(str(value)[:10], "%Y-%m-%d").date()
+
+
+def ist_today() -> date:
+    """Current trading-day date in IST."""
+    return (datetime.now(timezone.utc) + timedelta(seconds=IST_OFFSET_SECONDS)).date()
+
+
+def trading_days(from_day: date, to_day: date) -> List[date]:
+    """Weekdays from from_day to to_day inclusive."""
+    days = []
+    current = from_day
+    while current <= to_day:
+        if current.weekday() < 5:
+            days.append(current)
+        current += timedelta(days=1)
+    return days
+
+
+class CandleStore:
+    """
+    SQLite-backed candle cache keyed by security, interval and trading day.
+
+    Each day is fetched from the broker at most once after it has closed;
+    the current day is always refetched. The database runs in WAL mode with
+    one connection per thread, so readers never block each other or the
+    writer (writes are additionally serialized in-process).
+    """
+
+    def __init__(self, db_path: Optional[str] = None):
+        """
+        Initialize the store (the database is opened lazily).
+
+        Args:
+            db_path: SQLite file (defaults to Config.CANDLE_DB_PATH)
+        """
+        if db_path is None:
+            from src.config import Config
+            db_path = Config.CANDLE_DB_PATH
+        self.db_path = Path(db_path)
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        self._schema_ready = False
+
+    def _connection(self) -> sqlite3.Connection:
+        """Per-thread connection (created on first use)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.db_path), timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with self._write_lock:
+                if not self._schema_ready:
+                    conn.executescript(SCHEMA)
+                    # Stores created before days recorded whether OI was fetched
+                    columns = {row[1] for row in conn.execute("PRAGMA table_info(candle_days)")}
+                    if "oi" not in columns:
+                        conn.execute("ALTER TABLE candle_days ADD COLUMN oi INTEGER NOT NULL DEFAULT 0")
+                    self._schema_ready = True
+            self._local.conn = conn
+        return conn
+
+    def cached_days(self, security_id, exchange_segment: str, interval: int, oi: bool = False) -> List[date]:
+        """Trading days already stored as complete (with open interest when oi is set)."""
+        rows = self._connection().execute(
+            "SELECT day FROM candle_days WHERE security_id=? AND exchange_segment=? AND interval=? AND oi>=? ORDER BY day",
+            (str(security_id), exchange_segment, int(interval), int(oi)),
+        ).fetchall()
+        return [_as_date(r[0]) for r in rows]
+
+    def missing_ranges(self, security_id, exchange_segment: str, interval: int,
+                       from_date, to_date, today: Optional[date] = None, oi: bool = False) -> List[Tuple[date, date]]:
+        """
+        Group uncached trading days into contiguous fetch ranges.
+
+        Args:
+            security_id: Security ID
+            exchange_segment: Exchange segment
+            interval: Candle interval in minutes
+            from_date: First day (inclusive)
+            to_date: Last day (inclusive)
+            today: Current IST date (days from today on are never cached)
+            oi: Treat days stored without open interest as missing
+
+        Returns:
+            List of (first_day, last_day) inclusive ranges
+        """
+        today = today or ist_today()
+        cached = set(self.cached_days(security_id, exchange_segment, interval, oi))
+        wanted = [d for d in trading_days(_as_date(from_date), _as_date(to_date)) if d >= today or d not in cached]
+
+        ranges: List[Tuple[date, date]] = []
+        for day in wanted:
+            # Weekends between two missing weekdays do not split a range
+            if ranges and (day - ranges[-1][1]).days <= 3 and all(
+                d.weekday() >= 5 for d in (ranges[-1][1] + timedelta(days=i) for i in range(1, (day - ranges[-1][1]).days))
+            ):
+                ranges[-1] = (ranges[-1][0], day)
+            else:
+                ranges.append((day, day))
+        return ranges
+
+    def write(self, security_id, exchange_segment: str, interval: int, df: pd.DataFrame,
+              days: List[date], today: Optional[date] = None, oi: bool = False) -> int:
+        """
+        Store fetched candles and mark closed days as cached.
+
+        Args:
+            security_id: Security ID
+            exchange_segment: Exchange segment
+            interval: Candle interval in minutes
+            df: Frame with timestamp and OHLCV (optionally open_interest)
+            days: Trading days the fetch covered (empty days are cached too)
+            today: Current IST date
+            oi: Whether the fetch requested open interest
+
+        Returns:
+            Number of candles written
+        """
+        today = today or ist_today()
+        key = (str(security_id), exchange_segment, int(interval))
+
+        rows = []
+        counts = {}
+        if df is not None and not df.empty:
+            epoch = frame_to_epoch(df)
+            day_codes = (epoch + IST_OFFSET_SECONDS) // 86400
+            day_labels = pd.to_datetime(day_codes * 86400, unit="s").strftime("%Y-%m-%d")
+            columns = [
+                df[name].to_numpy(dtype=np.float64) if name in df.columns else np.full(len(df), np.nan)
+                for name in CANDLE_FIELDS
+            ]
+            for i, (ts, label) in enumerate(zip(epoch.tolist(), day_labels)):
+                values = [None if np.isnan(col[i]) else float(col[i]) for col in columns]
+                rows.append(key + (ts, label, *values))
+                counts[label] = counts.get(label, 0) + 1
+
+        closed = [d.isoformat() for d in days if d < today]
+        fetched_at = datetime.now().isoformat()
+        conn = self._connection()
+        with self._write_lock, conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO candles VALUES (?,?,?,?,?,?,?,?,?,?,?)", rows
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO candle_days VALUES (?,?,?,?,?,?,?)",
+                [key + (label, counts.get(label, 0), fetched_at, int(oi)) for label in closed],
+            )
+        return len(rows)
+
+    def read(self, security_id, exchange_segment: str, interval: int, from_date, to_date) -> pd.DataFrame:
+        """
+        Read stored candles for a day range.
+
+        Args:
+            security_id: Security ID
+            exchange_segment: Exchange segment
+            interval: Candle interval in minutes
+            from_date: First day (inclusive)
+            to_date: Last day (inclusive)
+
+        Returns:
+            Frame with OHLCV, open_interest and timestamp, sorted by time
+        """
+        frame = pd.read_sql_query(
+            "SELECT ts, open, high, low, close, volume, open_interest FROM candles "
+            "WHERE security_id=? AND exchange_segment=? AND interval=? AND day BETWEEN ? AND ? ORDER BY ts",
+            self._connection(),
+            params=(str(security_id), exchange_segment, int(interval),
+                    _as_date(from_date).isoformat(), _as_date(to_date).isoformat()),
+        )
+        frame["timestamp"] = pd.to_datetime(frame.pop("ts"), unit="s")
+        if frame["open_interest"].isna().all():
+            frame = frame.drop(columns="open_interest")
+        return frame
+
+    def get_candles(self, security_id, exchange_segment: str, interval: int,
+                    from_date, to_date, fetch: Fetcher, today: Optional[date] = None,
+                    oi: bool = False) -> pd.DataFrame:
+        """
+        Serve candles from disk, fetching only days that are not cached.
+
+        Intervals Dhan does not serve natively (e.g. 3 minutes) are resampled
+        from the cached 1-minute series.
+
+        Args:
+            security_id: Security ID
+            exchange_segment: Exchange segment
+            interval: Candle interval in minutes
+            from_date: First day (inclusive)
+            to_date: Last day (inclusive)
+            fetch: Callable(from_date, to_date, interval) returning a history frame
+            today: Current IST date
+            oi: Open interest is wanted (days cached without it are refetched)
+
+        Returns:
+            Candle frame (empty if nothing is available)
+        """
+        interval = int(interval)
+        base = interval if interval in NATIVE_INTERVALS else 1
+
+        for first, last in self.missing_ranges(security_id, exchange_segment, base, from_date, to_date, today, oi):
+            log.info(f"📥 Fetching {base}-min candles for {security_id}: {first} → {last}")
+            fetched = fetch(first.isoformat(), (last + timedelta(days=1)).isoformat(), base)
+            if fetched is None:
+                continue
+            in_range = fetched
+            if not fetched.empty:
+                day_codes = (frame_to_epoch(fetched) + IST_OFFSET_SECONDS) // 86400
+                first_code = (first - date(1970, 1, 1)).days
+                last_code = (last - date(1970, 1, 1)).days
+                in_range = fetched[(day_codes >= first_code) & (day_codes <= last_code)]
+            self.write(security_id, exchange_segment, base, in_range, trading_days(first, last), today, oi)
+
+        frame = self.read(security_id, exchange_segment, base, from_date, to_date)
+        if base != interval:
+            frame = resample_candles(frame, interval)
+        return frame
+
+    def close(self):
+        """Close this thread's connection."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+# Global instance
+candle_store = CandleStore()
@@ -0,0 +1,383 @@
+"""Pooled async Dhan REST client with a synchronous facade."""
+import asyncio
+import json
+import threading
+from typing import Dict, Optional
+import aiohttp
+from dhanhq import dhanhq
+from src.utils.logger import log
+from src.utils.rate_limiter import (
+    RequestScheduler,
+    MAX_RETRIES,
+    backoff_delay,
+    bind_priority,
+    current_priority,
+)
+
+API_BASE_URL = "https://api.dhan.co/v2"
+
+# Per-category request timeout (seconds) and max in-flight requests
+ENDPOINT_LIMITS = {
+    "orders": {"timeout": 10, "concurrency": 5},
+    "quotes": {"timeout": 5, "concurrency": 4},
+    "option_chain": {"timeout": 15, "concurrency": 2},
+    "history": {"timeout": 30, "concurrency": 3},
+    "portfolio": {"timeout": 10, "concurrency": 4},
+    "default": {"timeout": 30, "concurrency": 4},
+}
+
+# Endpoint prefix -> category (first match wins)
+ENDPOINT_CATEGORIES = (
+    ("/super/orders", "orders"),
+    ("/orders", "orders"),
+    ("/marketfeed", "quotes"),
+    ("/optionchain", "option_chain"),
+    ("/charts", "history"),
+    ("/positions", "portfolio"),
+    ("/holdings", "portfolio"),
+    ("/fundlimit", "portfolio"),
+    ("/trades", "portfolio"),
+)
+
+
+def endpoint_category(endpoint: str) -> str:
+    """Map an API path to its rate/timeout category."""
+    for prefix, category in ENDPOINT_CATEGORIES:
+        if endpoint.startswith(prefix):
+            return category
+    return "default"
+
+
+class AsyncDhanClient:
+    """
+    Async Dhan REST client on one keep-alive aiohttp session.
+
+    The session lives on a dedicated event loop thread, so the pool is
+    shared by async callers on any loop and by the synchronous facade.
+    Responses use the dhanhq shape: {"status", "remarks", "data"}.
+    """
+
+    def __init__(self, dhan_context, pool_size: int = 20, rate_limits: Optional[Dict[str, tuple]] = None):
+        """
+        Initialize the client (the loop and session start lazily).
+
+        Args:
+            dhan_context: DhanContext with client ID and access token
+            pool_size: Max open connections in the pool
+            rate_limits: category -> (rate per second, burst); defaults to Dhan's limits
+        """
+        self.dhan_context = dhan_context
+        self.pool_size = pool_size
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._start_lock = threading.Lock()
+        self.scheduler = RequestScheduler(rate_limits)
+        self.stats = {
+            category: {"requests": 0, "errors": 0, "timeouts": 0, "retries": 0}
+            for category in ENDPOINT_LIMITS
+        }
+
+    # ----- loop management -----
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        """Start the client's event loop thread once."""
+        if self._loop is None:
+            with self._start_lock:
+                if self._loop is None:
+                    loop = asyncio.new_event_loop()
+                    self._thread = threading.Thread(target=loop.run_forever, name="DhanRestLoop", daemon=True)
+                    self._thread.start()
+                    self._loop = loop
+                    log.info("🌐 Dhan REST client loop started")
+        return self._loop
+
+    def run_sync(self, coro, timeout: Optional[float] = None):
+        """
+        Run a coroutine on the client loop and block for its result.
+
+        The caller's request priority (see rate_limiter.request_priority)
+        is carried over to the client loop.
+
+        Args:
+            coro: Coroutine to run
+            timeout: Max seconds to wait (None waits for the request timeout)
+
+        Returns:
+            The coroutine's result
+        """
+        return asyncio.run_coroutine_threadsafe(bind_priority(coro), self._ensure_loop()).result(timeout)
+
+    def _headers(self) -> Dict[str, str]:
+        return {
+            "access-token": self.dhan_context.access_token,
+            "client-id": self.dhan_context.client_id,
+            "Content-type": "application/json",
+            "Accept": "application/json",
+        }
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.pool_size, keepalive_timeout=60, ttl_dns_cache=300)
+            self._session = aiohttp.ClientSession(connector=connector)
+        return self._session
+
+    def _semaphore(self, category: str) -> asyncio.Semaphore:
+        semaphore = self._semaphores.get(category)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(ENDPOINT_LIMITS[category]["concurrency"])
+            self._semaphores[category] = semaphore
+        return semaphore
+
+    # ----- requests -----
+
+    async def request(self, method: str, endpoint: str, payload: Optional[Dict] = None,
+                      category: Optional[str] = None, priority: Optional[int] = None) -> Dict:
+        """
+        Send a request through the rate limiter and the pooled session.
+
+        Safe to await from any event loop: calls from outside the client
+        loop are forwarded to it.
+
+        Args:
+            method: HTTP method
+            endpoint: API path (e.g. /positions)
+            payload: JSON body (dhanClientId is added)
+            category: Limits category (derived from the endpoint if None)
+            priority: Scheduling priority (defaults from the caller's context)
+
+        Returns:
+            Dict with status ("success"/"failure"), remarks and data
+        """
+        category = category or endpoint_category(endpoint)
+        if priority is None:
+            priority = current_priority(category)
+
+        loop = self._ensure_loop()
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is not loop:
+            future = asyncio.run_coroutine_threadsafe(self._request(method, endpoint, payload, category, priority), loop)
+            return await asyncio.wrap_future(future)
+        return await self._request(method, endpoint, payload, category, priority)
+
+    async def _request(self, method: str, endpoint: str, payload: Optional[Dict], category: str, priority: int) -> Dict:
+        limits = ENDPOINT_LIMITS[category]
+        stats = self.stats[category]
+        body = None
+        if payload is not None:
+            payload = dict(payload)
+            payload["dhanClientId"] = self.dhan_context.client_id
+            body = json.dumps(payload)
+
+        # Order placement is not idempotent: only retry when Dhan rejected it unprocessed (429)
+        retry_server_errors = not (category == "orders" and method != "GET")
+
+        session = await self._get_session()
+        for attempt in range(MAX_RETRIES + 1):
+            await self.scheduler.acquire(category, priority)
+            async with self._semaphore(category):
+                stats["requests"] += 1
+                try:
+                    async with session.request(
+                        method,
+                        API_BASE_URL + endpoint,
+                        data=body,
+                        headers=self._headers(),
+                        timeout=aiohttp.ClientTimeout(total=limits["timeout"]),
+                    ) as response:
+                        status_code = response.status
+                        retry_after = response.headers.get("Retry-After")
+                        text = await response.text()
+                except asyncio.TimeoutError:
+                    stats["timeouts"] += 1
+                    log.warning(f"⏱️ Dhan {method} {endpoint} timed out after {limits['timeout']}s")
+                    return {"status": "failure", "remarks": "timeout", "data": ""}
+                except Exception as e:
+                    stats["errors"] += 1
+                    log.error(f"❌ Dhan {method} {endpoint} error: {e}")
+                    return {"status": "failure", "remarks": str(e), "data": ""}
+
+            retryable = status_code == 429 or (status_code >= 500 and retry_server_errors)
+            if not retryable or attempt == MAX_RETRIES:
+                return self._parse_response(status_code, text, stats)
+
+            try:
+                retry_after = float(retry_after) if retry_after else None
+            except ValueError:
+                retry_after = None
+            delay = backoff_delay(attempt, retry_after)
+            if status_code == 429:
+                self.scheduler.bucket(category).penalize(delay)
+            stats["retries"] += 1
+            log.warning(f"🔁 Dhan {method} {endpoint} returned {status_code}, retrying in {delay:.2f}s")
+            await asyncio.sleep(delay)
+
+    @staticmethod
+    def _parse_response(status_code: int, text: str, stats: Dict) -> Dict:
+        """Convert an HTTP response to the dhanhq response dict."""
+        try:
+            body = json.loads(text) if text else {}
+        except ValueError:
+            stats["errors"] += 1
+            return {"status": "failure", "remarks": text, "data": "", "status_code": status_code}
+
+        if 200 <= status_code <= 299:
+            return {"status": "success", "remarks": "", "data": body}
+
+        stats["errors"] += 1
+        body = body if isinstance(body, dict) else {}
+        return {
+            "status": "failure",
+            "remarks": {
+                "error_code": body.get("errorCode"),
+                "error_type": body.get("errorType"),
+                "error_message": body.get("errorMessage"),
+            },
+            "data": "",
+            "status_code": status_code,
+        }
+
+    # ----- dhanhq-compatible endpoints -----
+
+    async def intraday_minute_data(self, security_id, exchange_segment, instrument_type,
+                                   from_date, to_date, interval=1, oi=False) -> Dict:
+        return await self.request("POST", "/charts/intraday", {
+            "securityId": security_id,
+            "exchangeSegment": exchange_segment,
+            "instrument": instrument_type,
+            "interval": interval,
+            "oi": oi,
+            "fromDate": from_date,
+            "toDate": to_date,
+        })
+
+    async def option_chain(self, under_security_id, under_exchange_segment, expiry) -> Dict:
+        return await self.request("POST", "/optionchain", {
+            "UnderlyingScrip": under_security_id,
+            "UnderlyingSeg": under_exchange_segment,
+            "Expiry": expiry,
+        })
+
+    async def expiry_list(self, under_security_id, under_exchange_segment) -> Dict:
+        return await self.request("POST", "/optionchain/expirylist", {
+            "UnderlyingScrip": under_security_id,
+            "UnderlyingSeg": under_exchange_segment,
+        })
+
+    async def ticker_data(self, securities) -> Dict:
+        return await self.request("POST", "/marketfeed/ltp", dict(securities))
+
+    async def quote_data(self, securities) -> Dict:
+        return await self.request("POST", "/marketfeed/quote", dict(securities))
+
+    async def get_positions(self) -> Dict:
+        return await self.request("GET", "/positions")
+
+    async def get_order_list(self) -> Dict:
+        return await self.request("GET", "/orders")
+
+    async def get_fund_limits(self) -> Dict:
+        return await self.request("GET", "/fundlimit")
+
+    async def get_holdings(self) -> Dict:
+        return await self.request("GET", "/holdings")
+
+    async def get_trade_book(self, order_id=None) -> Dict:
+        return await self.request("GET", f"/trades/{order_id if order_id is not None else ''}")
+
+    async def get_trade_history(self, from_date, to_date, page_number=0) -> Dict:
+        return await self.request("GET", f"/trades/{from_date}/{to_date}/{page_number}")
+
+    async def post_super_order(self, payload: Dict) -> Dict:
+        """Place a super order from a ready camelCase payload."""
+        return await self.request("POST", "/super/orders", payload)
+
+    def metrics(self) -> Dict:
+        """
+        Request counters and rate limiter state per category.
+
+        Returns:
+            Dict with "requests" (counts) and "rate_limits" (queue depth, waits, throttling)
+        """
+        return {"requests": self.stats, "rate_limits": self.scheduler.metrics()}
+
+    async def close(self):
+        """Close the pooled session."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+
+class DhanClient:
+    """
+    Synchronous, dhanhq-compatible facade over AsyncDhanClient.
+
+    Methods ported to the async client run on its pooled session; anything
+    else falls through to a plain dhanhq instance.
+    """
+
+    ASYNC_METHODS = frozenset({
+        "intraday_minute_data", "option_chain", "expiry_list", "ticker_data", "quote_data",
+        "get_positions", "get_order_list", "get_fund_limits", "get_holdings",
+        "get_trade_book", "get_trade_history",
+    })
+
+    def __init__(self, dhan_context, aio: Optional[AsyncDhanClient] = None):
+        """
+        Initialize the facade.
+
+        Args:
+            dhan_context: DhanContext with client ID and access token
+            aio: Async client to share (a new one is created if None)
+        """
+        self.dhan_context = dhan_context
+        self.aio = aio or AsyncDhanClient(dhan_context)
+        self._legacy = None
+
+    def run(self, coro, timeout: Optional[float] = None):
+        """Run a coroutine on the client loop (see AsyncDhanClient.run_sync)."""
+        return self.aio.run_sync(coro, timeout)
+
+    def __getattr__(self, name):
+        if name in DhanClient.ASYNC_METHODS:
+            method = getattr(self.aio, name)
+            return lambda *args, **kwargs: self.aio.run_sync(method(*args, **kwargs))
+        if name.startswith("_"):
+            raise AttributeError(name)
+        if self._legacy is None:
+            self._legacy = dhanhq(self.dhan_context)
+        return getattr(self._legacy, name)
+
+    def close(self):
+        """Close the pooled session."""
+        if self.aio._loop is not None:
+            self.aio.run_sync(self.aio.close(), timeout=5)
+
+
+_async_clients: Dict[tuple, AsyncDhanClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_dhan_client(dhan_context) -> DhanClient:
+    """
+    Create a facade on the shared async client for a set of credentials.
+
+    Every agent gets its own facade, but all of them share one connection
+    pool per client ID/access token.
+
+    Args:
+        dhan_context: DhanContext
+
+    Returns:
+        DhanClient for the context
+    """
+    key = (dhan_context.client_id, dhan_context.access_token)
+    with _clients_lock:
+        aio = _async_clients.get(key)
+        if aio is None:
+            aio = AsyncDhanClient(dhan_context)
+            _async_clients[key] = aio
+    return DhanClient(dhan_context, aio)
@@ -0,0 +1,199 @@
+"""Supervision for the Dhan market feed WebSocket: heartbeats, reconnects and gap backfill."""
+import asyncio
+import random
+import time
+from typing import Callable, Dict, Optional
+from src.utils.logger import log
+from src.utils.helpers import validate_market_hours
+
+# Seconds over which messages per second is measured
+RATE_WINDOW_SECONDS = 5.0
+
+
+class FeedStalled(ConnectionError):
+    """Raised when the feed connection is alive on paper but not delivering."""
+
+
+class FeedSupervisor:
+    """
+    Keeps a MarketFeed connected and reports its health.
+
+    Receives are bounded by a heartbeat interval: when nothing arrives the
+    socket is pinged, and during market hours a feed silent for longer than
+    stale_seconds is treated as stalled. Any failure reconnects with
+    exponential backoff; reconnecting resubscribes the feed's current
+    instrument list and reports the outage window to on_reconnect so the
+    caller can backfill it over REST.
+    """
+
+    def __init__(
+        self,
+        feed,
+        on_message: Callable[[Dict], None],
+        on_reconnect: Optional[Callable[[float, float], None]] = None,
+        heartbeat_seconds: float = 10.0,
+        stale_seconds: float = 60.0,
+        backoff_base: float = 1.0,
+        backoff_max: float = 60.0,
+        is_market_open: Callable[[], bool] = validate_market_hours,
+    ):
+        """
+        Initialize the supervisor.
+
+        Args:
+            feed: dhanhq MarketFeed (connect/get_instrument_data/ws/instruments)
+            on_message: Called with every decoded message
+            on_reconnect: Called with (gap_start, gap_end) epoch seconds after a reconnect
+            heartbeat_seconds: Receive timeout before pinging the socket
+            stale_seconds: Silence during market hours that forces a reconnect
+            backoff_base: First reconnect delay (doubles per failed attempt)
+            backoff_max: Cap on the reconnect delay
+            is_market_open: Whether silence should be treated as a stall
+        """
+        self.feed = feed
+        self.on_message = on_message
+        self.on_reconnect = on_reconnect
+        self.heartbeat_seconds = heartbeat_seconds
+        self.stale_seconds = stale_seconds
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.is_market_open = is_market_open
+
+        self.connected = False
+        self.connects = 0
+        self.reconnects = 0
+        self.stalls = 0
+        self.messages = 0
+        self.last_error: Optional[str] = None
+        self.last_message_at: Optional[float] = None
+        self._disconnected_at: Optional[float] = None
+        self._connected_at = 0.0
+        self._window_start = time.monotonic()
+        self._window_count = 0
+        self._rate = 0.0
+
+    def backoff_delay(self, attempt: int) -> float:
+        """Reconnect delay with jitter in the upper half of the exponential step."""
+        ceiling = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        return random.uniform(ceiling / 2, ceiling)
+
+    async def run(self, should_run: Callable[[], bool]):
+        """
+        Receive messages until should_run() turns false, reconnecting as needed.
+
+        Args:
+            should_run: Polled between receives and during backoff
+        """
+        attempt = 0
+        while should_run():
+            try:
+                if not self.connected:
+                    await self._connect()
+                    attempt = 0
+
+                try:
+                    message = await asyncio.wait_for(self.feed.get_instrument_data(), self.heartbeat_seconds)
+                except asyncio.TimeoutError:
+                    await self._heartbeat()
+                    continue
+
+                self._record_message()
+                if message:
+                    self.on_message(message)
+
+            except Exception as e:
+                if not should_run():
+                    break
+                self._mark_disconnected(e)
+                delay = self.backoff_delay(attempt)
+                attempt += 1
+                log.warning(f"🔌 Feed down ({e}); reconnect attempt {attempt} in {delay:.1f}s")
+                await self._sleep(delay, should_run)
+
+        self.connected = False
+
+    async def _connect(self):
+        """Open a fresh connection; MarketFeed.connect resubscribes feed.instruments."""
+        stale_ws = getattr(self.feed, "ws", None)
+        if stale_ws is not None:
+            try:
+                await stale_ws.close()
+            except Exception:
+                pass
+            self.feed.ws = None
+
+        await self.feed.connect()
+        self.connected = True
+        self._connected_at = time.time()
+        self.connects += 1
+        if self.connects == 1:
+            self._disconnected_at = None
+            log.info(f"✅ Feed connected ({len(self.feed.instruments)} instruments)")
+            return
+
+        self.reconnects += 1
+        gap_start, gap_end = self._disconnected_at or time.time(), time.time()
+        self._disconnected_at = None
+        log.info(
+            f"🔁 Feed reconnected (#{self.reconnects}), resubscribed {len(self.feed.instruments)} instruments "
+            f"after {gap_end - gap_start:.0f}s gap"
+        )
+        if self.on_reconnect:
+            # REST backfill blocks; keep it off the receive loop
+            asyncio.get_running_loop().run_in_executor(None, self._backfill, gap_start, gap_end)
+
+    def _backfill(self, gap_start: float, gap_end: float):
+        try:
+            self.on_reconnect(gap_start, gap_end)
+        except Exception as e:
+            log.error(f"❌ Feed gap backfill error: {e}")
+
+    async def _heartbeat(self):
+        """Ping a quiet socket; raise if it is dead or stalled during market hours."""
+        ws = getattr(self.feed, "ws", None)
+        if ws is None:
+            raise ConnectionError("feed socket missing")
+        pong = await ws.ping()
+        await asyncio.wait_for(pong, self.heartbeat_seconds)
+
+        silent_for = time.time() - max(self.last_message_at or 0.0, self._connected_at)
+        if silent_for > self.stale_seconds and self.is_market_open():
+            self.stalls += 1
+            raise FeedStalled(f"no messages for {silent_for:.0f}s")
+
+    def _record_message(self):
+        self.messages += 1
+        self.last_message_at = time.time()
+        self._window_count += 1
+        elapsed = time.monotonic() - self._window_start
+        if elapsed >= RATE_WINDOW_SECONDS:
+            self._rate = self._window_count / elapsed
+            self._window_start = time.monotonic()
+            self._window_count = 0
+
+    def _mark_disconnected(self, error: Exception):
+        if self._disconnected_at is None:
+            self._disconnected_at = self.last_message_at or time.time()
+        self.connected = False
+        self.last_error = str(error)
+
+    @staticmethod
+    async def _sleep(delay: float, should_run: Callable[[], bool]):
+        """Sleep in short steps so a stop request is honoured during backoff."""
+        deadline = time.monotonic() + delay
+        while should_run() and time.monotonic() < deadline:
+            await asyncio.sleep(min(0.5, deadline - time.monotonic()))
+
+    def metrics(self) -> Dict:
+        """Connection state, last tick age, reconnect count and message rate."""
+        elapsed = time.monotonic() - self._window_start
+        rate = self._window_count / elapsed if elapsed >= RATE_WINDOW_SECONDS else self._rate
+        return {
+            "connected": self.connected,
+            "last_tick_age_sec": round(time.time() - self.last_message_at, 1) if self.last_message_at else None,
+            "reconnects": self.reconnects,
+            "stalls": self.stalls,
+            "messages": self.messages,
+            "messages_per_sec": round(rate, 2),
+            "last_error": self.last_error,
+        }
@@ -182,6 +182,7 @@ def create_trade_record(setup: Dict, evaluation: Dict) -> Dict:
         "option_type": setup.get("option_type"),
         "expiry": setup.get("expiry"),
         "security_id": setup.get("security_id"),
+        "exchange_segment": setup.get("exchange_segment"),
         
         # Trade details - handle both field names
         "direction": setup.get("direction") or setup.get("option_type"),
@@ -308,6 +308,10 @@ class LicensingClient:
                 with open(save_path, 'wb') as f:
                     for chunk in response.iter_content(chunk_size=8192):
                         f.write(chunk)
+                
+                # Rebuild the binary snapshot so the next load skips the CSV parse
+                from src.utils.scrip_master_cache import refresh_snapshot
+                refresh_snapshot(save_path, version)
                 return True
             else:
                 print(f"Failed to download: {response.status_code}")
@@ -317,6 +321,37 @@ class LicensingClient:
             print(f"Download error: {e}")
             return False
     
+    def download_scrip_master_delta(self, from_version: str, to_version: str) -> Optional[Dict]:
+        """
+        Download the scrip master changes between two versions.
+        
+        Args:
+            from_version: Version currently applied locally
+            to_version: Version to update to
+            
+        Returns:
+            Dict with 'added', 'changed' (row dicts) and 'removed' (security IDs),
+            or None if no delta is available
+        """
+        try:
+            response = requests.get(
+                f"{self.server_url}/api/scrip-master/delta/{from_version}/{to_version}",
+                timeout=30
+            )
+            
+            if response.status_code == 200:
+                delta = response.json()
+                delta.setdefault("from_version", from_version)
+                delta.setdefault("to_version", to_version)
+                return delta
+            else:
+                print(f"Delta not available: {response.status_code}")
+                return None
+                
+        except Exception as e:
+            print(f"Delta download error: {e}")
+            return None
+    
     def get_tier_info(self) -> Dict:
         """Get current tier information from cached validation."""
         cached = self.load_cache()
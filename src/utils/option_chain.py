@@ -0,0 +1,86 @@
+"""Flat, typed option chain snapshots parsed from the Dhan option chain response."""
+import math
+from typing import Dict, Tuple
+import numpy as np
+import pandas as pd
+
+# Per-side fields: (column suffix, key in the Dhan "ce"/"pe" object)
+SIDE_FIELDS = (
+    ("oi", "oi"),
+    ("volume", "volume"),
+    ("iv", "implied_volatility"),
+    ("ltp", "last_price"),
+    ("previous_oi", "previous_oi"),
+)
+GREEK_FIELDS = ("delta", "theta", "gamma", "vega")
+
+OPTION_CHAIN_COLUMNS = ["strike"] + [
+    f"{side}_{name}"
+    for side in ("call", "put")
+    for name in ("oi", "volume", "iv", "ltp", "oi_change") + GREEK_FIELDS
+]
+
+_NAN = math.nan
+_EMPTY: Dict = {}
+_WIDTH = len(SIDE_FIELDS) + len(GREEK_FIELDS)
+
+
+def _side_values(side: Dict) -> Tuple:
+    """Numeric fields of one side in SIDE_FIELDS + GREEK_FIELDS order (greeks NaN when absent)."""
+    if not side:
+        return (0, 0, 0, 0, 0, _NAN, _NAN, _NAN, _NAN)
+    greeks = side.get("greeks") or _EMPTY
+    return (
+        side.get("oi", 0),
+        side.get("volume", 0),
+        side.get("implied_volatility", 0),
+        side.get("last_price", 0),
+        side.get("previous_oi", 0),
+        greeks.get("delta", _NAN),
+        greeks.get("theta", _NAN),
+        greeks.get("gamma", _NAN),
+        greeks.get("vega", _NAN),
+    )
+
+
+def parse_option_chain(oc: Dict) -> pd.DataFrame:
+    """
+    Parse the "oc" object of a Dhan option chain into flat float64 columns.
+
+    Every strike is read once into a single float64 block that becomes the
+    DataFrame as is, so consumers get plain numeric columns (call_delta,
+    put_theta, ...) instead of per-row greeks dicts.
+
+    Args:
+        oc: Mapping of strike string -> {"ce": {...}, "pe": {...}}
+
+    Returns:
+        DataFrame with OPTION_CHAIN_COLUMNS sorted by strike
+        (missing greeks are NaN)
+    """
+    if not oc:
+        return pd.DataFrame(columns=OPTION_CHAIN_COLUMNS, dtype=np.float64)
+
+    flat = []
+    extend = flat.extend
+    for strike, data in oc.items():
+        extend((float(strike),))
+        extend(_side_values(data.get("ce")))
+        extend(_side_values(data.get("pe")))
+
+    values = np.array(flat, dtype=np.float64).reshape(len(oc), len(OPTION_CHAIN_COLUMNS))
+    values = values[np.argsort(values[:, 0], kind="stable")]
+
+    # previous_oi sits where oi_change goes: replace it with oi - previous_oi
+    for oi_col in (1, 1 + _WIDTH):
+        change_col = oi_col + len(SIDE_FIELDS) - 1
+        values[:, change_col] = values[:, oi_col] - values[:, change_col]
+
+    return pd.DataFrame(values, columns=OPTION_CHAIN_COLUMNS)
+
+
+def greeks_coverage(df: pd.DataFrame) -> Tuple[int, int]:
+    """Number of strikes with call and put greeks."""
+    if df.empty:
+        return 0, 0
+    return int(df["call_delta"].notna().sum()), int(df["put_delta"].notna().sum())
@@ -0,0 +1,270 @@
+"""Parquet archive of option chain snapshots for intraday analytics and replay (needs pyarrow)."""
+import shutil
+import threading
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+from src.utils.logger import log
+from src.utils.option_chain import OPTION_CHAIN_COLUMNS
+
+# Per-strike numeric fields stored for every snapshot (strike is the row key)
+ARCHIVE_FIELDS = [column for column in OPTION_CHAIN_COLUMNS if column != "strike"]
+
+
+def archive_schema():
+    """Arrow schema of archived rows."""
+    import pyarrow as pa
+    return pa.schema(
+        [("timestamp", pa.timestamp("ms")), ("spot_price", pa.float64()), ("strike", pa.float64())]
+        + [(field, pa.float64()) for field in ARCHIVE_FIELDS]
+    )
+
+
+class OptionChainArchive:
+    """
+    Append-only option chain history, one Parquet file per writer session and day.
+
+    Files live at {root}/{symbol}/{expiry}/{day}/{session}.parquet and every
+    snapshot is one row group of (strike x fields) rows, so a day can be
+    replayed snapshot by snapshot or loaded at once as a dense
+    strike x field x timestamp array. Day directories older than the
+    retention window are pruned when a new day is opened. Without pyarrow
+    installed the archive is disabled: appends are skipped and reads come
+    back empty.
+    """
+
+    def __init__(self, root: Optional[str] = None, retention_days: Optional[int] = None):
+        """
+        Initialize the archive.
+
+        Args:
+            root: Archive directory (defaults to Config.OPTION_CHAIN_ARCHIVE_DIR)
+            retention_days: Days kept by prune() (defaults to Config.OPTION_CHAIN_ARCHIVE_DAYS, 0 keeps all)
+        """
+        if root is None or retention_days is None:
+            from src.config import Config
+            root = Config.OPTION_CHAIN_ARCHIVE_DIR if root is None else root
+            retention_days = Config.OPTION_CHAIN_ARCHIVE_DAYS if retention_days is None else retention_days
+        self.root = Path(root)
+        self.retention_days = retention_days
+        self._pruned_on: Optional[str] = None
+        try:
+            import pyarrow  # noqa: F401
+            self.enabled = True
+        except ImportError:
+            log.warning("⚠️ pyarrow not installed - option chain archiving disabled")
+            self.enabled = False
+        self._writers: Dict[Tuple[str, str], Tuple[str, object]] = {}
+        self._lock = threading.Lock()
+        self.snapshots_written = 0
+
+    def _day_dir(self, symbol: str, expiry: str, day) -> Path:
+        return self.root / symbol / str(expiry) / str(day)
+
+    def _writer(self, symbol: str, expiry: str, day: str):
+        """Open writer for a day, rolling over (and closing) the previous day's. Caller holds the lock."""
+        import pyarrow.parquet as pq
+        key = (symbol, str(expiry))
+        current = self._writers.get(key)
+        if current is not None and current[0] == day:
+            return current[1]
+        if current is not None:
+            current[1].close()
+            del self._writers[key]
+        if self._pruned_on != day:
+            self._pruned_on = day
+            self._prune(day)
+
+        day_dir = self._day_dir(symbol, expiry, day)
+        day_dir.mkdir(parents=True, exist_ok=True)
+        path = day_dir / f"{datetime.now().strftime('%H%M%S_%f')}.parquet"
+        writer = pq.ParquetWriter(path, archive_schema(), compression="zstd")
+        self._writers[key] = (day, writer)
+        log.info(f"🗄️ Archiving {symbol} {expiry} option chains to {path}")
+        return writer
+
+    def append(self, symbol: str, expiry: str, chain: pd.DataFrame, timestamp: Optional[datetime] = None) -> bool:
+        """
+        Write one snapshot as a row group.
+
+        Args:
+            symbol: Underlying symbol (e.g. "NIFTY")
+            expiry: Expiry date (YYYY-MM-DD)
+            chain: Snapshot with parse_option_chain columns (spot in attrs["spot_price"])
+            timestamp: Snapshot time (default: now)
+
+        Returns:
+            True if written
+        """
+        try:
+            if not self.enabled or chain is None or chain.empty:
+                return False
+            import pyarrow as pa
+            timestamp = timestamp or datetime.now()
+            rows = len(chain)
+            columns = {
+                "timestamp": pa.array(np.full(rows, np.datetime64(timestamp, "ms")), pa.timestamp("ms")),
+                "spot_price": pa.array(np.full(rows, float(chain.attrs.get("spot_price") or np.nan))),
+                "strike": pa.array(chain["strike"].to_numpy(dtype=np.float64)),
+            }
+            for field in ARCHIVE_FIELDS:
+                values = chain[field].to_numpy(dtype=np.float64) if field in chain.columns else np.full(rows, np.nan)
+                columns[field] = pa.array(values)
+            table = pa.Table.from_pydict(columns, schema=archive_schema())
+
+            with self._lock:
+                self._writer(symbol, expiry, timestamp.date().isoformat()).write_table(table, row_group_size=rows)
+                self.snapshots_written += 1
+            return True
+
+        except Exception as e:
+            log.error(f"❌ Option chain archive error: {e}")
+            import traceback
+            log.error(traceback.format_exc())
+            return False
+
+    def prune(self, today: Optional[date] = None) -> int:
+        """
+        Delete day directories older than the retention window.
+
+        Args:
+            today: Current day (default: today)
+
+        Returns:
+            Number of day directories removed
+        """
+        with self._lock:
+            return self._prune((today or date.today()).isoformat())
+
+    def _prune(self, today: str) -> int:
+        """prune() body; caller holds the lock."""
+        if self.retention_days <= 0 or not self.root.exists():
+            return 0
+        cutoff = (date.fromisoformat(today) - timedelta(days=self.retention_days)).isoformat()
+        for key, (day, writer) in list(self._writers.items()):
+            if day < cutoff:
+                writer.close()
+                del self._writers[key]
+        open_dirs = {Path(writer.where).parent for _, writer in self._writers.values()}
+        removed = 0
+        for day_dir in sorted(self.root.glob("*/*/*")):
+            if day_dir.is_dir() and day_dir.name < cutoff and day_dir not in open_dirs:
+                shutil.rmtree(day_dir, ignore_errors=True)
+                removed += 1
+        for parent in sorted(self.root.glob("*/*")) + sorted(self.root.glob("*")):
+            if parent.is_dir() and not any(parent.iterdir()):
+                parent.rmdir()
+        if removed:
+            log.info(f"🧹 Pruned {removed} option chain archive day(s) before {cutoff}")
+        return removed
+
+    def close(self):
+        """Close open writers (finalizes their Parquet footers)."""
+        with self._lock:
+            for _, writer in self._writers.values():
+                writer.close()
+            self._writers.clear()
+
+    def days(self, symbol: str, expiry: str) -> List[str]:
+        """Archived days for an expiry, oldest first."""
+        expiry_dir = self.root / symbol / str(expiry)
+        if not expiry_dir.exists():
+            return []
+        return sorted(path.name for path in expiry_dir.iterdir() if path.is_dir())
+
+    def _day_files(self, symbol: str, expiry: str, day) -> list:
+        """
+        Readable files for a day.
+
+        A writer still open on the day is closed first so its snapshots are
+        readable; the next append starts a new session file.
+        """
+        if not self.enabled:
+            return []
+        import pyarrow.parquet as pq
+        if isinstance(day, (date, datetime)):
+            day = day.strftime("%Y-%m-%d")
+        day_dir = self._day_dir(symbol, expiry, day)
+        with self._lock:
+            for key, (_, writer) in list(self._writers.items()):
+                if Path(writer.where).parent == day_dir:
+                    writer.close()
+                    del self._writers[key]
+        files = []
+        for path in sorted(day_dir.glob("*.parquet")):
+            try:
+                files.append(pq.ParquetFile(path))
+            except Exception as e:
+                log.warning(f"⚠️ Skipping unreadable archive file {path}: {e}")
+        return files
+
+    def load_day(self, symbol: str, expiry: str, day, fields: Optional[Sequence[str]] = None) -> Dict:
+        """
+        Load a day's snapshots as a dense array.
+
+        Args:
+            symbol: Underlying symbol
+            expiry: Expiry date
+            day: Trading day (date or YYYY-MM-DD)
+            fields: Fields to load (default: all ARCHIVE_FIELDS)
+
+        Returns:
+            dict with "data" (float64, strike x field x timestamp, NaN where a
+            strike was absent), "strikes", "fields", "timestamps"
+            (datetime64[ms]) and "spot_price" (per timestamp); empty arrays
+            when nothing is archived
+        """
+        fields = list(fields or ARCHIVE_FIELDS)
+        tables = [f.read(columns=["timestamp", "spot_price", "strike"] + fields) for f in self._day_files(symbol, expiry, day)]
+        if not tables:
+            return {
+                "data": np.empty((0, len(fields), 0)),
+                "strikes": np.empty(0),
+                "fields": fields,
+                "timestamps": np.empty(0, dtype="datetime64[ms]"),
+                "spot_price": np.empty(0),
+            }
+
+        import pyarrow as pa
+        table = pa.concat_tables(tables)
+        timestamps = table.column("timestamp").to_numpy()
+        strikes = table.column("strike").to_numpy()
+        unique_times, first, time_index = np.unique(timestamps, return_index=True, return_inverse=True)
+        unique_strikes, strike_index = np.unique(strikes, return_inverse=True)
+
+        values = np.column_stack([table.column(field).to_numpy() for field in fields])
+        data = np.full((len(unique_strikes), len(fields), len(unique_times)), np.nan)
+        data[strike_index, :, time_index] = values
+
+        return {
+            "data": data,
+            "strikes": unique_strikes,
+            "fields": fields,
+            "timestamps": unique_times,
+            "spot_price": table.column("spot_price").to_numpy()[first],
+        }
+
+    def iter_snapshots(self, symbol: str, expiry: str, day) -> Iterator[Tuple[datetime, pd.DataFrame]]:
+        """
+        Replay a day one snapshot (row group) at a time, in time order.
+
+        Yields:
+            (timestamp, chain DataFrame with parse_option_chain columns and
+            attrs["spot_price"])
+        """
+        groups = []
+        for parquet_file in self._day_files(symbol, expiry, day):
+            for index in range(parquet_file.num_row_groups):
+                start = parquet_file.metadata.row_group(index).column(0).statistics.min
+                groups.append((start, parquet_file, index))
+        for timestamp, parquet_file, index in sorted(groups, key=lambda group: group[0]):
+            frame = parquet_file.read_row_group(index).to_pandas()
+            chain = frame[OPTION_CHAIN_COLUMNS].reset_index(drop=True)
+            chain.attrs["spot_price"] = float(frame["spot_price"].iloc[0])
+            yield timestamp, chain
+
+
+# Global instance
+option_chain_archive = OptionChainArchive()
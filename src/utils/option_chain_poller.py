@@ -0,0 +1,271 @@
+"""Background option chain polling with per-strike change detection."""
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Callable, Deque, Dict, List, Optional
+import numpy as np
+import pandas as pd
+from src.utils.logger import log
+from src.utils.helpers import validate_market_hours
+
+# Snapshot columns compared between polls
+DIFF_FIELDS = ("call_oi", "call_iv", "call_ltp", "put_oi", "put_iv", "put_ltp")
+
+# A strike is reported in a change event when any |change| reaches its threshold
+DEFAULT_EVENT_THRESHOLDS = {"oi": 1.0, "iv": 0.01, "ltp": 0.05}
+
+
+def diff_chains(previous: pd.DataFrame, current: pd.DataFrame) -> pd.DataFrame:
+    """
+    Per-strike change between two option chain snapshots.
+
+    Args:
+        previous: Earlier snapshot (parse_option_chain columns)
+        current: Later snapshot
+
+    Returns:
+        DataFrame with strike and {field}_change for every DIFF_FIELDS column;
+        strikes missing from the previous snapshot have NaN changes
+    """
+    if current.empty:
+        return pd.DataFrame(columns=["strike"] + [f"{field}_change" for field in DIFF_FIELDS])
+
+    strikes = current["strike"].to_numpy()
+    current_values = current[list(DIFF_FIELDS)].to_numpy(dtype=np.float64)
+    changes = np.full_like(current_values, np.nan)
+
+    if not previous.empty:
+        previous_strikes = previous["strike"].to_numpy()
+        pos = np.searchsorted(previous_strikes, strikes)
+        pos = np.minimum(pos, len(previous_strikes) - 1)
+        matched = previous_strikes[pos] == strikes
+        previous_values = previous[list(DIFF_FIELDS)].to_numpy(dtype=np.float64)
+        changes[matched] = current_values[matched] - previous_values[pos[matched]]
+
+    result = pd.DataFrame(changes, columns=[f"{field}_change" for field in DIFF_FIELDS])
+    result.insert(0, "strike", strikes)
+    return result
+
+
+def chains_equal(previous: pd.DataFrame, current: pd.DataFrame) -> bool:
+    """Whether two snapshots have the same strikes and DIFF_FIELDS values (NaN equal to NaN)."""
+    if len(previous) != len(current):
+        return False
+    return np.array_equal(previous["strike"].to_numpy(), current["strike"].to_numpy()) and np.array_equal(
+        previous[list(DIFF_FIELDS)].to_numpy(dtype=np.float64),
+        current[list(DIFF_FIELDS)].to_numpy(dtype=np.float64),
+        equal_nan=True,
+    )
+
+
+class OptionChainPoller:
+    """
+    Keeps the nearest expiries' option chains fresh in a background thread.
+
+    Each poll stores the snapshot, diffs it against the previous one and
+    publishes a change event to subscribers. Readers get the latest
+    snapshot without waiting on the API; the per-expiry history of diffs
+    is kept for intraday OI-flow analysis. Polling pauses while the
+    market is closed.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[str], pd.DataFrame],
+        expiries: Callable[[], List[str]],
+        interval: float = 5.0,
+        history_size: int = 360,
+        thresholds: Optional[Dict[str, float]] = None,
+        is_market_open: Callable[[], bool] = validate_market_hours,
+        closed_recheck_seconds: float = 60.0,
+    ):
+        """
+        Initialize the poller.
+
+        Args:
+            fetch: expiry -> option chain DataFrame (empty on failure)
+            expiries: Returns the expiries to poll (nearest first)
+            interval: Seconds between polling rounds (the rate limiter paces requests)
+            history_size: Diffs retained per expiry
+            thresholds: Minimum |change| per field kind ("oi", "iv", "ltp") for change events
+            is_market_open: Polling is paused while this returns False
+            closed_recheck_seconds: Seconds between market-open checks while paused
+        """
+        self.fetch = fetch
+        self.expiries = expiries
+        self.interval = interval
+        self.history_size = history_size
+        self.thresholds = {**DEFAULT_EVENT_THRESHOLDS, **(thresholds or {})}
+        self.is_market_open = is_market_open
+        self.closed_recheck_seconds = closed_recheck_seconds
+        self._snapshots: Dict[str, Dict] = {}
+        self._history: Dict[str, Deque[Dict]] = {}
+        self._subscribers: List[Callable[[Dict], None]] = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.polls = 0
+        self.failures = 0
+
+    def start(self) -> bool:
+        """Start polling in a daemon thread."""
+        if self._thread and self._thread.is_alive():
+            log.warning("Option chain poller already running")
+            return True
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="OptionChainPoller", daemon=True)
+        self._thread.start()
+        log.info(f"✅ Option chain poller started (every {self.interval}s)")
+        return True
+
+    def stop(self):
+        """Stop polling and wait for the thread to exit."""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=10)
+            self._thread = None
+            log.info("🛑 Option chain poller stopped")
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def subscribe(self, callback: Callable[[Dict], None]):
+        """
+        Receive change events.
+
+        Args:
+            callback: Called from the poller thread with
+                {"expiry", "timestamp", "spot_price", "changes"} where changes
+                holds the strikes whose change crossed a threshold
+        """
+        with self._lock:
+            self._subscribers.append(callback)
+
+    def _run(self):
+        paused = False
+        while not self._stop.is_set():
+            if not self.is_market_open():
+                if not paused:
+                    log.info("⏰ Market closed - option chain polling paused")
+                    paused = True
+                self._stop.wait(self.closed_recheck_seconds)
+                continue
+            if paused:
+                log.info("▶️ Market open - option chain polling resumed")
+                paused = False
+            started = time.monotonic()
+            for expiry in self.expiries():
+                if self._stop.is_set():
+                    break
+                self.poll_once(expiry)
+            self._stop.wait(max(0.0, self.interval - (time.monotonic() - started)))
+
+    def poll_once(self, expiry: str) -> Optional[Dict]:
+        """
+        Fetch one expiry, store the snapshot and publish its changes.
+
+        Args:
+            expiry: Expiry date (YYYY-MM-DD)
+
+        Returns:
+            The change event, or None if the fetch failed
+        """
+        try:
+            chain = self.fetch(expiry)
+            if chain is None or chain.empty:
+                self.failures += 1
+                log.warning(f"⚠️ Option chain poll for {expiry} returned no data")
+                return None
+
+            timestamp = datetime.now()
+            with self._lock:
+                previous = self._snapshots.get(expiry)
+                diff = diff_chains(previous["chain"] if previous else pd.DataFrame(), chain)
+                self._snapshots[expiry] = {"chain": chain, "timestamp": timestamp, "diff": diff}
+                history = self._history.setdefault(expiry, deque(maxlen=self.history_size))
+                if previous is not None:
+                    history.append({"timestamp": timestamp, "diff": diff})
+                subscribers = list(self._subscribers)
+            self.polls += 1
+
+            event = {
+                "expiry": expiry,
+                "timestamp": timestamp,
+                "spot_price": chain.attrs.get("spot_price"),
+                "changes": self._significant(diff),
+            }
+            if previous is not None and not event["changes"].empty:
+                for callback in subscribers:
+                    try:
+                        callback(event)
+                    except Exception as e:
+                        log.error(f"❌ Option chain subscriber error: {e}")
+            return event
+
+        except Exception as e:
+            self.failures += 1
+            log.error(f"❌ Option chain poll error for {expiry}: {e}")
+            import traceback
+            log.error(traceback.format_exc())
+            return None
+
+    def _significant(self, diff: pd.DataFrame) -> pd.DataFrame:
+        """Rows of a diff with at least one change at or above its threshold."""
+        if diff.empty:
+            return diff
+        mask = np.zeros(len(diff), dtype=bool)
+        for field in DIFF_FIELDS:
+            kind = field.split("_", 1)[1]
+            mask |= np.abs(diff[f"{field}_change"].to_numpy()) >= self.thresholds[kind]
+        return diff[mask].reset_index(drop=True)
+
+    def latest(self, expiry: str, max_age: Optional[float] = None) -> Optional[pd.DataFrame]:
+        """
+        Latest snapshot for an expiry.
+
+        Args:
+            expiry: Expiry date
+            max_age: Reject snapshots older than this many seconds
+
+        Returns:
+            A copy of the snapshot (safe to modify), or None if absent or too old
+        """
+        with self._lock:
+            snapshot = self._snapshots.get(expiry)
+        if snapshot is None:
+            return None
+        if max_age is not None and datetime.now() - snapshot["timestamp"] > timedelta(seconds=max_age):
+            return None
+        return snapshot["chain"].copy()
+
+    def latest_diff(self, expiry: str) -> Optional[pd.DataFrame]:
+        """Per-strike changes from the last poll of an expiry."""
+        with self._lock:
+            snapshot = self._snapshots.get(expiry)
+        return snapshot["diff"].copy() if snapshot else None
+
+    def oi_flow(self, expiry: str) -> pd.DataFrame:
+        """
+        Intraday history of per-strike changes for an expiry.
+
+        Returns:
+            Long DataFrame of every retained diff with a timestamp column
+        """
+        with self._lock:
+            history = list(self._history.get(expiry, ()))
+        if not history:
+            return pd.DataFrame()
+        frames = [entry["diff"].assign(timestamp=entry["timestamp"]) for entry in history]
+        return pd.concat(frames, ignore_index=True)
+
+    def metrics(self) -> Dict:
+        """Poll counters and snapshot ages."""
+        now = datetime.now()
+        with self._lock:
+            ages = {
+                expiry: round((now - snapshot["timestamp"]).total_seconds(), 1)
+                for expiry, snapshot in self._snapshots.items()
+            }
+        return {"running": self.is_running, "polls": self.polls, "failures": self.failures, "snapshot_age_sec": ages}
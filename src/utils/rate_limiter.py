@@ -0,0 +1,269 @@
+"""Priority token-bucket scheduling for Dhan API categories."""
+import asyncio
+import contextvars
+import heapq
+import itertools
+import random
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+# Lower value = served first
+PRIORITY_ORDER = 0
+PRIORITY_TRADING = 1
+PRIORITY_BACKGROUND = 2
+PRIORITY_DASHBOARD = 3
+
+# Dhan per-account limits: (tokens per second, burst)
+RATE_LIMITS = {
+    "orders": (10.0, 10),
+    "quotes": (1.0, 1),
+    "option_chain": (1 / 3, 1),
+    "history": (5.0, 5),
+    "portfolio": (20.0, 20),
+    "default": (5.0, 5),
+}
+
+# Priority used when the caller does not set one
+DEFAULT_PRIORITIES = {"orders": PRIORITY_ORDER}
+
+# Exponential backoff for throttled (429) and server-error (5xx) responses
+BACKOFF_BASE_SECONDS = 0.5
+BACKOFF_MAX_SECONDS = 8.0
+MAX_RETRIES = 3
+
+_request_priority: contextvars.ContextVar[Optional[int]] = contextvars.ContextVar("dhan_request_priority", default=None)
+
+
+@contextmanager
+def request_priority(priority: int):
+    """
+    Run Dhan requests made inside the block at a given priority.
+
+    Args:
+        priority: One of the PRIORITY_* constants
+    """
+    token = _request_priority.set(priority)
+    try:
+        yield
+    finally:
+        _request_priority.reset(token)
+
+
+def current_priority(category: str) -> int:
+    """Priority for a request from the current context."""
+    priority = _request_priority.get()
+    if priority is None:
+        return DEFAULT_PRIORITIES.get(category, PRIORITY_BACKGROUND)
+    return priority
+
+
+def min_request_interval(category: str, requests: int) -> float:
+    """
+    Seconds a category's bucket needs to serve a number of requests.
+
+    Args:
+        category: Limits category (see RATE_LIMITS)
+        requests: Requests per round
+
+    Returns:
+        Shortest sustainable interval between rounds
+    """
+    rate, _ = RATE_LIMITS.get(category, RATE_LIMITS["default"])
+    return requests / rate
+
+
+def bind_priority(coro):
+    """
+    Carry the caller's request priority into a coroutine run on another loop.
+
+    Args:
+        coro: Coroutine created in the caller's context
+
+    Returns:
+        Coroutine that runs coro with the caller's priority set
+    """
+    priority = _request_priority.get()
+
+    async def bound():
+        token = _request_priority.set(priority)
+        try:
+            return await coro
+        finally:
+            _request_priority.reset(token)
+
+    return bound()
+
+
+def backoff_delay(attempt: int, retry_after: Optional[float] = None) -> float:
+    """
+    Exponential backoff with jitter (a random delay in the upper half of the step).
+
+    Args:
+        attempt: Retry number (0 for the first retry)
+        retry_after: Server-provided Retry-After seconds, used as a floor
+
+    Returns:
+        Seconds to wait
+    """
+    ceiling = min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * (2 ** attempt))
+    delay = random.uniform(ceiling / 2, ceiling)
+    if retry_after:
+        delay = max(delay, retry_after)
+    return delay
+
+
+class TokenBucket:
+    """
+    Token bucket whose waiters are served strictly by priority, then FIFO.
+
+    Must be used from a single event loop.
+    """
+
+    def __init__(self, name: str, rate: float, burst: int):
+        """
+        Initialize a full bucket.
+
+        Args:
+            name: Category name (for metrics)
+            rate: Tokens added per second
+            burst: Bucket capacity
+        """
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._waiters = []
+        self._seq = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._granted = 0
+        self._queued = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self._max_depth = 0
+        self._throttled = 0
+
+    def _refill(self, now: float):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _grant(self, waited: float):
+        self._tokens -= 1
+        self._granted += 1
+        self._total_wait += waited
+        self._max_wait = max(self._max_wait, waited)
+
+    async def acquire(self, priority: int = PRIORITY_BACKGROUND) -> float:
+        """
+        Wait for a token.
+
+        Args:
+            priority: Lower values are served first
+
+        Returns:
+            Seconds spent waiting
+        """
+        now = time.monotonic()
+        self._refill(now)
+        if not self._waiters and self._tokens >= 1 and now >= self._paused_until:
+            self._grant(0.0)
+            return 0.0
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), now, future))
+        self._queued += 1
+        self._max_depth = max(self._max_depth, self.depth)
+        self._schedule()
+        await future
+        return time.monotonic() - now
+
+    @property
+    def depth(self) -> int:
+        """Requests waiting for a token."""
+        return sum(1 for waiter in self._waiters if not waiter[3].done())
+
+    def _schedule(self):
+        if self._timer is not None or not self._waiters:
+            return
+        now = time.monotonic()
+        self._refill(now)
+        delay = max(self._paused_until - now, (1 - self._tokens) / self.rate, 0.0)
+        self._timer = asyncio.get_running_loop().call_later(delay, self._dispatch)
+
+    def _dispatch(self):
+        self._timer = None
+        now = time.monotonic()
+        self._refill(now)
+        while self._waiters and self._tokens >= 1 and now >= self._paused_until:
+            _, _, enqueued, future = heapq.heappop(self._waiters)
+            if future.done():
+                continue
+            self._grant(now - enqueued)
+            future.set_result(None)
+        while self._waiters and self._waiters[0][3].done():
+            heapq.heappop(self._waiters)
+        self._schedule()
+
+    def penalize(self, delay: float):
+        """
+        Stop granting tokens for a while after the server throttled us.
+
+        Args:
+            delay: Seconds to pause the bucket
+        """
+        self._throttled += 1
+        self._paused_until = max(self._paused_until, time.monotonic() + delay)
+        self._tokens = min(self._tokens, 0.0)
+
+    def metrics(self) -> Dict:
+        """Queue depth and wait statistics."""
+        return {
+            "rate_per_sec": round(self.rate, 3),
+            "burst": self.burst,
+            "tokens": round(min(self.burst, self._tokens), 3),
+            "queue_depth": self.depth,
+            "max_queue_depth": self._max_depth,
+            "granted": self._granted,
+            "queued": self._queued,
+            "avg_wait_ms": round(self._total_wait / self._granted * 1000, 1) if self._granted else 0.0,
+            "max_wait_ms": round(self._max_wait * 1000, 1),
+            "throttled": self._throttled,
+        }
+
+
+class RequestScheduler:
+    """One token bucket per API category."""
+
+    def __init__(self, limits: Optional[Dict[str, tuple]] = None):
+        """
+        Initialize the buckets.
+
+        Args:
+            limits: category -> (rate per second, burst); defaults to RATE_LIMITS
+        """
+        limits = limits or RATE_LIMITS
+        self.buckets = {name: TokenBucket(name, rate, burst) for name, (rate, burst) in limits.items()}
+
+    def bucket(self, category: str) -> TokenBucket:
+        return self.buckets.get(category) or self.buckets["default"]
+
+    async def acquire(self, category: str, priority: Optional[int] = None) -> float:
+        """
+        Wait for a token in a category.
+
+        Args:
+            category: API category
+            priority: Request priority (defaults from the current context)
+
+        Returns:
+            Seconds spent waiting
+        """
+        if priority is None:
+            priority = current_priority(category)
+        return await self.bucket(category).acquire(priority)
+
+    def metrics(self) -> Dict[str, Dict]:
+        """Metrics for every category."""
+        return {name: bucket.metrics() for name, bucket in self.buckets.items()}
@@ -0,0 +1,343 @@
+"""Binary snapshot cache for the scrip master CSV."""
+import os
+import json
+import time
+import hashlib
+import pandas as pd
+from pathlib import Path
+from typing import Optional, Dict
+from src.utils.logger import log
+
+# Bump when the snapshot layout or parsed columns change
+SNAPSHOT_SCHEMA_VERSION = 2
+
+# Expiry format used in SEM_EXPIRY_DATE: '25/11/25 14:30'
+EXPIRY_FORMAT = '%d/%m/%y %H:%M'
+
+# Option custom symbol layout: "NIFTY 28 OCT 30150 CALL"
+OPTION_SYMBOL_PATTERN = r'^(?P<underlying>\S+) (?P<day>\d{1,2}) (?P<month>[A-Z]{3}) (?P<strike>\d+(?:\.\d+)?) (?P<option_type>CALL|PUT)$'
+
+# Futures custom symbol layout: "NIFTY NOV FUT"
+FUTURES_SYMBOL_PATTERN = r'^(\S+) [A-Z]{3} FUT$'
+
+# (SEM_EXM_EXCH_ID, SEM_SEGMENT) -> Dhan exchange segment; index rows are IDX_I on any exchange
+EXCHANGE_SEGMENTS = {
+    ('NSE', 'E'): 'NSE_EQ',
+    ('NSE', 'D'): 'NSE_FNO',
+    ('NSE', 'C'): 'NSE_CURRENCY',
+    ('BSE', 'E'): 'BSE_EQ',
+    ('BSE', 'D'): 'BSE_FNO',
+    ('BSE', 'C'): 'BSE_CURRENCY',
+    ('MCX', 'M'): 'MCX_COMM',
+}
+INDEX_SEGMENT = 'IDX_I'
+
+# Only the columns the app reads, with pinned dtypes
+SCRIP_MASTER_DTYPES = {
+    'SEM_EXM_EXCH_ID': 'category',
+    'SEM_SEGMENT': 'category',
+    'SEM_SMST_SECURITY_ID': 'int64',
+    'SEM_INSTRUMENT_NAME': 'category',
+    'SEM_TRADING_SYMBOL': 'str',
+    'SEM_CUSTOM_SYMBOL': 'str',
+    'SEM_EXPIRY_DATE': 'str',
+    'SEM_STRIKE_PRICE': 'float64',
+    'SEM_OPTION_TYPE': 'category',
+}
+
+
+def parse_expiry_dates(values: pd.Series) -> pd.Series:
+    """
+    Parse SEM_EXPIRY_DATE values in one vectorised pass.
+
+    Args:
+        values: Raw expiry strings ('25/11/25 14:30' or ISO 'YYYY-MM-DD HH:MM:SS')
+
+    Returns:
+        datetime64 Series (NaT where unparseable)
+    """
+    parsed = pd.to_datetime(values, format=EXPIRY_FORMAT, errors='coerce')
+    missing = parsed.isna() & values.notna()
+    if missing.any():
+        parsed[missing] = pd.to_datetime(values[missing], format='ISO8601', errors='coerce')
+    return parsed
+
+
+def add_option_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Add parsed 'underlying', 'expiry', 'strike' and 'option_type' columns.
+
+    'underlying' is set for option and futures rows; 'strike' and 'option_type'
+    only for options.
+
+    Args:
+        df: Scrip master frame with SEM_CUSTOM_SYMBOL (and optionally SEM_EXPIRY_DATE)
+
+    Returns:
+        The same frame with the parsed columns added in place
+    """
+    symbols = df['SEM_CUSTOM_SYMBOL'].astype('str').str.strip().str.upper()
+    parts = symbols.str.extract(OPTION_SYMBOL_PATTERN)
+    futures_underlying = symbols.str.extract(FUTURES_SYMBOL_PATTERN, expand=False)
+
+    df['underlying'] = parts['underlying'].fillna(futures_underlying).astype('category')
+    df['strike'] = pd.to_numeric(parts['strike'], errors='coerce')
+    df['option_type'] = parts['option_type'].astype('category')
+    if 'SEM_EXPIRY_DATE' in df.columns:
+        df['expiry'] = parse_expiry_dates(df['SEM_EXPIRY_DATE'])
+    else:
+        df['expiry'] = pd.NaT
+    return df
+
+
+def add_exchange_segment(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Add the Dhan 'exchange_segment' (NSE_FNO, IDX_I, ...) for each row.
+
+    Args:
+        df: Scrip master frame with SEM_EXM_EXCH_ID and SEM_SEGMENT
+
+    Returns:
+        The same frame with the column added in place
+    """
+    if 'SEM_EXM_EXCH_ID' not in df.columns or 'SEM_SEGMENT' not in df.columns:
+        df['exchange_segment'] = pd.Series(pd.NA, index=df.index, dtype='category')
+        return df
+
+    exchange = df['SEM_EXM_EXCH_ID'].astype('str')
+    segment = df['SEM_SEGMENT'].astype('str')
+    mapped = pd.Series(pd.NA, index=df.index, dtype='object')
+    for (exch, seg), name in EXCHANGE_SEGMENTS.items():
+        mapped[(exchange == exch) & (segment == seg)] = name
+    mapped[segment == 'I'] = INDEX_SEGMENT
+
+    df['exchange_segment'] = mapped.astype('category')
+    return df
+
+
+def add_derived_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """Add the exchange segment and parsed contract columns in place."""
+    add_exchange_segment(df)
+    if 'SEM_CUSTOM_SYMBOL' in df.columns:
+        add_option_columns(df)
+    return df
+
+
+def read_scrip_master_csv(csv_path: Path) -> pd.DataFrame:
+    """
+    Read the used scrip master columns from CSV with pinned dtypes.
+
+    Args:
+        csv_path: Path to api-scrip-master.csv
+
+    Returns:
+        Parsed DataFrame including the derived option columns
+    """
+    df = pd.read_csv(
+        csv_path,
+        usecols=lambda column: column in SCRIP_MASTER_DTYPES,
+        dtype=SCRIP_MASTER_DTYPES,
+        low_memory=False,
+    )
+    return add_derived_columns(df)
+
+
+def _snapshot_paths(csv_path: Path):
+    """Return (data, meta) snapshot paths next to the CSV."""
+    stem = csv_path.with_suffix('')
+    return Path(f"{stem}.snapshot.feather"), Path(f"{stem}.snapshot.json")
+
+
+def _file_sha256(path: Path) -> str:
+    """Hash a file in chunks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _csv_fingerprint(csv_path: Path, with_hash: bool = True) -> Dict:
+    """Describe the CSV by size, mtime and (optionally) content hash."""
+    stat = csv_path.stat()
+    fingerprint = {
+        'schema': SNAPSHOT_SCHEMA_VERSION,
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+    }
+    if with_hash:
+        fingerprint['sha256'] = _file_sha256(csv_path)
+    return fingerprint
+
+
+def _snapshot_is_valid(csv_path: Path) -> bool:
+    """Check the snapshot metadata against the current CSV."""
+    data_path, meta_path = _snapshot_paths(csv_path)
+    if not data_path.exists() or not meta_path.exists():
+        return False
+
+    try:
+        with open(meta_path, 'r') as f:
+            meta = json.load(f)
+    except Exception:
+        return False
+
+    current = _csv_fingerprint(csv_path, with_hash=False)
+    if meta.get('schema') != current['schema'] or meta.get('size') != current['size']:
+        return False
+    if meta.get('mtime_ns') == current['mtime_ns']:
+        return True
+
+    # Same size, different mtime (copied/touched): fall back to the content hash
+    return meta.get('sha256') == _file_sha256(csv_path)
+
+
+def write_snapshot(csv_path: Path, df: pd.DataFrame, version: Optional[str] = None) -> bool:
+    """
+    Persist a parsed scrip master frame as a Feather snapshot.
+
+    Args:
+        csv_path: CSV the frame was read from
+        df: Parsed frame (see read_scrip_master_csv)
+        version: Scrip master version the frame corresponds to, if known
+
+    Returns:
+        True if the snapshot was written
+    """
+    csv_path = Path(csv_path)
+    data_path, meta_path = _snapshot_paths(csv_path)
+    tmp_path = data_path.with_name(data_path.name + '.tmp')
+
+    try:
+        df.reset_index(drop=True).to_feather(tmp_path)
+        os.replace(tmp_path, data_path)
+
+        meta = _csv_fingerprint(csv_path)
+        meta['version'] = version
+        with open(meta_path, 'w') as f:
+            json.dump(meta, f)
+
+        log.info(f"💾 Saved scrip master snapshot to {data_path}")
+        return True
+    except ImportError:
+        log.debug("pyarrow not installed - scrip master snapshot disabled")
+        return False
+    except Exception as e:
+        log.warning(f"⚠️ Could not write scrip master snapshot: {e}")
+        if tmp_path.exists():
+            tmp_path.unlink()
+        return False
+
+
+def load_scrip_master(csv_path: Path) -> Optional[pd.DataFrame]:
+    """
+    Load the scrip master, preferring a valid binary snapshot over the CSV.
+
+    Args:
+        csv_path: Path to api-scrip-master.csv
+
+    Returns:
+        Parsed DataFrame, or None if the CSV does not exist
+    """
+    csv_path = Path(csv_path)
+    if not csv_path.exists():
+        return None
+
+    start = time.perf_counter()
+    data_path, _ = _snapshot_paths(csv_path)
+
+    if _snapshot_is_valid(csv_path):
+        try:
+            df = pd.read_feather(data_path)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            log.info(f"⚡ Loaded scrip master snapshot in {elapsed_ms:.1f} ms")
+            return df
+        except ImportError:
+            log.debug("pyarrow not installed - reading scrip master CSV")
+        except Exception as e:
+            log.warning(f"⚠️ Scrip master snapshot unreadable, rebuilding: {e}")
+
+    df = read_scrip_master_csv(csv_path)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    log.info(f"📄 Parsed scrip master CSV in {elapsed_ms:.1f} ms")
+
+    write_snapshot(csv_path, df)
+    return df
+
+
+def snapshot_version(csv_path: Path) -> Optional[str]:
+    """
+    Get the scrip master version recorded with a valid snapshot.
+
+    Args:
+        csv_path: Path to api-scrip-master.csv
+
+    Returns:
+        Version string, or None if unknown
+    """
+    csv_path = Path(csv_path)
+    if not csv_path.exists() or not _snapshot_is_valid(csv_path):
+        return None
+
+    try:
+        with open(_snapshot_paths(csv_path)[1], 'r') as f:
+            return json.load(f).get('version')
+    except Exception:
+        return None
+
+
+def _pin_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    """Cast known columns to their pinned dtypes (re-deriving categories)."""
+    for column, dtype in SCRIP_MASTER_DTYPES.items():
+        if column in df.columns:
+            df[column] = df[column].astype(dtype)
+    for column in ('underlying', 'option_type', 'exchange_segment'):
+        if column in df.columns:
+            df[column] = df[column].astype('category')
+    return df
+
+
+def apply_delta(df: pd.DataFrame, delta: Dict) -> pd.DataFrame:
+    """
+    Apply a scrip master delta keyed by SEM_SMST_SECURITY_ID.
+
+    Args:
+        df: Current parsed frame
+        delta: Dict with 'added' and 'changed' (lists of row dicts with SEM_* columns)
+               and 'removed' (list of security IDs)
+
+    Returns:
+        New parsed frame; the input frame is not modified
+    """
+    upserts = list(delta.get('added') or []) + list(delta.get('changed') or [])
+    removed = {int(security_id) for security_id in delta.get('removed') or []}
+
+    rows = pd.DataFrame(upserts)
+    if not rows.empty:
+        rows = rows[[column for column in df.columns if column in rows.columns]]
+        rows = add_derived_columns(_pin_dtypes(rows))
+        removed |= set(rows['SEM_SMST_SECURITY_ID'].tolist())
+
+    kept = df[~df['SEM_SMST_SECURITY_ID'].isin(removed)]
+    frames = [kept, rows] if not rows.empty else [kept]
+    patched = pd.concat(frames, ignore_index=True)
+    return _pin_dtypes(patched)
+
+
+def refresh_snapshot(csv_path: Path, version: Optional[str] = None) -> bool:
+    """
+    Rebuild the snapshot for a freshly downloaded CSV.
+
+    Args:
+        csv_path: Path to the new api-scrip-master.csv
+        version: Version of the downloaded CSV
+
+    Returns:
+        True if the snapshot was rebuilt
+    """
+    try:
+        csv_path = Path(csv_path)
+        return write_snapshot(csv_path, read_scrip_master_csv(csv_path), version)
+    except Exception as e:
+        log.error(f"❌ Failed to rebuild scrip master snapshot: {e}")
+        return False
@@ -1,20 +1,37 @@
 """Security master utilities for option contract mapping."""
+import time
+import asyncio
+import threading
+import numpy as np
 import pandas as pd
 from pathlib import Path
-from datetime import datetime
-from typing import Optional, Dict, Tuple
+from datetime import datetime, date, timedelta
+from typing import Optional, Dict, Iterable, Tuple
 from src.utils.logger import log
 from src.utils.desktop_config import desktop_config
+from src.utils.symbol_index import SymbolSearchIndex
+from src.utils.scrip_master_cache import (
+    load_scrip_master,
+    snapshot_version,
+    write_snapshot,
+    apply_delta as apply_scrip_master_delta,
+)
+
+OptionKey = Tuple[str, date, float, str]
+PartitionKey = Tuple[Optional[str], Optional[str]]
+
 
 class SecurityMaster:
     """Manage security master data for option contracts."""
     
-    def __init__(self, csv_path: str = None):
+    def __init__(self, csv_path: str = None, df: pd.DataFrame = None, segments: Optional[Iterable[str]] = None):
         """
         Initialize security master.
         
         Args:
             csv_path: Path to api-scrip-master.csv file
+            df: Already parsed scrip master frame (skips reading the file)
+            segments: Exchange segments to keep (e.g. ["NSE_FNO", "IDX_I"]); None keeps all
         """
         if csv_path is None:
             # Lazy load desktop config to avoid circular imports
@@ -37,8 +54,19 @@ class SecurityMaster:
                 # Fallback if desktop_config not available
                 csv_path = Path(__file__).parent.parent.parent / "api-scrip-master.csv"
         self.csv_path = Path(csv_path)
+        self.segments = sorted(set(segments)) if segments else None
         self.df = None
-        self.load_csv()
+        self._partitions: Dict[PartitionKey, np.ndarray] = {}
+        self._option_partitions: Dict[str, pd.DataFrame] = {}
+        self._option_index: Dict[OptionKey, int] = {}
+        self._futures_calendar: Dict[str, Tuple[np.ndarray, list]] = {}
+        self.search_index: Optional[SymbolSearchIndex] = None
+        
+        if df is not None:
+            self.df = df
+            self._build_indexes()
+        else:
+            self.load_csv()
     
     def load_csv(self):
         """Load security master CSV file."""
@@ -48,17 +76,227 @@ class SecurityMaster:
                 return False
             
             log.info(f"📂 Loading security master from {self.csv_path}")
-            self.df = pd.read_csv(self.csv_path)
+            self.df = load_scrip_master(self.csv_path)
             log.info(f"✅ Loaded {len(self.df)} securities")
             
             # Log column names for debugging
             log.info(f"Columns: {list(self.df.columns)}")
             
+            self._build_indexes()
+            
             return True
         except Exception as e:
             log.error(f"❌ Failed to load security master: {e}")
             return False
     
+    def _build_indexes(self):
+        """Build all lookup structures for the loaded frame."""
+        self._drop_unused_segments()
+        self._build_partitions()
+        self._build_option_index()
+        self._build_futures_calendar()
+        if 'SEM_CUSTOM_SYMBOL' in self.df.columns:
+            self.search_index = SymbolSearchIndex(self.df)
+    
+    def _drop_unused_segments(self):
+        """Drop rows outside the configured exchange segments to cut memory."""
+        if not self.segments or 'exchange_segment' not in self.df.columns:
+            return
+        
+        before = len(self.df)
+        keep = self.df['exchange_segment'].isin(self.segments)
+        self.df = self.df[keep].reset_index(drop=True)
+        for column in self.df.select_dtypes('category').columns:
+            self.df[column] = self.df[column].cat.remove_unused_categories()
+        
+        log.info(f"✂️ Kept {len(self.df)}/{before} securities in segments {self.segments}")
+    
+    def _build_partitions(self):
+        """
+        Group row positions by (exchange segment, underlying).
+        
+        Partitions hold positions into self.df rather than copies, so they cost
+        one int64 per row; get_partition materialises a compact frame on demand.
+        """
+        self._partitions = {}
+        if 'exchange_segment' not in self.df.columns or 'underlying' not in self.df.columns:
+            return
+        
+        groups = self.df.groupby(['exchange_segment', 'underlying'], observed=True, dropna=False, sort=False).indices
+        self._partitions = {
+            (None if pd.isna(segment) else segment, None if pd.isna(underlying) else underlying): positions
+            for (segment, underlying), positions in groups.items()
+        }
+    
+    def partition_sizes(self) -> Dict[str, int]:
+        """
+        Get row counts per partition.
+        
+        Returns:
+            Dict of "SEGMENT/UNDERLYING" -> rows
+        """
+        return {
+            f"{segment}/{underlying or '-'}": len(positions)
+            for (segment, underlying), positions in self._partitions.items()
+        }
+    
+    def get_partition(self, segment: str = None, underlying: str = None) -> pd.DataFrame:
+        """
+        Get the rows of one exchange segment and/or underlying.
+        
+        Args:
+            segment: Exchange segment, e.g. "NSE_FNO" (None for any)
+            underlying: Underlying symbol, e.g. "NIFTY" (None for any)
+        
+        Returns:
+            DataFrame with only the matching partition rows
+        """
+        if self.df is None:
+            return pd.DataFrame()
+        
+        underlying = underlying.upper() if underlying else None
+        positions = [
+            rows for (seg, und), rows in self._partitions.items()
+            if (segment is None or seg == segment) and (underlying is None or und == underlying)
+        ]
+        if not positions:
+            return self.df.iloc[0:0]
+        return self.df.iloc[np.sort(np.concatenate(positions))]
+    
+    def _build_option_index(self):
+        """
+        Build the option lookup index from the parsed option columns.
+        
+        Maps (underlying, expiry date, strike, CALL/PUT) to security ID using the
+        'underlying', 'expiry', 'strike' and 'option_type' columns added at load.
+        """
+        self._option_index = {}
+        self._option_partitions = {}
+        
+        if self.df is None or 'option_type' not in self.df.columns:
+            return
+        
+        start = time.perf_counter()
+        
+        options = self.df.loc[
+            self.df['option_type'].notna() & self.df['expiry'].notna(),
+            ['underlying', 'expiry', 'strike', 'option_type', 'SEM_SMST_SECURITY_ID']
+        ].rename(columns={'SEM_SMST_SECURITY_ID': 'security_id'})
+        options = options.assign(expiry=options['expiry'].dt.normalize())
+        options = options.drop_duplicates(
+            subset=['underlying', 'expiry', 'strike', 'option_type'], keep='first'
+        )
+        self._option_partitions = {
+            underlying: group.reset_index(drop=True)
+            for underlying, group in options.groupby('underlying', observed=True, sort=False)
+        }
+        
+        keys = zip(
+            options['underlying'].tolist(),
+            options['expiry'].dt.date.tolist(),
+            options['strike'].astype(float).tolist(),
+            options['option_type'].tolist(),
+        )
+        self._option_index = dict(zip(keys, options['security_id'].astype('int64').tolist()))
+        
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        log.info(f"🗂️ Indexed {len(self._option_index)} option contracts in {elapsed_ms:.1f} ms")
+    
+    def lookup_option(
+        self,
+        symbol: str,
+        strike: float,
+        option_type: str,
+        expiry: date
+    ) -> Optional[int]:
+        """
+        Probe the option index without falling back to string matching.
+        
+        Args:
+            symbol: "NIFTY" or "BANKNIFTY"
+            strike: Strike price
+            option_type: "CALL" or "PUT"
+            expiry: Expiry date
+        
+        Returns:
+            Security ID as integer, or None if not indexed
+        """
+        return self._option_index.get((symbol.upper(), expiry, float(strike), option_type))
+    
+    def option_strikes(self, symbol: str, expiry) -> np.ndarray:
+        """
+        Listed strikes for an underlying and expiry.
+        
+        Args:
+            symbol: "NIFTY" or "BANKNIFTY"
+            expiry: Expiry date ("YYYY-MM-DD", date or Timestamp)
+        
+        Returns:
+            Sorted unique strikes (float64), empty if none are listed
+        """
+        options = self._option_partitions.get(symbol.upper())
+        if options is None:
+            return np.empty(0)
+        strikes = options.loc[options['expiry'] == pd.Timestamp(expiry).normalize(), 'strike']
+        return np.unique(strikes.to_numpy(dtype='float64'))
+    
+    def resolve_chain(self, symbol: str, expiry, strikes) -> pd.DataFrame:
+        """
+        Resolve call and put security IDs for a set of strikes in one join.
+        
+        Args:
+            symbol: "NIFTY" or "BANKNIFTY"
+            expiry: Expiry date ("YYYY-MM-DD", date or Timestamp)
+            strikes: Iterable of strike prices
+        
+        Returns:
+            DataFrame with strike, call_security_id, put_security_id (nullable Int64),
+            one row per input strike in input order
+        """
+        result = pd.DataFrame({'strike': np.asarray(list(strikes), dtype='float64')})
+        
+        options = self._option_partitions.get(symbol.upper())
+        if options is None:
+            options = pd.DataFrame(columns=['expiry', 'strike', 'option_type', 'security_id'])
+        contracts = options[options['expiry'] == pd.Timestamp(expiry).normalize()]
+        ids = contracts.pivot(index='strike', columns='option_type', values='security_id')
+        ids = ids.reindex(columns=['CALL', 'PUT'])
+        ids.columns = ['call_security_id', 'put_security_id']
+        
+        result = result.join(ids, on='strike')
+        result[['call_security_id', 'put_security_id']] = result[
+            ['call_security_id', 'put_security_id']
+        ].astype('Int64')
+        return result
+    
+    def attach_security_ids(self, option_chain: pd.DataFrame, symbol: str, expiry) -> pd.DataFrame:
+        """
+        Add call_security_id/put_security_id columns to an option chain.
+        
+        Args:
+            option_chain: Chain DataFrame with a 'strike' column
+            symbol: "NIFTY" or "BANKNIFTY"
+            expiry: Expiry date ("YYYY-MM-DD", date or Timestamp)
+        
+        Returns:
+            The same DataFrame with the ID columns added in place
+        """
+        if option_chain is None or option_chain.empty or 'strike' not in option_chain.columns:
+            return option_chain
+        
+        try:
+            resolved = self.resolve_chain(symbol, expiry, option_chain['strike'])
+            option_chain['call_security_id'] = resolved['call_security_id'].array
+            option_chain['put_security_id'] = resolved['put_security_id'].array
+            
+            missing = int(resolved['call_security_id'].isna().sum() + resolved['put_security_id'].isna().sum())
+            if missing:
+                log.warning(f"⚠️ {missing} option contracts unresolved for {symbol} {expiry}")
+        except Exception as e:
+            log.error(f"❌ Error resolving option chain security IDs: {e}")
+        
+        return option_chain
+    
     def get_option_security_id(
         self,
         symbol: str,
@@ -96,13 +334,19 @@ class SecurityMaster:
             expiry_date = datetime.strptime(expiry, "%Y-%m-%d")
             expiry_formatted = expiry_date.strftime("%d %b").upper()  # "28 OCT"
 
+            # Fast path: hash probe on the structured index
+            security_id = self.lookup_option(symbol, strike, option_type_str, expiry_date.date())
+            if security_id is not None:
+                log.info(f"✅ Found security ID: {security_id} for {symbol} {expiry_formatted} {strike} {option_type_str}")
+                return security_id
+
             # ===== FIX: Ensure strike is integer (no decimal) =====
             strike_int = int(float(strike))  # Converts 26200.0 → 26200
 
             # Build search string: "NIFTY 28 OCT 30150 CALL"
             search_string = f"{symbol} {expiry_formatted} {strike_int} {option_type_str}"
 
-            log.info(f"🔍 Searching for: {search_string}")
+            log.info(f"🔍 Index miss, searching for: {search_string}")
 
             # Search in SEM_CUSTOM_SYMBOL column
             if 'SEM_CUSTOM_SYMBOL' not in self.df.columns:
@@ -110,9 +354,10 @@ class SecurityMaster:
                 log.error(f"Available columns: {list(self.df.columns)}")
                 return None
 
-            # Case-insensitive search
-            mask = self.df['SEM_CUSTOM_SYMBOL'].str.upper() == search_string.upper()
-            matches = self.df[mask]
+            # Case-insensitive search over the underlying's partitions only
+            candidates = self.get_partition(underlying=symbol) if self._partitions else self.df
+            mask = candidates['SEM_CUSTOM_SYMBOL'].str.upper() == search_string.upper()
+            matches = candidates[mask]
 
             if len(matches) == 0:
                 log.warning(f"⚠️ No match found for: {search_string}")
@@ -123,13 +368,11 @@ class SecurityMaster:
                 log.info(f"   Converted to: {strike_int} (type: {type(strike_int)})")
 
                 # Try to find similar entries
-                symbol_mask = self.df['SEM_CUSTOM_SYMBOL'].str.contains(symbol, case=False, na=False)
-                expiry_mask = self.df['SEM_CUSTOM_SYMBOL'].str.contains(expiry_formatted, case=False, na=False)
-                similar = self.df[symbol_mask & expiry_mask]['SEM_CUSTOM_SYMBOL'].head(10).tolist()
+                similar = self.suggest_symbols(search_string, limit=5)
 
                 if similar:
-                    log.info(f"   Similar options in CSV for {symbol} {expiry_formatted}:")
-                    for opt in similar[:5]:
+                    log.info(f"   Did you mean:")
+                    for opt in similar:
                         log.info(f"      - {opt}")
 
                 return None
@@ -167,21 +410,113 @@ class SecurityMaster:
             return pd.DataFrame()
         
         try:
-            mask = self.df['SEM_CUSTOM_SYMBOL'].str.contains(symbol, case=False, na=False)
-            
+            # "NIFTY 28 OCT ..." - prefix lookup on the sorted symbol index
+            prefix = f"{symbol} "
             if expiry:
                 expiry_date = datetime.strptime(expiry, "%Y-%m-%d")
-                expiry_formatted = expiry_date.strftime("%d %b").upper()
-                mask &= self.df['SEM_CUSTOM_SYMBOL'].str.contains(expiry_formatted, case=False, na=False)
+                prefix += expiry_date.strftime("%d %b ").upper()
             
-            results = self.df[mask].head(limit)
+            results = self.search_index.prefix_frame(prefix, limit)
             return results[['SEM_CUSTOM_SYMBOL', 'SEM_SMST_SECURITY_ID']]
             
         except Exception as e:
             log.error(f"Error searching options: {e}")
             return pd.DataFrame()
+    
+    def search_instruments(self, query: str, limit: int = 20, offset: int = 0) -> Dict:
+        """
+        Paginated typeahead search over SEM_CUSTOM_SYMBOL.
+        
+        Args:
+            query: Search text (prefix, or approximate symbol)
+            limit: Page size
+            offset: Results to skip
+        
+        Returns:
+            Dict with query, match, total, offset, limit and results
+        """
+        if self.search_index is None:
+            return {"query": query, "match": "prefix", "total": 0, "offset": offset, "limit": limit, "results": []}
+        return self.search_index.search(query, limit, offset)
+    
+    def suggest_symbols(self, query: str, limit: int = 5) -> list:
+        """
+        Get "did you mean" suggestions for an unknown symbol.
+        
+        Args:
+            query: Symbol text
+            limit: Max suggestions
+        
+        Returns:
+            List of similar SEM_CUSTOM_SYMBOL values
+        """
+        if self.search_index is None:
+            return []
+        return self.search_index.suggest(query, limit)
 
 
+    def _build_futures_calendar(self):
+        """
+        Build a sorted futures expiry table per underlying.
+        
+        Each entry holds an int64 array of expiry timestamps (ns, ascending) and
+        the matching contract records, so current/next queries are a binary search.
+        """
+        self._futures_calendar = {}
+        
+        if self.df is None or 'underlying' not in self.df.columns or 'SEM_EXPIRY_DATE' not in self.df.columns:
+            return
+        
+        start = time.perf_counter()
+        
+        # Futures rows ("NIFTY NOV FUT") carry an underlying but no option type
+        is_future = self.df['underlying'].notna() & self.df['option_type'].isna() & self.df['expiry'].notna()
+        rows = self.df[is_future]
+        futures = pd.DataFrame({
+            'underlying': rows['underlying'].astype('str'),
+            'expiry': rows['expiry'],
+            'security_id': rows['SEM_SMST_SECURITY_ID'],
+            'contract_name': rows['SEM_CUSTOM_SYMBOL'],
+            'expiry_str': rows['SEM_EXPIRY_DATE'],
+        })
+        futures = futures.sort_values(['underlying', 'expiry'], kind='stable')
+        
+        for name, group in futures.groupby('underlying', sort=False):
+            records = [
+                {
+                    'security_id': int(row.security_id),
+                    'contract_name': row.contract_name,
+                    'expiry_date': row.expiry.to_pydatetime(),
+                    'expiry_str': row.expiry_str,
+                }
+                for row in group.itertuples(index=False)
+            ]
+            self._futures_calendar[name] = (group['expiry'].to_numpy(dtype='datetime64[ns]').astype('int64'), records)
+        
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        log.info(f"📅 Built futures calendar for {len(self._futures_calendar)} underlyings in {elapsed_ms:.1f} ms")
+    
+    def _futures_after(self, symbol: str, after: datetime) -> Optional[Dict]:
+        """
+        Binary search the futures calendar for the first contract expiring after a time.
+        
+        Args:
+            symbol: Underlying, e.g. "NIFTY"
+            after: Reference datetime
+        
+        Returns:
+            Copy of the contract record, or None
+        """
+        entry = self._futures_calendar.get(symbol.upper())
+        if entry is None:
+            return None
+        
+        expiries, records = entry
+        position = int(np.searchsorted(expiries, pd.Timestamp(after).value, side='right'))
+        if position >= len(records):
+            return None
+        return dict(records[position])
+    
     def get_current_futures_contract(
         self,
         symbol: str
@@ -201,58 +536,12 @@ class SecurityMaster:
             return None
 
         try:
-            now = datetime.now()
+            current_contract = self._futures_after(symbol, datetime.now())
 
-            # Search for futures contracts
-            # Pattern: "NIFTY NOV FUT", "BANKNIFTY DEC FUT", etc.
-            mask = (
-                self.df['SEM_CUSTOM_SYMBOL'].str.contains(symbol, case=False, na=False) &
-                self.df['SEM_CUSTOM_SYMBOL'].str.contains('FUT', case=False, na=False)
-            )
-
-            futures_contracts = self.df[mask].copy()
-
-            if futures_contracts.empty:
-                log.error(f"❌ No futures contracts found for {symbol}")
-                return None
-
-            log.info(f"📊 Found {len(futures_contracts)} {symbol} futures contracts")
-
-            # Parse expiry dates and filter non-expired
-            valid_contracts = []
-
-            for idx, row in futures_contracts.iterrows():
-                expiry_str = row.get('SEM_EXPIRY_DATE', '')
-
-                if not expiry_str or pd.isna(expiry_str):
-                    continue
-
-                try:
-                    # Parse expiry date: '25/11/25 14:30' -> datetime
-                    expiry_date = datetime.strptime(str(expiry_str), '%d/%m/%y %H:%M')
-
-                    # Only consider non-expired contracts
-                    if expiry_date > now:
-                        valid_contracts.append({
-                            'security_id': int(row['SEM_SMST_SECURITY_ID']),
-                            'contract_name': row['SEM_CUSTOM_SYMBOL'],
-                            'expiry_date': expiry_date,
-                            'expiry_str': expiry_str
-                        })
-                except Exception as e:
-                    log.debug(f"Could not parse expiry for {row.get('SEM_CUSTOM_SYMBOL')}: {e}")
-                    continue
-
-            if not valid_contracts:
+            if current_contract is None:
                 log.error(f"❌ No valid (non-expired) futures contracts found for {symbol}")
                 return None
 
-            # Sort by expiry date (nearest first)
-            valid_contracts.sort(key=lambda x: x['expiry_date'])
-
-            # Return nearest expiry contract (current month)
-            current_contract = valid_contracts[0]
-
             log.info(f"✅ Current {symbol} futures contract:")
             log.info(f"   Name: {current_contract['contract_name']}")
             log.info(f"   Security ID: {current_contract['security_id']}")
@@ -293,44 +582,12 @@ class SecurityMaster:
             return None
 
         try:
-            # Search for futures contracts after current expiry
-            mask = (
-                self.df['SEM_CUSTOM_SYMBOL'].str.contains(symbol, case=False, na=False) &
-                self.df['SEM_CUSTOM_SYMBOL'].str.contains('FUT', case=False, na=False)
-            )
-
-            futures_contracts = self.df[mask].copy()
-
-            next_contracts = []
-
-            for idx, row in futures_contracts.iterrows():
-                expiry_str = row.get('SEM_EXPIRY_DATE', '')
-
-                if not expiry_str or pd.isna(expiry_str):
-                    continue
-
-                try:
-                    expiry_date = datetime.strptime(str(expiry_str), '%d/%m/%y %H:%M')
+            next_contract = self._futures_after(symbol, current_expiry)
 
-                    # Only contracts that expire after current
-                    if expiry_date > current_expiry:
-                        next_contracts.append({
-                            'security_id': int(row['SEM_SMST_SECURITY_ID']),
-                            'contract_name': row['SEM_CUSTOM_SYMBOL'],
-                            'expiry_date': expiry_date,
-                            'expiry_str': expiry_str
-                        })
-                except Exception as e:
-                    continue
-
-            if not next_contracts:
+            if next_contract is None:
                 log.warning(f"⚠️ No next futures contract found for {symbol}")
                 return None
 
-            # Sort and return nearest
-            next_contracts.sort(key=lambda x: x['expiry_date'])
-            next_contract = next_contracts[0]
-
             log.info(f"📅 Next {symbol} futures contract:")
             log.info(f"   Name: {next_contract['contract_name']}")
             log.info(f"   Expiry: {next_contract['expiry_date'].strftime('%d-%b-%Y')}")
@@ -341,8 +598,300 @@ class SecurityMaster:
             log.error(f"Error finding next futures contract: {e}")
             return None
 
+    def get_rollover_contract(self, symbol: str, rollover_days: float, now: datetime = None) -> Optional[Dict]:
+        """
+        Get the futures contract that should be traded, rolling over before expiry.
+
+        Args:
+            symbol: "NIFTY" or "BANKNIFTY"
+            rollover_days: Switch to the next contract this many days before expiry
+            now: Reference time (defaults to now)
+
+        Returns:
+            Dict with contract details, or None
+        """
+        now = now or datetime.now()
+        current = self._futures_after(symbol, now)
+        if current is None:
+            return None
+
+        if current['expiry_date'] - now <= timedelta(days=rollover_days):
+            return self._futures_after(symbol, current['expiry_date']) or current
+        return current
+
+    def apply_futures_rollover(self, rollover_days: float = None, now: datetime = None) -> Dict[str, Dict]:
+        """
+        Point NIFTY_CONFIG/BANKNIFTY_CONFIG at the contract to trade.
+
+        Args:
+            rollover_days: Days before expiry to roll (defaults to Config.FUTURES_ROLLOVER_DAYS)
+            now: Reference time (defaults to now)
+
+        Returns:
+            Dict of symbol -> contract for every config that changed
+        """
+        from src.config import Config
+
+        if rollover_days is None:
+            rollover_days = Config.FUTURES_ROLLOVER_DAYS
+
+        changed = {}
+        for instrument in (Config.NIFTY_CONFIG, Config.BANKNIFTY_CONFIG):
+            symbol = instrument["symbol"]
+            contract = self.get_rollover_contract(symbol, rollover_days, now)
+            if contract is None:
+                continue
+
+            if instrument["futures_security_id"] != contract['security_id']:
+                log.info(
+                    f"🔄 Rolling {symbol} futures {instrument['futures_security_id']} → "
+                    f"{contract['security_id']} ({contract['contract_name']})"
+                )
+                instrument["futures_security_id"] = contract['security_id']
+                changed[symbol] = contract
+
+        return changed
+
+
+class LazySecurityMaster:
+    """
+    Proxy that loads the SecurityMaster in a background thread.
+    
+    Attribute access is delegated to the loaded SecurityMaster; callers on the
+    asyncio loop should `await wait_ready()` first so they never block on the load.
+    """
+    
+    def __init__(self, csv_path: str = None, segments: Optional[Iterable[str]] = None):
+        """
+        Initialize the proxy without loading anything.
+        
+        Args:
+            csv_path: Optional path to api-scrip-master.csv
+            segments: Exchange segments to keep (defaults to Config.SECURITY_MASTER_SEGMENTS)
+        """
+        self._csv_path = csv_path
+        self._segments = segments
+        self._master: Optional[SecurityMaster] = None
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._state = "idle"
+        self._error: Optional[str] = None
+        self._started_at: Optional[datetime] = None
+        self._duration: Optional[float] = None
+    
+    @property
+    def is_ready(self) -> bool:
+        """True once the master has loaded successfully."""
+        return self._state == "ready"
+    
+    def start_background_load(self) -> threading.Thread:
+        """
+        Start loading the master in a daemon thread (idempotent).
+        
+        Returns:
+            The loader thread
+        """
+        with self._lock:
+            if self._thread is None:
+                self._state = "loading"
+                self._started_at = datetime.now()
+                self._thread = threading.Thread(
+                    target=self._load,
+                    name="SecurityMasterLoader",
+                    daemon=True
+                )
+                self._thread.start()
+            return self._thread
+    
+    def _resolve_segments(self) -> Optional[list]:
+        """Segments to keep: explicit argument, else the configured list (empty keeps all)."""
+        if self._segments is not None:
+            return list(self._segments) or None
+        
+        from src.config import Config
+        configured = [seg.strip() for seg in Config.SECURITY_MASTER_SEGMENTS.split(',') if seg.strip()]
+        return configured or None
+    
+    def _load(self):
+        """Load the master and record the outcome."""
+        start = time.perf_counter()
+        try:
+            master = SecurityMaster(self._csv_path, segments=self._resolve_segments())
+            self._master = master
+            self._state = "ready" if master.df is not None else "failed"
+            if master.df is None:
+                self._error = f"Security master file not loaded: {master.csv_path}"
+        except Exception as e:
+            self._state = "failed"
+            self._error = str(e)
+            log.error(f"❌ Security master load failed: {e}")
+        finally:
+            self._duration = time.perf_counter() - start
+            self._ready.set()
+            log.info(f"🗃️ Security master {self._state} in {self._duration:.2f}s")
+    
+    def ensure_loaded(self, timeout: Optional[float] = None) -> Optional[SecurityMaster]:
+        """
+        Block until the master is loaded, starting the load if needed.
+        
+        Args:
+            timeout: Max seconds to wait (None waits indefinitely)
+        
+        Returns:
+            The loaded SecurityMaster, or None on timeout
+        """
+        self.start_background_load()
+        self._ready.wait(timeout)
+        return self._master
+    
+    async def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        """
+        Await the background load without blocking the event loop.
+        
+        Args:
+            timeout: Max seconds to wait (None waits indefinitely)
+        
+        Returns:
+            True if the master is ready
+        """
+        self.start_background_load()
+        if not self._ready.is_set():
+            await asyncio.to_thread(self._ready.wait, timeout)
+        return self.is_ready
+    
+    def status(self) -> Dict:
+        """
+        Get load state for health reporting.
+        
+        Returns:
+            Dict with state, duration, start time, error and record count
+        """
+        master = self._master
+        return {
+            "state": self._state,
+            "segments": master.segments if master is not None else None,
+            "load_seconds": round(self._duration, 3) if self._duration is not None else None,
+            "started_at": self._started_at.isoformat() if self._started_at else None,
+            "error": self._error,
+            "records": len(master.df) if master is not None and master.df is not None else 0,
+        }
+    
+    @property
+    def version(self) -> Optional[str]:
+        """Scrip master version recorded with the local snapshot."""
+        master = self.ensure_loaded()
+        return snapshot_version(master.csv_path) if master is not None else None
+    
+    def _swap(self, master: SecurityMaster):
+        """Atomically replace the served SecurityMaster."""
+        with self._lock:
+            self._master = master
+            self._state = "ready" if master.df is not None else "failed"
+    
+    def apply_delta(self, delta: Dict) -> bool:
+        """
+        Apply a scrip master delta and hot-swap the in-memory index.
+        
+        Readers keep using the previous SecurityMaster until the new one is
+        fully built, then see the new one on their next attribute access.
+        
+        Args:
+            delta: Delta from licensing_client.download_scrip_master_delta
+        
+        Returns:
+            True if the delta was applied
+        """
+        try:
+            current = self.ensure_loaded()
+            if current is None or current.df is None:
+                log.error("❌ Cannot apply delta: security master not loaded")
+                return False
+            
+            start = time.perf_counter()
+            patched = apply_scrip_master_delta(current.df, delta)
+            updated = SecurityMaster(current.csv_path, df=patched, segments=current.segments)
+            self._swap(updated)
+            
+            # A segment-filtered frame must not replace the full snapshot; the
+            # delta is re-applied on the next start instead
+            if current.segments is None:
+                write_snapshot(current.csv_path, patched, delta.get("to_version"))
+            
+            log.info(
+                f"🔁 Applied scrip master delta {delta.get('from_version')} → {delta.get('to_version')} "
+                f"(+{len(delta.get('added') or [])} ~{len(delta.get('changed') or [])} "
+                f"-{len(delta.get('removed') or [])}) in {time.perf_counter() - start:.2f}s"
+            )
+            return True
+        except Exception as e:
+            log.error(f"❌ Failed to apply scrip master delta: {e}")
+            import traceback
+            log.error(traceback.format_exc())
+            return False
+    
+    def reload(self) -> bool:
+        """
+        Re-read the scrip master from disk and hot-swap it.
+        
+        Returns:
+            True if the new master loaded
+        """
+        current = self.ensure_loaded()
+        csv_path = current.csv_path if current is not None else self._csv_path
+        updated = SecurityMaster(csv_path, segments=self._resolve_segments())
+        if updated.df is None:
+            return False
+        self._swap(updated)
+        return True
+    
+    def check_for_updates(self) -> Dict:
+        """
+        Bring the scrip master up to the server's version.
+        
+        Applies a delta when the local version is known and the server has one,
+        otherwise downloads the full CSV and reloads.
+        
+        Returns:
+            Dict with 'updated', 'mode' and 'version'
+        """
+        from src.utils.licensing_client import licensing_client
+        
+        update = licensing_client.check_scrip_master_update()
+        target = update.get("version")
+        current_version = self.version
+        
+        if not target or not update.get("has_update") or target == current_version:
+            return {"updated": False, "version": current_version}
+        
+        if current_version:
+            delta = licensing_client.download_scrip_master_delta(current_version, target)
+            if delta is not None and self.apply_delta(delta):
+                return {"updated": True, "mode": "delta", "version": target}
+        
+        master = self.ensure_loaded()
+        if master is not None and licensing_client.download_scrip_master(target, str(master.csv_path)):
+            if self.reload():
+                return {"updated": True, "mode": "full", "version": target}
+        
+        return {"updated": False, "version": current_version}
+    
+    def __getattr__(self, name):
+        """
+        Delegate to the loaded SecurityMaster (loads synchronously if needed).
+        
+        Raises:
+            RuntimeError: If building the SecurityMaster raised (carries the load error)
+        """
+        if name.startswith('__'):
+            raise AttributeError(name)
+        master = self.ensure_loaded()
+        if master is None:
+            raise RuntimeError(f"Security master unavailable ({self._state}): {self._error}")
+        return getattr(master, name)
+
 
-# Global instance
-security_master = SecurityMaster()
+# Global instance (loaded on first use or via start_background_load)
+security_master = LazySecurityMaster()
 
 
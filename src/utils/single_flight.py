@@ -0,0 +1,115 @@
+"""Coalesce concurrent identical requests into one in-flight call."""
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+from src.utils.logger import log
+
+
+class SingleFlight:
+    """
+    Duplicate-call suppression keyed by request.
+
+    The first caller for a key runs the request; callers that arrive while
+    it is in flight wait for the same result instead of issuing their own.
+    In-flight calls are tracked with thread-safe futures, so coalescing
+    works across threads, across event loops and between sync and async
+    callers.
+    """
+
+    def __init__(self, name: str = "single_flight"):
+        """
+        Initialize the group.
+
+        Args:
+            name: Label used in logs
+        """
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, Future] = {}
+        self.leaders = 0
+        self.joined = 0
+
+    def _join_or_lead(self, key: Hashable) -> Tuple[Future, bool]:
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                self.joined += 1
+                return future, False
+            future = Future()
+            self._calls[key] = future
+            self.leaders += 1
+            return future, True
+
+    def _finish(self, key: Hashable, future: Future, result: Any = None, error: Optional[BaseException] = None):
+        with self._lock:
+            self._calls.pop(key, None)
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    @staticmethod
+    def _share(result, copy_result: Optional[Callable[[Any], Any]]):
+        return copy_result(result) if copy_result is not None else result
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]],
+                 copy_result: Optional[Callable[[Any], Any]] = None) -> Any:
+        """
+        Run an async request once per key at a time.
+
+        Args:
+            key: Request identity
+            fn: Zero-argument coroutine function performing the request
+            copy_result: Applied to the result handed to joiners (e.g. DataFrame.copy)
+
+        Returns:
+            The request's result
+        """
+        future, leader = self._join_or_lead(key)
+        if not leader:
+            log.debug(f"🔗 {self.name}: joined in-flight {key}")
+            return self._share(await asyncio.wrap_future(future), copy_result)
+
+        try:
+            result = await fn()
+        except BaseException as e:
+            self._finish(key, future, error=e)
+            raise
+        self._finish(key, future, result)
+        return result
+
+    def do_sync(self, key: Hashable, fn: Callable[[], Any],
+                copy_result: Optional[Callable[[Any], Any]] = None) -> Any:
+        """
+        Run a blocking request once per key at a time.
+
+        Args:
+            key: Request identity
+            fn: Zero-argument function performing the request
+            copy_result: Applied to the result handed to joiners
+
+        Returns:
+            The request's result
+        """
+        future, leader = self._join_or_lead(key)
+        if not leader:
+            log.debug(f"🔗 {self.name}: joined in-flight {key}")
+            return self._share(future.result(), copy_result)
+
+        try:
+            result = fn()
+        except BaseException as e:
+            self._finish(key, future, error=e)
+            raise
+        self._finish(key, future, result)
+        return result
+
+    def in_flight(self) -> int:
+        """Number of requests currently running."""
+        with self._lock:
+            return len(self._calls)
+
+    def stats(self) -> Dict[str, int]:
+        """Leader/joiner counters."""
+        return {"leaders": self.leaders, "joined": self.joined, "in_flight": self.in_flight()}
@@ -0,0 +1,196 @@
+"""Runtime management of the live feed's instrument subscriptions."""
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+import numpy as np
+from dhanhq import MarketFeed
+from src.utils.logger import log
+
+# (exchange code, security id, feed request code) as MarketFeed expects
+Instrument = Tuple[int, str, int]
+
+
+# Dhan API segment names -> MarketFeed exchange codes
+FEED_EXCHANGES = {
+    "IDX_I": MarketFeed.IDX,
+    "NSE_EQ": MarketFeed.NSE,
+    "NSE_FNO": MarketFeed.NSE_FNO,
+    "NSE_CURRENCY": MarketFeed.NSE_CURR,
+    "BSE_EQ": MarketFeed.BSE,
+    "BSE_FNO": MarketFeed.BSE_FNO,
+    "BSE_CURRENCY": MarketFeed.BSE_CURR,
+    "MCX_COMM": MarketFeed.MCX,
+}
+
+
+def feed_exchange(exchange_segment: str) -> int:
+    """
+    MarketFeed exchange code for a segment name such as "NSE_FNO".
+
+    Raises:
+        ValueError: For a segment the feed has no code for
+    """
+    try:
+        return FEED_EXCHANGES[exchange_segment]
+    except KeyError:
+        raise ValueError(f"No market feed exchange for segment {exchange_segment!r}") from None
+
+
+def make_instrument(exchange_segment: str, security_id, mode: int = MarketFeed.Quote) -> Instrument:
+    """Normalized feed instrument (string security IDs, so tuples compare equal)."""
+    return (feed_exchange(exchange_segment), str(int(security_id)), mode)
+
+
+def atm_window(strikes: np.ndarray, spot: float, each_side: int) -> Tuple[int, np.ndarray]:
+    """
+    Strikes around the money.
+
+    Args:
+        strikes: Sorted listed strikes
+        spot: Underlying price
+        each_side: Strikes to include above and below the ATM strike
+
+    Returns:
+        (ATM index into strikes, strikes in the ATM +/- each_side window)
+    """
+    atm = int(np.argmin(np.abs(strikes - spot)))
+    return atm, strikes[max(0, atm - each_side): atm + each_side + 1]
+
+
+class SubscriptionManager:
+    """
+    Keeps the feed subscribed to what the system currently cares about.
+
+    Instruments are kept in named groups (e.g. "futures", "options",
+    "positions"). sync() diffs the union of all groups against what is
+    subscribed and applies the difference as one unsubscribe and one
+    subscribe request (MarketFeed splits them into 100-instrument
+    messages), starting the feed if it is not running yet.
+    """
+
+    def __init__(
+        self,
+        start_feed: Callable[[List[Instrument]], bool],
+        update_feed: Callable[[List[Instrument], List[Instrument]], bool],
+        is_running: Callable[[], bool],
+        strikes_each_side: int = 5,
+        recenter_strikes: int = 1,
+        option_mode: int = MarketFeed.Quote,
+    ):
+        """
+        Initialize the manager.
+
+        Args:
+            start_feed: Starts the feed with an initial instrument list
+            update_feed: Applies (subscribe, unsubscribe) lists to the running feed
+            is_running: Whether the feed is running
+            strikes_each_side: Option strikes kept above and below ATM
+            recenter_strikes: ATM strike moves tolerated before the window is re-centred
+            option_mode: Feed request code for option contracts
+        """
+        self.start_feed = start_feed
+        self.update_feed = update_feed
+        self.is_running = is_running
+        self.strikes_each_side = strikes_each_side
+        self.recenter_strikes = recenter_strikes
+        self.option_mode = option_mode
+        self._groups: Dict[str, Set[Instrument]] = {}
+        self._subscribed: Set[Instrument] = set()
+        self._center: Optional[Tuple[str, str, float]] = None
+        self._lock = threading.Lock()
+        self.recenters = 0
+        self.subscribe_requests = 0
+        self.unsubscribe_requests = 0
+
+    def set_group(self, name: str, instruments: Iterable[Instrument]):
+        """
+        Replace a group's instruments (applied on the next sync).
+
+        Args:
+            name: Group name
+            instruments: Feed instruments (see make_instrument)
+        """
+        with self._lock:
+            self._groups[name] = set(instruments)
+
+    def recenter_options(self, symbol: str, expiry: str, spot: float, strikes: np.ndarray,
+                         resolve: Callable[[str, str, np.ndarray], Iterable[int]]) -> bool:
+        """
+        Point the "options" group at ATM +/- strikes_each_side calls and puts.
+
+        The window moves only once the ATM strike is more than
+        recenter_strikes strikes away from the current centre, so spot
+        oscillating around a strike midpoint does not churn subscriptions.
+
+        Args:
+            symbol: Underlying symbol
+            expiry: Expiry whose contracts are streamed
+            spot: Underlying price
+            strikes: Sorted listed strikes for the expiry
+            resolve: (symbol, expiry, strikes) -> option security IDs (calls and puts)
+
+        Returns:
+            True if the window moved
+        """
+        if not spot or len(strikes) == 0:
+            return False
+
+        atm, window = atm_window(strikes, spot, self.strikes_each_side)
+        if self._center is not None and self._center[:2] == (symbol, expiry):
+            centre_index = int(np.searchsorted(strikes, self._center[2]))
+            if abs(atm - centre_index) <= self.recenter_strikes:
+                return False
+
+        ids = resolve(symbol, expiry, window)
+        self.set_group("options", [make_instrument("NSE_FNO", sid, self.option_mode) for sid in ids])
+        self._center = (symbol, expiry, float(strikes[atm]))
+        self.recenters += 1
+        log.info(f"🎯 Option feed centred on {symbol} {expiry} {strikes[atm]:.0f} ({len(window)} strikes)")
+        return True
+
+    def sync(self) -> Dict[str, int]:
+        """
+        Apply pending group changes to the feed.
+
+        Returns:
+            Counts of instruments subscribed and unsubscribed
+        """
+        with self._lock:
+            desired = set().union(*self._groups.values()) if self._groups else set()
+            if not self.is_running():
+                if not desired:
+                    return {"subscribed": 0, "unsubscribed": 0}
+                if not self.start_feed(sorted(desired)):
+                    return {"subscribed": 0, "unsubscribed": 0}
+                self._subscribed = desired
+                self.subscribe_requests += 1
+                return {"subscribed": len(desired), "unsubscribed": 0}
+
+            add = sorted(desired - self._subscribed)
+            remove = sorted(self._subscribed - desired)
+            if not add and not remove:
+                return {"subscribed": 0, "unsubscribed": 0}
+            if not self.update_feed(add, remove):
+                return {"subscribed": 0, "unsubscribed": 0}
+
+            self._subscribed = desired
+            self.subscribe_requests += bool(add)
+            self.unsubscribe_requests += bool(remove)
+        log.info(f"📡 Feed subscriptions: +{len(add)} -{len(remove)} ({len(desired)} total)")
+        return {"subscribed": len(add), "unsubscribed": len(remove)}
+
+    def subscribed(self) -> Set[Instrument]:
+        """Instruments currently subscribed."""
+        with self._lock:
+            return set(self._subscribed)
+
+    def metrics(self) -> Dict:
+        """Group sizes and request counters."""
+        with self._lock:
+            return {
+                "groups": {name: len(instruments) for name, instruments in self._groups.items()},
+                "subscribed": len(self._subscribed),
+                "option_center": self._center[2] if self._center else None,
+                "recenters": self.recenters,
+                "subscribe_requests": self.subscribe_requests,
+                "unsubscribe_requests": self.unsubscribe_requests,
+            }
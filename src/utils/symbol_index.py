@@ -0,0 +1,211 @@
+"""Prefix and trigram search over scrip master symbols."""
+import time
+import threading
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional, Tuple
+from src.utils.logger import log
+
+# Columns returned with each search hit (when present in the frame)
+RESULT_COLUMNS = [
+    'SEM_CUSTOM_SYMBOL',
+    'SEM_SMST_SECURITY_ID',
+    'SEM_EXM_EXCH_ID',
+    'SEM_SEGMENT',
+    'SEM_INSTRUMENT_NAME',
+    'SEM_EXPIRY_DATE',
+]
+
+# Upper bound on ranked fuzzy candidates (typeahead never pages this deep)
+MAX_FUZZY_RESULTS = 500
+
+
+def _trigram_codes(text: str) -> List[int]:
+    """Encode the unique overlapping 3-character grams of text as int64 codes."""
+    points = [ord(ch) for ch in text]
+    codes = ((points[i] << 42) | (points[i + 1] << 21) | points[i + 2] for i in range(len(points) - 2))
+    return list(dict.fromkeys(codes))
+
+
+class SymbolSearchIndex:
+    """
+    Search index over SEM_CUSTOM_SYMBOL.
+
+    Prefix queries binary-search a sorted array of upper-cased symbols.
+    Substring/typo queries ("did you mean") rank rows by shared trigrams;
+    the trigram postings are built lazily on first use.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        """
+        Build the prefix index.
+
+        Args:
+            df: Scrip master frame with SEM_CUSTOM_SYMBOL
+        """
+        start = time.perf_counter()
+
+        self._rows = df[[c for c in RESULT_COLUMNS if c in df.columns]].reset_index(drop=True)
+        self._keys = self._rows['SEM_CUSTOM_SYMBOL'].astype('str').str.strip().str.upper().to_numpy(dtype='U')
+        self._columns = {name: self._rows[name].to_numpy(dtype=object) for name in self._rows.columns}
+        self._order = np.argsort(self._keys, kind='stable')
+        self._sorted = self._keys[self._order]
+
+        self._postings: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]] = None
+        self._postings_lock = threading.Lock()
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        log.info(f"🔎 Built symbol prefix index for {len(self._keys)} instruments in {elapsed_ms:.1f} ms")
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def _prefix_positions(self, prefix: str) -> np.ndarray:
+        """Row positions whose symbol starts with prefix, in alphabetical order."""
+        lo = np.searchsorted(self._sorted, prefix, side='left')
+        hi = np.searchsorted(self._sorted, prefix + '\uffff', side='left')
+        return self._order[lo:hi]
+
+    def _build_postings(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Build trigram postings as sorted arrays.
+
+        Symbols are viewed as a (rows, width) matrix of code points, so every
+        trigram of every row is encoded into an int64 in one vectorised pass.
+
+        Returns:
+            (unique trigram codes, start offset per code, row positions grouped by code)
+        """
+        with self._postings_lock:
+            if self._postings is not None:
+                return self._postings
+
+            start = time.perf_counter()
+            width = self._keys.dtype.itemsize // 4
+            if width < 3 or len(self._keys) == 0:
+                self._postings = (np.empty(0, np.int64), np.zeros(1, np.int64), np.empty(0, np.int64))
+                return self._postings
+
+            points = self._keys.view(np.uint32).reshape(len(self._keys), width).astype(np.int64)
+            codes = (points[:, :-2] << 42) | (points[:, 1:-1] << 21) | points[:, 2:]
+            lengths = np.char.str_len(self._keys)
+            valid = np.arange(width - 2)[None, :] < (lengths[:, None] - 2)
+            rows = np.broadcast_to(np.arange(len(self._keys))[:, None], codes.shape)
+
+            flat_codes, flat_rows = codes[valid], rows[valid]
+
+            # Stable sort keeps rows ascending within a code, so repeats are adjacent
+            order = np.argsort(flat_codes, kind='stable')
+            flat_codes, flat_rows = flat_codes[order], flat_rows[order]
+            keep = np.ones(len(flat_codes), dtype=bool)
+            keep[1:] = (flat_codes[1:] != flat_codes[:-1]) | (flat_rows[1:] != flat_rows[:-1])
+            flat_codes, flat_rows = flat_codes[keep], flat_rows[keep]
+
+            grams, starts = np.unique(flat_codes, return_index=True)
+            self._postings = (grams, np.append(starts, len(flat_codes)), flat_rows)
+
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            log.info(f"🔎 Built trigram index ({len(grams)} grams) in {elapsed_ms:.1f} ms")
+            return self._postings
+
+    def _fuzzy_positions(self, query: str, min_similarity: float = 0.5, max_results: int = MAX_FUZZY_RESULTS) -> np.ndarray:
+        """Row positions ranked by trigram overlap with the query."""
+        grams = _trigram_codes(query)
+        if not grams:
+            return np.empty(0, dtype=np.int64)
+
+        codes, starts, postings = self._build_postings()
+        slots = np.searchsorted(codes, grams)
+        hits = [
+            postings[starts[slot]:starts[slot + 1]]
+            for slot, gram in zip(slots, grams)
+            if slot < len(codes) and codes[slot] == gram
+        ]
+        if not hits:
+            return np.empty(0, dtype=np.int64)
+
+        scores = np.bincount(np.concatenate(hits), minlength=len(self._keys))
+        candidates = np.flatnonzero(scores >= max(1, int(np.ceil(len(grams) * min_similarity))))
+        if candidates.size == 0:
+            return candidates
+
+        # Keep only the best-scoring band before the full ordering
+        if candidates.size > max_results:
+            cutoff = np.partition(scores[candidates], -max_results)[-max_results]
+            candidates = candidates[scores[candidates] >= cutoff]
+
+        # Most shared trigrams first, then closest length, then alphabetical
+        length_gap = np.abs(np.char.str_len(self._keys[candidates]) - len(query))
+        ranking = np.lexsort((self._keys[candidates], length_gap, -scores[candidates]))
+        return candidates[ranking]
+
+    def _records(self, positions: np.ndarray) -> List[Dict]:
+        """Convert row positions into result dicts."""
+        if len(positions) == 0:
+            return []
+        columns = {name: values[positions].tolist() for name, values in self._columns.items()}
+        return [
+            {name: (None if pd.isna(value) else value) for name, value in zip(columns, values)}
+            for values in zip(*columns.values())
+        ]
+
+    def prefix_frame(self, prefix: str, limit: Optional[int] = None) -> pd.DataFrame:
+        """
+        Get rows whose symbol starts with a prefix.
+
+        Args:
+            prefix: Case-insensitive symbol prefix
+            limit: Max rows (None for all)
+
+        Returns:
+            DataFrame of matching rows in alphabetical order
+        """
+        positions = self._prefix_positions(prefix.strip().upper())
+        if limit is not None:
+            positions = positions[:limit]
+        return self._rows.iloc[positions]
+
+    def search(self, query: str, limit: int = 20, offset: int = 0) -> Dict:
+        """
+        Paginated search over prefix matches, or trigram matches when no symbol has the prefix.
+
+        Args:
+            query: Search text (case-insensitive)
+            limit: Page size
+            offset: Number of results to skip
+
+        Returns:
+            Dict with query, match ("prefix"/"fuzzy"), total, offset, limit and results
+        """
+        text = query.strip().upper()
+        if not text:
+            return {"query": query, "match": "prefix", "total": 0, "offset": offset, "limit": limit, "results": []}
+
+        positions = self._prefix_positions(text)
+        match = "prefix"
+        if len(positions) == 0:
+            positions = self._fuzzy_positions(text)
+            match = "fuzzy"
+
+        return {
+            "query": query,
+            "match": match,
+            "total": int(len(positions)),
+            "offset": offset,
+            "limit": limit,
+            "results": self._records(positions[offset:offset + limit]),
+        }
+
+    def suggest(self, query: str, limit: int = 5) -> List[str]:
+        """
+        "Did you mean" suggestions for a symbol that was not found.
+
+        Args:
+            query: Symbol text
+            limit: Max suggestions
+
+        Returns:
+            List of similar SEM_CUSTOM_SYMBOL values
+        """
+        positions = self._fuzzy_positions(query.strip().upper(), min_similarity=0.3, max_results=limit)[:limit]
+        return self._rows['SEM_CUSTOM_SYMBOL'].iloc[positions].tolist()
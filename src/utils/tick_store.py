@@ -0,0 +1,200 @@
+"""Bounded per-instrument tick history backed by NumPy ring buffers."""
+import time
+import threading
+import numpy as np
+from typing import Dict, Optional, Tuple
+from src.utils.logger import log
+
+# One row per tick; timestamps are epoch seconds
+TICK_DTYPE = np.dtype([
+    ('timestamp', 'f8'),
+    ('ltp', 'f8'),
+    ('volume', 'i8'),
+    ('oi', 'i8'),
+    ('bid', 'f8'),
+    ('ask', 'f8'),
+])
+
+
+def _to_float(value, default=np.nan) -> float:
+    """Parse Dhan feed numbers (sent as formatted strings) to float."""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+class TickRingBuffer:
+    """
+    Preallocated ring buffer of ticks for one security.
+
+    Appends overwrite the oldest row once the buffer is full. Reads via
+    `segments()` are zero-copy views into the buffer: they stay valid only
+    until the writer wraps around, so copy (or use `latest()`) to keep data.
+    """
+
+    def __init__(self, depth: int):
+        """
+        Allocate the buffer.
+
+        Args:
+            depth: Number of ticks retained
+        """
+        if depth <= 0:
+            raise ValueError("depth must be positive")
+        self.depth = depth
+        self._data = np.zeros(depth, dtype=TICK_DTYPE)
+        self._head = 0
+        self._count = 0
+        self.total = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(self, timestamp: float, ltp: float, volume: int = 0, oi: int = 0,
+               bid: float = np.nan, ask: float = np.nan):
+        """Write one tick, dropping the oldest when full."""
+        with self._lock:
+            self._data[self._head] = (timestamp, ltp, volume, oi, bid, ask)
+            self._head = (self._head + 1) % self.depth
+            self._count = min(self._count + 1, self.depth)
+            self.total += 1
+
+    def segments(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Get the buffered ticks as two zero-copy views, oldest first.
+
+        Returns:
+            (older, newer) structured array views; concatenated they are chronological
+        """
+        with self._lock:
+            if self._count < self.depth:
+                return self._data[:self._count], self._data[:0]
+            return self._data[self._head:], self._data[:self._head]
+
+    def latest(self, n: Optional[int] = None) -> np.ndarray:
+        """
+        Copy the most recent ticks in chronological order.
+
+        Args:
+            n: Number of ticks (None for all buffered)
+
+        Returns:
+            Structured array with TICK_DTYPE
+        """
+        older, newer = self.segments()
+        n = len(self) if n is None else min(n, len(self))
+        if n <= len(newer):
+            return newer[len(newer) - n:].copy()
+        return np.concatenate([older[len(older) - (n - len(newer)):], newer])
+
+    def last(self) -> Optional[np.void]:
+        """Get the newest tick, or None if empty."""
+        with self._lock:
+            if self._count == 0:
+                return None
+            return self._data[(self._head - 1) % self.depth].copy()
+
+
+class TickStore:
+    """Ring buffers for every security seen on the market feed."""
+
+    def __init__(self, depth: int = 10000):
+        """
+        Initialize the store.
+
+        Args:
+            depth: Ticks retained per security
+        """
+        self.depth = depth
+        self._buffers: Dict[str, TickRingBuffer] = {}
+        self._state: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    def buffer(self, security_id) -> TickRingBuffer:
+        """Get (or create) the buffer for a security."""
+        key = str(security_id)
+        buffer = self._buffers.get(key)
+        if buffer is None:
+            with self._lock:
+                buffer = self._buffers.get(key)
+                if buffer is None:
+                    buffer = TickRingBuffer(self.depth)
+                    self._buffers[key] = buffer
+        return buffer
+
+    def get(self, security_id) -> Optional[TickRingBuffer]:
+        """Get the buffer for a security if it exists."""
+        return self._buffers.get(str(security_id))
+
+    def securities(self) -> list:
+        """List securities with buffered ticks."""
+        return list(self._buffers)
+
+    def record(self, message: Dict, timestamp: Optional[float] = None) -> bool:
+        """
+        Record a market feed message.
+
+        Quote/ticker/full messages append a tick; OI and depth-only messages
+        update the carried-forward OI/bid/ask used for the next tick.
+
+        Args:
+            message: Dhan MarketFeed message dict
+            timestamp: Receive time in epoch seconds (defaults to now)
+
+        Returns:
+            True if a tick was appended
+        """
+        security_id = str(message.get("security_id", ""))
+        if not security_id:
+            return False
+
+        state = self._state.setdefault(security_id, {"volume": 0, "oi": 0, "bid": np.nan, "ask": np.nan})
+
+        if "OI" in message:
+            state["oi"] = int(_to_float(message["OI"], state["oi"]))
+        if "volume" in message:
+            state["volume"] = int(_to_float(message["volume"], state["volume"]))
+
+        depth = message.get("depth")
+        if depth:
+            best = depth[0]
+            state["bid"] = _to_float(best.get("bid_price"), state["bid"])
+            state["ask"] = _to_float(best.get("ask_price"), state["ask"])
+
+        ltp = _to_float(message.get("LTP"))
+        if np.isnan(ltp):
+            return False
+
+        self.buffer(security_id).append(
+            timestamp if timestamp is not None else time.time(),
+            ltp,
+            state["volume"],
+            state["oi"],
+            state["bid"],
+            state["ask"],
+        )
+        return True
+
+    def discard(self, security_id) -> bool:
+        """
+        Release a security's buffer and carried-forward state.
+
+        Args:
+            security_id: Security ID
+
+        Returns:
+            True if a buffer was released
+        """
+        key = str(security_id)
+        with self._lock:
+            self._state.pop(key, None)
+            return self._buffers.pop(key, None) is not None
+
+    def clear(self):
+        """Drop all buffers."""
+        with self._lock:
+            self._buffers.clear()
+            self._state.clear()
+        log.debug("Tick store cleared")
@@ -0,0 +1,750 @@
+"""Array-based volume profile: candle/bin overlap, POC, value area, HVN and LVN."""
+import math
+import threading
+from collections import OrderedDict, deque
+from datetime import date
+from typing import Deque, Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from src.utils.logger import log
+
+# Dense overlap blocks are kept around this many cells (candles x bins)
+BLOCK_CELLS = 1_000_000
+
+
+def profile_grid(price_min: float, price_max: float) -> Tuple[int, float]:
+    """
+    Bin count and size for a price range (about 10 points per bin, at least 50 bins).
+
+    Returns:
+        (num_bins, bin_size); (0, 0.0) for an empty range
+    """
+    price_range = price_max - price_min
+    if price_range == 0:
+        return 0, 0.0
+    num_bins = max(50, int(price_range / 10))
+    return num_bins, price_range / num_bins
+
+
+def bin_edges(price_min: float, bin_size: float, num_bins: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Lower and upper edge of every bin."""
+    lows = price_min + np.arange(num_bins) * bin_size
+    return lows, lows + bin_size
+
+
+def bin_keys(bin_lows: np.ndarray, bin_highs: np.ndarray) -> Tuple[List[float], np.ndarray]:
+    """
+    Profile keys (bin mid prices rounded to 2 decimals, NumPy rounding) and the bins they map to.
+
+    Very narrow bins can round to the same key; as with a dict keyed by
+    mid price, the key keeps its first position and the last bin wins.
+
+    Returns:
+        (keys, index of the bin behind each key)
+    """
+    index: Dict[float, int] = {}
+    for i, key in enumerate(np.round((bin_lows + bin_highs) / 2, 2).tolist()):
+        index[key] = i
+    return list(index), np.fromiter(index.values(), dtype=np.int64, count=len(index))
+
+
+def empty_state(num_bins: int) -> Dict[str, np.ndarray]:
+    """Zeroed per-bin accumulators."""
+    return {
+        "total": np.zeros(num_bins),
+        "buy": np.zeros(num_bins),
+        "sell": np.zeros(num_bins),
+        "touches": np.zeros(num_bins, dtype=np.int64),
+        "buy_touches": np.zeros(num_bins, dtype=np.int64),
+    }
+
+
+def overlap_volume(
+    bin_lows: np.ndarray,
+    bin_highs: np.ndarray,
+    low: np.ndarray,
+    high: np.ndarray,
+    volume: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Volume each candle puts in each bin (volume * overlap / candle range).
+
+    Returns:
+        (weighted volume, touched mask), both candles x bins
+    """
+    overlap_low = np.maximum(low[:, None], bin_lows)
+    overlap_high = np.minimum(high[:, None], bin_highs)
+    touched = overlap_low < overlap_high
+
+    # A zero-range candle never overlaps a bin, so its share is irrelevant
+    with np.errstate(divide="ignore", invalid="ignore"):
+        share = (overlap_high - overlap_low) / (high - low)[:, None]
+    return np.where(touched, volume[:, None] * share, 0.0), touched
+
+
+def accumulate(
+    bin_lows: np.ndarray,
+    bin_highs: np.ndarray,
+    low: np.ndarray,
+    high: np.ndarray,
+    volume: np.ndarray,
+    bullish: np.ndarray,
+    state: Optional[Dict[str, np.ndarray]] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    Spread candle volume over the bins each candle overlaps.
+
+    Each candle adds volume * overlap / candle range to every bin it
+    overlaps, as buy volume when it closed above its open and sell volume
+    otherwise. Overlaps are broadcast over blocks of candles and summed
+    with a cumulative sum down the candle axis, so every bin adds its
+    candles in order and the floats match a candle-by-candle loop.
+
+    Args:
+        bin_lows: Lower bin edges
+        bin_highs: Upper bin edges
+        low, high, volume: Candle columns
+        bullish: Whether each candle closed above its open
+        state: Accumulators to continue from (see empty_state)
+
+    Returns:
+        Per-bin arrays: total, buy, sell (float64), touches and buy_touches (int64)
+    """
+    num_bins = len(bin_lows)
+    state = state if state is not None else empty_state(num_bins)
+
+    low, high, volume = (np.asarray(a, dtype=np.float64) for a in (low, high, volume))
+    bullish = np.asarray(bullish, dtype=bool)
+    candle_range = high - low
+    rows = max(1, BLOCK_CELLS // max(num_bins, 1))
+
+    for start in range(0, len(low), rows):
+        block = slice(start, start + rows)
+        weighted, touched = overlap_volume(bin_lows, bin_highs, low[block], high[block], volume[block])
+        bull = bullish[block, None]
+
+        state["total"] = _sum_in_order(state["total"], weighted)
+        state["buy"] = _sum_in_order(state["buy"], np.where(bull, weighted, 0.0))
+        state["sell"] = _sum_in_order(state["sell"], np.where(bull, 0.0, weighted))
+        state["touches"] += touched.sum(axis=0)
+        state["buy_touches"] += (touched & bull).sum(axis=0)
+
+    return state
+
+
+def _sum_in_order(initial: np.ndarray, rows: np.ndarray) -> np.ndarray:
+    """initial + rows[0] + rows[1] + ..., added row by row (cumsum is sequential)."""
+    return np.cumsum(np.vstack([initial[None, :], rows]), axis=0)[-1]
+
+
+def value_area(totals: np.ndarray, target: float) -> np.ndarray:
+    """
+    Bins forming the value area: highest volume first until target is reached.
+
+    Args:
+        totals: Volume per bin
+        target: Volume the value area must cover
+
+    Returns:
+        Bin indices in the order they were added (volume descending, ties by position)
+    """
+    order = np.argsort(-totals, kind="stable")
+    reached = np.flatnonzero(np.cumsum(totals[order]) >= target)
+    return order[:reached[0] + 1] if len(reached) else order
+
+
+def volume_nodes(totals: np.ndarray, total_volume: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    High and low volume nodes.
+
+    Returns:
+        (indices above 1.5x the average bin volume, indices below 0.5x)
+    """
+    avg_volume = total_volume / len(totals)
+    return np.flatnonzero(totals > avg_volume * 1.5), np.flatnonzero(totals < avg_volume * 0.5)
+
+
+def summarize(
+    keys: List[float],
+    bin_lows: np.ndarray,
+    bin_highs: np.ndarray,
+    state: Dict[str, np.ndarray],
+    value_area_pct: float = 70,
+) -> Dict:
+    """
+    POC, value area, HVN/LVN and the per-level profile from accumulated bins.
+
+    Levels no candle touched keep integer zero volumes, as in the original
+    dict-based profile.
+
+    Args:
+        keys: Profile key per bin (see bin_keys)
+        bin_lows: Lower bin edges
+        bin_highs: Upper bin edges
+        state: Accumulators from accumulate()
+        value_area_pct: Share of volume the value area covers
+
+    Returns:
+        dict with poc, poc_volume, poc_delta, vah, val, value_area_levels,
+        high_volume_nodes, low_volume_nodes, volume_profile and
+        total_volume; empty if there is no volume
+    """
+    if not keys:
+        return {}
+
+    touched = state["touches"] > 0
+    bought = state["buy_touches"] > 0
+    sold = state["touches"] > state["buy_touches"]
+    totals_f = state["total"]
+    totals = [v if t else 0 for v, t in zip(totals_f.tolist(), touched.tolist())]
+    buys = [v if b else 0 for v, b in zip(state["buy"].tolist(), bought.tolist())]
+    sells = [v if s else 0 for v, s in zip(state["sell"].tolist(), sold.tolist())]
+    deltas = [b - s if t else 0 for b, s, t in zip(buys, sells, touched.tolist())]
+    lows, highs = bin_lows.tolist(), bin_highs.tolist()
+
+    total_volume = sum(totals)
+    if total_volume == 0:
+        return {}
+
+    poc = int(np.argmax(totals_f))
+    va = value_area(totals_f, total_volume * (value_area_pct / 100))
+    hvn, lvn = volume_nodes(totals_f, total_volume)
+
+    return {
+        "poc": keys[poc],
+        "poc_volume": totals[poc],
+        "poc_delta": deltas[poc],
+        "vah": max([0] + [highs[i] for i in va]),
+        "val": min([float("inf")] + [lows[i] for i in va]),
+        "value_area_levels": [keys[i] for i in va],
+        "high_volume_nodes": [{"price": keys[i], "volume": totals[i], "delta": deltas[i]} for i in hvn],
+        "low_volume_nodes": [{"price": keys[i], "volume": totals[i]} for i in lvn],
+        "volume_profile": {
+            keys[i]: {
+                "price_low": lows[i],
+                "price_high": highs[i],
+                "total_volume": totals[i],
+                "buy_volume": buys[i],
+                "sell_volume": sells[i],
+                "delta": deltas[i],
+                "touch_count": int(state["touches"][i]),
+            }
+            for i in range(len(keys))
+        },
+        "total_volume": total_volume,
+    }
+
+
+# Candle as held by the accumulator: (timestamp, low, high, bullish, volume)
+Candle = Tuple[object, float, float, bool, float]
+
+
+def make_candle(timestamp, open_: float, high: float, low: float, close: float, volume: float) -> Candle:
+    """Accumulator candle from OHLCV values."""
+    return (timestamp, float(low), float(high), bool(close > open_), float(volume))
+
+
+class VolumeProfileAccumulator:
+    """
+    Rolling volume profile over the last `window` candles, updated per candle.
+
+    Adding a candle or expiring the oldest touches only the bins it
+    overlaps. The grid uses the bin size calculate_volume_profile would
+    pick for the window's range, extended by `headroom` on both sides, and
+    is rebuilt only when a candle falls outside it; right after a rebuild
+    the profile equals calculate_volume_profile over the same candles. The
+    POC is kept current on every update; the value area is recomputed
+    from the bin arrays only when the profile changed since it was last
+    read.
+    """
+
+    def __init__(self, window: Optional[int] = None, value_area_pct: Optional[float] = None, headroom: float = 0.5):
+        """
+        Initialize the accumulator.
+
+        Args:
+            window: Candles in the profile (defaults to Config.VP_SESSIONS)
+            value_area_pct: Value area share of volume (defaults to Config.VP_VALUE_AREA)
+            headroom: Extra grid on each side, as a fraction of the range at rebuild
+        """
+        if window is None or value_area_pct is None:
+            from src.config import Config
+            window = window or Config.VP_SESSIONS
+            value_area_pct = value_area_pct or Config.VP_VALUE_AREA
+        self.window = window
+        self.value_area_pct = value_area_pct
+        self.headroom = headroom
+        self._candles: Deque[Candle] = deque()
+        self._lock = threading.Lock()
+        self._reset_grid()
+        self.rebins = 0
+        self.updates = 0
+
+    def _reset_grid(self):
+        self._lows = np.empty(0)
+        self._highs = np.empty(0)
+        self._keys: List[float] = []
+        self._bin_size = 0.0
+        self._state = empty_state(0)
+        self._poc = -1
+        self._value_area: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self._candles)
+
+    # ----- updates -----
+
+    def add(self, timestamp, open_: float, high: float, low: float, close: float, volume: float):
+        """
+        Add a closed candle, expiring the oldest once the window is full.
+
+        Args:
+            timestamp: Candle start (used by sync to line candles up)
+            open_, high, low, close, volume: Candle values
+        """
+        with self._lock:
+            self._append(make_candle(timestamp, open_, high, low, close, volume))
+
+    def replace_last(self, open_: float, high: float, low: float, close: float, volume: float):
+        """Update the newest candle in place (e.g. the candle still forming)."""
+        with self._lock:
+            if self._candles:
+                self._replace_last(make_candle(self._candles[-1][0], open_, high, low, close, volume))
+
+    def _append(self, candle: Candle):
+        self._candles.append(candle)
+        expired = self._candles.popleft() if len(self._candles) > self.window else None
+        if not self._fits(candle):
+            self._rebuild()
+        else:
+            if expired is not None:
+                self._apply(expired, -1.0)
+            self._apply(candle, 1.0)
+        self.updates += 1
+
+    def _replace_last(self, candle: Candle):
+        old = self._candles.pop()
+        self._candles.append(candle)
+        if not self._fits(candle):
+            self._rebuild()
+        else:
+            self._apply(old, -1.0)
+            self._apply(candle, 1.0)
+        self.updates += 1
+
+    def sync(self, df: pd.DataFrame) -> int:
+        """
+        Bring the profile in line with a candle frame's last `window` candles.
+
+        Candles already held are skipped, the newest held candle is
+        refreshed if it changed (a forming candle) and later candles are
+        added. A frame that does not line up with what is held (history
+        rewritten, e.g. by a gap backfill, or more than a window ahead)
+        resets the profile from the frame.
+
+        Args:
+            df: Frame with timestamp, open, high, low, close, volume (oldest first)
+
+        Returns:
+            Number of candles applied
+        """
+        columns = [df[column].to_numpy()[-self.window:].tolist() for column in ("timestamp", "open", "high", "low", "close", "volume")]
+        candles = [make_candle(*row) for row in zip(*columns)]
+
+        with self._lock:
+            start = self._first_new([candle[0] for candle in self._candles], [candle[0] for candle in candles])
+            if start is None:
+                self._candles = deque(candles)
+                self._rebuild()
+                self.updates += 1
+                return len(candles)
+
+            applied = 0
+            if candles[start - 1] != self._candles[-1]:
+                self._replace_last(candles[start - 1])
+                applied += 1
+            for candle in candles[start:]:
+                self._append(candle)
+                applied += 1
+            return applied
+
+    @staticmethod
+    def _first_new(held: List, timestamps: List) -> Optional[int]:
+        """
+        Index in timestamps of the first candle not held yet.
+
+        Returns:
+            That index, or None when the held candles do not end the same
+            way the frame's window starts (nothing held, histories
+            disagree, or the newest held candle has left the window)
+        """
+        if not held or not timestamps or held[-1] not in timestamps:
+            return None
+        position = timestamps.index(held[-1])
+        overlap = timestamps[: position + 1]
+        if len(overlap) > len(held) or held[-len(overlap):] != overlap:
+            return None
+        return position + 1
+
+    def _fits(self, candle: Candle) -> bool:
+        return (
+            len(self._lows) > 0
+            and candle[1] >= self._lows[0]
+            and candle[2] <= self._highs[-1]
+        )
+
+    def _apply(self, candle: Candle, sign: float):
+        """Add (sign=1) or remove (sign=-1) one candle's volume on the bins it overlaps."""
+        _, low, high, bullish, volume = candle
+        candle_range = high - low
+        if candle_range <= 0:
+            return
+
+        origin = self._lows[0]
+        first = max(0, int((low - origin) // self._bin_size) - 1)
+        last = min(len(self._lows), int(math.ceil((high - origin) / self._bin_size)) + 1)
+        bins = slice(first, last)
+        overlap_low = np.maximum(low, self._lows[bins])
+        overlap_high = np.minimum(high, self._highs[bins])
+        touched = overlap_low < overlap_high
+        weighted = np.where(touched, volume * ((overlap_high - overlap_low) / candle_range), 0.0)
+
+        state = self._state
+        state["total"][bins] += sign * weighted
+        state["touches"][bins] += int(sign) * touched
+        if bullish:
+            state["buy"][bins] += sign * weighted
+            state["buy_touches"][bins] += int(sign) * touched
+        else:
+            state["sell"][bins] += sign * weighted
+
+        if sign < 0:
+            # Bins left with no candles go back to exact zero (no float residue)
+            empty = state["touches"][bins] == 0
+            state["total"][bins][empty] = 0.0
+            state["buy"][bins][state["buy_touches"][bins] == 0] = 0.0
+            state["sell"][bins][state["touches"][bins] == state["buy_touches"][bins]] = 0.0
+            if first <= self._poc < last:
+                self._poc = int(np.argmax(state["total"]))
+        else:
+            candidate = first + int(np.argmax(state["total"][bins]))
+            best = state["total"][self._poc] if self._poc >= 0 else -1.0
+            if state["total"][candidate] > best or (state["total"][candidate] == best and candidate < self._poc):
+                self._poc = candidate
+        self._value_area = None
+
+    def _rebuild(self):
+        """Re-grid around the held candles and re-accumulate them."""
+        self._reset_grid()
+        if not self._candles:
+            return
+        price_min = min(candle[1] for candle in self._candles)
+        price_max = max(candle[2] for candle in self._candles)
+        num_bins, bin_size = profile_grid(price_min, price_max)
+        if num_bins == 0:
+            return
+
+        pad = int(math.ceil(num_bins * self.headroom))
+        self._lows = price_min + np.arange(-pad, num_bins + pad) * bin_size
+        self._highs = self._lows + bin_size
+        self._keys = np.round((self._lows + self._highs) / 2, 2).tolist()
+        self._bin_size = bin_size
+
+        _, low, high, bullish, volume = (np.array(column) for column in zip(*self._candles))
+        self._state = accumulate(self._lows, self._highs, low, high, volume, bullish)
+        self._poc = int(np.argmax(self._state["total"]))
+        self.rebins += 1
+        log.debug(f"Volume profile re-binned: {len(self._lows)} bins of {bin_size:.2f} from {self._lows[0]:.2f}")
+
+    # ----- reads -----
+
+    def _span(self) -> slice:
+        """Bins covering the held candles' price range."""
+        price_min = min(candle[1] for candle in self._candles)
+        price_max = max(candle[2] for candle in self._candles)
+        eps = self._bin_size * 1e-6
+        return slice(
+            int(np.searchsorted(self._highs, price_min + eps, side="right")),
+            int(np.searchsorted(self._lows, price_max - eps, side="left")),
+        )
+
+    def levels(self) -> Dict:
+        """
+        POC and value area without building the per-level profile.
+
+        Returns:
+            dict with poc, poc_volume, vah, val and total_volume (empty without volume)
+        """
+        with self._lock:
+            if self._poc < 0 or not self._candles:
+                return {}
+            totals = self._state["total"]
+            if self._value_area is None:
+                span = self._span()
+                target = totals[span].sum() * (self.value_area_pct / 100)
+                self._value_area = span.start + value_area(totals[span], target)
+            va = self._value_area
+            return {
+                "poc": self._keys[self._poc],
+                "poc_volume": float(totals[self._poc]),
+                "vah": float(self._highs[va].max()),
+                "val": float(self._lows[va].min()),
+                "total_volume": float(totals.sum()),
+            }
+
+    def snapshot(self) -> Dict:
+        """
+        Full profile in calculate_volume_profile's format.
+
+        Returns:
+            dict with poc, vah, val, value_area_levels, HVN/LVN,
+            volume_profile, total_volume and sessions_analyzed (empty without volume)
+        """
+        with self._lock:
+            if self._poc < 0 or not self._candles:
+                return {}
+            span = self._span()
+            state = {name: values[span] for name, values in self._state.items()}
+            result = summarize(self._keys[span], self._lows[span], self._highs[span], state, self.value_area_pct)
+            if result:
+                result["sessions_analyzed"] = len(self._candles)
+            return result
+
+    def metrics(self) -> Dict:
+        """Window fill, grid size and update counters."""
+        with self._lock:
+            return {
+                "candles": len(self._candles),
+                "bins": len(self._lows),
+                "bin_size": round(self._bin_size, 4),
+                "updates": self.updates,
+                "rebins": self.rebins,
+            }
+
+
+class SessionProfiles:
+    """
+    Per-trading-day volume profiles cached as arrays on a shared price grid.
+
+    Bin i of the grid covers [i * bin_size, (i + 1) * bin_size) for every
+    day, so a day is stored as the index of its first bin plus per-bin
+    arrays, and a composite over any run of sessions is the sum of the
+    cached day arrays. A day is recomputed only when its candles change
+    (in practice just the session in progress). Each day also records its
+    developing POC, and POCs no later session has traded through are
+    reported as naked.
+    """
+
+    def __init__(self, bin_size: Optional[float] = None, max_days: Optional[int] = None,
+                 value_area_pct: Optional[float] = None):
+        """
+        Initialize the cache.
+
+        Args:
+            bin_size: Grid bin size in points (defaults to Config.VP_SESSION_BIN_SIZE)
+            max_days: Days kept per security (defaults to Config.VP_SESSION_CACHE_DAYS)
+            value_area_pct: Value area share of volume (defaults to Config.VP_VALUE_AREA)
+        """
+        from src.config import Config
+        self.bin_size = bin_size or Config.VP_SESSION_BIN_SIZE
+        self.max_days = max_days or Config.VP_SESSION_CACHE_DAYS
+        self.value_area_pct = value_area_pct or Config.VP_VALUE_AREA
+        self._days: Dict[str, "OrderedDict[date, Dict]"] = {}
+        self._lock = threading.Lock()
+        self.days_built = 0
+
+    def update(self, security_id, df: pd.DataFrame) -> int:
+        """
+        Cache the profile of every trading day in a candle frame.
+
+        Args:
+            security_id: Security the candles belong to
+            df: Frame with timestamp, open, high, low, close, volume (oldest first, any interval)
+
+        Returns:
+            Number of days (re)computed
+        """
+        if df.empty:
+            return 0
+        key = str(security_id)
+        timestamps = df["timestamp"].to_numpy(dtype="datetime64[ns]")
+        columns = [df[column].to_numpy(dtype=np.float64) for column in ("open", "high", "low", "close", "volume")]
+        days, starts = np.unique(timestamps.astype("datetime64[D]"), return_index=True)
+        ends = np.append(starts[1:], len(timestamps))
+        days, starts, ends = days[-self.max_days:], starts[-self.max_days:], ends[-self.max_days:]
+
+        built = 0
+        with self._lock:
+            cache = self._days.setdefault(key, OrderedDict())
+            for day, start, end in zip(days.tolist(), starts.tolist(), ends.tolist()):
+                open_, high, low, close, volume = (column[start:end] for column in columns)
+                signature = (end - start, timestamps[end - 1], volume.sum(), high.max(), low.min(), close[-1])
+                cached = cache.get(day)
+                if cached is not None and cached["signature"] == signature:
+                    continue
+                cache[day] = self._build_day(timestamps[start:end], open_, high, low, close, volume)
+                cache[day]["signature"] = signature
+                built += 1
+
+            if built:
+                for day in sorted(cache)[:-self.max_days]:
+                    del cache[day]
+                self._days[key] = OrderedDict(sorted(cache.items()))
+                self.days_built += built
+        return built
+
+    def _build_day(self, timestamps: np.ndarray, open_: np.ndarray, high: np.ndarray, low: np.ndarray,
+                   close: np.ndarray, volume: np.ndarray) -> Dict:
+        """One session's bin arrays, POC, value area and developing POC."""
+        first = int(math.floor(low.min() / self.bin_size))
+        last = max(first + 1, int(math.ceil(high.max() / self.bin_size)))
+        bin_lows = (first + np.arange(last - first)) * self.bin_size
+        bin_highs = bin_lows + self.bin_size
+
+        bullish = close > open_
+        state = accumulate(bin_lows, bin_highs, low, high, volume, bullish)
+        totals = state["total"]
+        mids = np.round((bin_lows + bin_highs) / 2, 2)
+
+        # Developing POC: argmax of the running totals after every candle, kept where it moves
+        weighted, _ = overlap_volume(bin_lows, bin_highs, low, high, volume)
+        running = np.cumsum(weighted, axis=0)
+        developing = np.where(running.any(axis=1), running.argmax(axis=1), -1)
+        moves = np.flatnonzero((developing >= 0) & (developing != np.concatenate([[-1], developing[:-1]])))
+
+        poc = int(np.argmax(totals))
+        va = value_area(totals, totals.sum() * (self.value_area_pct / 100))
+        return {
+            "first": first,
+            "state": state,
+            "candles": len(timestamps),
+            "high": float(high.max()),
+            "low": float(low.min()),
+            "poc": float(mids[poc]),
+            "vah": float(bin_highs[va].max()),
+            "val": float(bin_lows[va].min()),
+            "total_volume": float(totals.sum()),
+            "developing_poc": [
+                {"timestamp": pd.Timestamp(timestamps[i]), "poc": float(mids[developing[i]])} for i in moves
+            ],
+        }
+
+    def sessions(self, security_id) -> List[date]:
+        """Cached trading days, oldest first."""
+        with self._lock:
+            return list(self._days.get(str(security_id), ()))
+
+    def day_profile(self, security_id, day: Optional[date] = None) -> Dict:
+        """
+        Summary of one session.
+
+        Args:
+            security_id: Security ID
+            day: Trading day (default: the latest cached)
+
+        Returns:
+            dict with date, poc, vah, val, high, low, total_volume and candles (empty if not cached)
+        """
+        with self._lock:
+            cache = self._days.get(str(security_id))
+            if not cache:
+                return {}
+            day = day or next(reversed(cache))
+            profile = cache.get(day)
+            if profile is None:
+                return {}
+            return {
+                "date": day,
+                **{field: profile[field] for field in ("poc", "vah", "val", "high", "low", "total_volume", "candles")},
+            }
+
+    def composite(self, security_id, sessions: int, end: Optional[date] = None) -> Dict:
+        """
+        Volume profile over several sessions from the cached day arrays.
+
+        Args:
+            security_id: Security ID
+            sessions: Number of trading days to combine
+            end: Last day to include (default: the latest cached)
+
+        Returns:
+            calculate_volume_profile-style dict (poc, vah, val, value area,
+            HVN/LVN, volume_profile, total_volume) plus sessions_analyzed and
+            session_dates; empty if nothing is cached
+        """
+        with self._lock:
+            cache = self._days.get(str(security_id))
+            if not cache:
+                return {}
+            days = [day for day in cache if end is None or day <= end][-sessions:]
+            profiles = [cache[day] for day in days]
+        if not profiles:
+            return {}
+
+        first = min(profile["first"] for profile in profiles)
+        last = max(profile["first"] + len(profile["state"]["total"]) for profile in profiles)
+        state = empty_state(last - first)
+        for profile in profiles:
+            bins = slice(profile["first"] - first, profile["first"] - first + len(profile["state"]["total"]))
+            for name, values in profile["state"].items():
+                state[name][bins] += values
+
+        bin_lows = (first + np.arange(last - first)) * self.bin_size
+        bin_highs = bin_lows + self.bin_size
+        keys = np.round((bin_lows + bin_highs) / 2, 2).tolist()
+        result = summarize(keys, bin_lows, bin_highs, state, self.value_area_pct)
+        if result:
+            result["sessions_analyzed"] = len(days)
+            result["session_dates"] = days
+        return result
+
+    def developing_poc(self, security_id, day: Optional[date] = None) -> List[Dict]:
+        """
+        How a session's POC developed.
+
+        Returns:
+            [{"timestamp", "poc"}] for every candle that moved the POC (empty if not cached)
+        """
+        with self._lock:
+            cache = self._days.get(str(security_id))
+            if not cache:
+                return []
+            profile = cache.get(day or next(reversed(cache)))
+            return list(profile["developing_poc"]) if profile else []
+
+    def naked_pocs(self, security_id, sessions: Optional[int] = None) -> List[Dict]:
+        """
+        Prior session POCs that no later session has traded through.
+
+        The latest session is only used as a test (its POC is still
+        developing).
+
+        Args:
+            security_id: Security ID
+            sessions: Only consider the last N sessions (default: all cached)
+
+        Returns:
+            [{"date", "poc", "volume"}], most recent first
+        """
+        with self._lock:
+            cache = self._days.get(str(security_id))
+            if not cache or len(cache) < 2:
+                return []
+            days = list(cache)[-(sessions or len(cache)):]
+            pocs = np.array([cache[day]["poc"] for day in days])
+            highs = np.array([cache[day]["high"] for day in days])
+            lows = np.array([cache[day]["low"] for day in days])
+            volumes = [float(cache[day]["state"]["total"].max()) for day in days]
+
+        later = np.arange(len(days))[None, :] > np.arange(len(days))[:, None]
+        traded = later & (lows[None, :] <= pocs[:, None]) & (highs[None, :] >= pocs[:, None])
+        naked = np.flatnonzero(~traded[:-1].any(axis=1))
+        return [{"date": days[i], "poc": float(pocs[i]), "volume": volumes[i]} for i in naked[::-1]]
+
+    def metrics(self) -> Dict:
+        """Cached days per security."""
+        with self._lock:
+            return {
+                "securities": {key: len(days) for key, days in self._days.items()},
+                "days_built": self.days_built,
+            }
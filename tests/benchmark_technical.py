@@ -0,0 +1,93 @@
+"""
+Benchmark the vectorised technical analysis against the original loop implementations.
+
+Usage:
+    python tests/benchmark_technical.py [--days 5 10 20 30] [--repeat 3]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.config import Config
+from src.utils.logger import log
+from legacy_technical import LegacyTechnicalAnalysis, minute_candles
+from src.agents.technical_analysis_agent import TechnicalAnalysisAgent
+from src.utils.candle_aggregator import resample_candles
+from src.utils.volume_profile import VolumeProfileAccumulator
+
+
+def best_time(func, repeat: int) -> float:
+    """Fastest of repeat runs, in seconds."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=int, nargs="+", default=[5, 10, 20, 30])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    log.remove()
+    cfg = Config()
+    agent, legacy = TechnicalAnalysisAgent(cfg), LegacyTechnicalAnalysis(cfg)
+
+    print(f"{'benchmark':<16}{'days':>6}{'candles':>9}{'bins':>7}{'legacy (s)':>13}{'numpy (s)':>12}{'speedup':>10}  match")
+    for days in args.days:
+        df = minute_candles(days)
+        candles = len(df)
+
+        expected = legacy.calculate_volume_profile(df, sessions=candles)
+        result = agent.calculate_volume_profile(df, sessions=candles)
+        legacy_time = best_time(lambda: legacy.calculate_volume_profile(df, sessions=candles), 1)
+        numpy_time = best_time(lambda: agent.calculate_volume_profile(df, sessions=candles), args.repeat)
+        print(
+            f"{'volume_profile':<16}{days:>6}{candles:>9}{len(expected['volume_profile']):>7}"
+            f"{legacy_time:>13.3f}{numpy_time:>12.4f}{legacy_time / numpy_time:>9.0f}x  {result == expected}"
+        )
+
+        expected = legacy.identify_order_blocks(df, cfg.OB_LOOKBACK)
+        result = agent.identify_order_blocks(df, cfg.OB_LOOKBACK)
+        legacy_time = best_time(lambda: legacy.identify_order_blocks(df, cfg.OB_LOOKBACK), 1)
+        numpy_time = best_time(lambda: agent.identify_order_blocks(df, cfg.OB_LOOKBACK), args.repeat)
+        print(
+            f"{'order_blocks':<16}{days:>6}{candles:>9}{'-':>7}"
+            f"{legacy_time:>13.3f}{numpy_time:>12.4f}{legacy_time / numpy_time:>9.0f}x  {result == expected}"
+        )
+
+        expected = legacy.identify_fair_value_gaps(df)
+        result = agent.identify_fair_value_gaps(df)
+        legacy_time = best_time(lambda: legacy.identify_fair_value_gaps(df), 1)
+        numpy_time = best_time(lambda: agent.identify_fair_value_gaps(df), args.repeat)
+        print(
+            f"{'fair_value_gaps':<16}{days:>6}{candles:>9}{'-':>7}"
+            f"{legacy_time:>13.3f}{numpy_time:>12.4f}{legacy_time / numpy_time:>9.0f}x  {result == expected}"
+        )
+
+
+    # Rolling profile: per-candle update vs full recalculation of the VP_SESSIONS window
+    df = resample_candles(minute_candles(max(args.days)), 15)
+    rows = list(zip(df["timestamp"], df["open"], df["high"], df["low"], df["close"], df["volume"]))
+    acc = VolumeProfileAccumulator(window=cfg.VP_SESSIONS, value_area_pct=cfg.VP_VALUE_AREA)
+    started = time.perf_counter()
+    for row in rows:
+        acc.add(*row)
+        acc.levels()
+    rolling = (time.perf_counter() - started) / len(rows)
+    full = best_time(lambda: agent.calculate_volume_profile(df, cfg.VP_VALUE_AREA, cfg.VP_SESSIONS), args.repeat)
+    print(
+        f"\nrolling profile ({len(rows)} x 15-min candles, window {cfg.VP_SESSIONS}): "
+        f"add + POC/VA {rolling * 1e6:.0f}us per candle vs full recalculation {full * 1e6:.0f}us, "
+        f"{acc.rebins} re-bins"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,477 @@
+"""Reference (loop-based) technical analysis implementations and synthetic candles for parity tests and benchmarks."""
+import pandas as pd
+import numpy as np
+from typing import Dict, List
+from src.agents.technical_analysis_agent import TechnicalAnalysisAgent
+from src.utils.logger import log
+
+
+def minute_candles(days: int, seed: int = 0, start_price: float = 25000.0) -> pd.DataFrame:
+    """
+    Random-walk 1-minute OHLCV candles for NSE sessions (375 per day).
+
+    Args:
+        days: Trading days to generate
+        seed: Random seed
+        start_price: First open
+
+    Returns:
+        DataFrame with timestamp, open, high, low, close and (integer) volume
+    """
+    rng = np.random.default_rng(seed)
+    per_day = 375
+    timestamps = pd.DatetimeIndex(np.concatenate([
+        pd.date_range(pd.Timestamp("2025-01-06 09:15") + pd.Timedelta(days=day), periods=per_day, freq="min")
+        for day in range(days)
+    ]))
+    n = days * per_day
+
+    close = start_price + np.cumsum(rng.normal(0, 4, n))
+    open_ = np.concatenate([[start_price], close[:-1]]) + rng.normal(0, 1, n)
+    high = np.maximum(open_, close) + rng.exponential(3, n)
+    low = np.minimum(open_, close) - rng.exponential(3, n)
+    volume = rng.integers(1_000, 200_000, n)
+
+    return pd.DataFrame({
+        "timestamp": timestamps,
+        "open": open_.round(2),
+        "high": high.round(2),
+        "low": low.round(2),
+        "close": close.round(2),
+        "volume": volume,
+    })
+
+
+class LegacyTechnicalAnalysis(TechnicalAnalysisAgent):
+    """TechnicalAnalysisAgent with the original row-by-row implementations."""
+
+    def calculate_volume_profile(
+        self,
+        df: pd.DataFrame,
+        value_area: float = 70,
+        sessions: int = None
+    ) -> Dict:
+        """
+        Enhanced Volume Profile with delta tracking and HVN/LVN identification.
+        
+        Improvements:
+        - Weighted volume distribution
+        - Buy/Sell delta per price level
+        - High Volume Nodes (HVN) and Low Volume Nodes (LVN)
+        - Session-based calculation
+        """
+        try:
+            if df.empty:
+                return {}
+            
+            # Use only recent sessions
+            if sessions is None:
+                sessions = self.config.VP_SESSIONS
+            
+            recent_df = df.tail(sessions) if len(df) > sessions else df
+            
+            price_min = recent_df["low"].min()
+            price_max = recent_df["high"].max()
+            price_range = price_max - price_min
+            
+            if price_range == 0:
+                return {}
+            
+            # Adaptive bin size (10 points for Nifty)
+            num_bins = max(50, int(price_range / 10))
+            bin_size = price_range / num_bins
+            
+            volume_profile = {}
+            
+            # Initialize bins
+            for i in range(num_bins):
+                bin_low = price_min + (i * bin_size)
+                bin_high = bin_low + bin_size
+                bin_mid = round((bin_low + bin_high) / 2, 2)
+                
+                volume_profile[bin_mid] = {
+                    'price_low': bin_low,
+                    'price_high': bin_high,
+                    'total_volume': 0,
+                    'buy_volume': 0,
+                    'sell_volume': 0,
+                    'delta': 0,
+                    'touch_count': 0
+                }
+            
+            # Weighted volume distribution
+            for idx, row in recent_df.iterrows():
+                candle_range = row["high"] - row["low"]
+                
+                for price_level, data in volume_profile.items():
+                    # Calculate overlap
+                    overlap_low = max(row["low"], data['price_low'])
+                    overlap_high = min(row["high"], data['price_high'])
+                    
+                    if overlap_low < overlap_high:
+                        # Weighted distribution
+                        overlap_pct = (overlap_high - overlap_low) / candle_range if candle_range > 0 else 1
+                        weighted_volume = row["volume"] * overlap_pct
+                        
+                        data['total_volume'] += weighted_volume
+                        data['touch_count'] += 1
+                        
+                        # Buy/Sell classification
+                        if row["close"] > row["open"]:
+                            data['buy_volume'] += weighted_volume
+                        else:
+                            data['sell_volume'] += weighted_volume
+                        
+                        data['delta'] = data['buy_volume'] - data['sell_volume']
+            
+            # Find POC (Point of Control)
+            if volume_profile:
+                poc_price, poc_data = max(volume_profile.items(), key=lambda x: x[1]['total_volume'])
+            else:
+                return {}
+            
+            # Calculate Value Area
+            total_volume = sum(v['total_volume'] for v in volume_profile.values())
+            if total_volume == 0:
+                return {}
+            
+            target_va_volume = total_volume * (value_area / 100)
+            
+            sorted_levels = sorted(
+                volume_profile.items(),
+                key=lambda x: x[1]['total_volume'],
+                reverse=True
+            )
+            
+            va_volume = 0
+            va_high = 0
+            va_low = float('inf')
+            va_levels = []
+            
+            for price, data in sorted_levels:
+                va_volume += data['total_volume']
+                va_high = max(va_high, data['price_high'])
+                va_low = min(va_low, data['price_low'])
+                va_levels.append(price)
+                
+                if va_volume >= target_va_volume:
+                    break
+            
+            # Identify HVN and LVN
+            avg_volume = total_volume / len(volume_profile)
+            
+            hvn_levels = [
+                {'price': price, 'volume': data['total_volume'], 'delta': data['delta']}
+                for price, data in volume_profile.items()
+                if data['total_volume'] > avg_volume * 1.5
+            ]
+            
+            lvn_levels = [
+                {'price': price, 'volume': data['total_volume']}
+                for price, data in volume_profile.items()
+                if data['total_volume'] < avg_volume * 0.5
+            ]
+            
+            log.info(f"Volume Profile: POC={poc_price:.2f}, VAH={va_high:.2f}, VAL={va_low:.2f}")
+            log.info(f"   HVN count: {len(hvn_levels)}, LVN count: {len(lvn_levels)}")
+            log.info(f"   POC Delta: {poc_data['delta']:.0f} (Buy: {poc_data['buy_volume']:.0f}, Sell: {poc_data['sell_volume']:.0f})")
+            
+            return {
+                "poc": poc_price,
+                "poc_volume": poc_data['total_volume'],
+                "poc_delta": poc_data['delta'],
+                "vah": va_high,
+                "val": va_low,
+                "value_area_levels": va_levels,
+                "high_volume_nodes": hvn_levels,
+                "low_volume_nodes": lvn_levels,
+                "volume_profile": volume_profile,
+                "total_volume": total_volume,
+                "sessions_analyzed": len(recent_df)
+            }
+            
+        except Exception as e:
+            log.error(f"Volume profile calculation error: {str(e)}")
+            import traceback
+            log.error(traceback.format_exc())
+            return {}
+    
+    
+    def identify_order_blocks(
+        self,
+        df: pd.DataFrame,
+        lookback: int = None
+    ) -> List[Dict]:
+        """
+        Enhanced Order Blocks with volume confirmation and zone respect validation.
+        
+        Improvements:
+        - Volume confirmation (impulse > OB volume)
+        - Zone respect tracking (bounces)
+        - Strength scoring (0-100)
+        - Mitigation tracking
+        """
+        if lookback is None:
+            lookback = self.config.OB_LOOKBACK
+        
+        order_blocks = []
+        
+        try:
+            if len(df) < lookback + 10:
+                return []
+            
+            for i in range(lookback, len(df) - 2):
+                current = df.iloc[i]
+                next_candle = df.iloc[i + 1]
+                
+                # BULLISH ORDER BLOCK
+                if current["close"] < current["open"]:  # Down candle
+                    impulse_move = next_candle["close"] - next_candle["open"]
+                    ob_size = current["high"] - current["low"]
+                    
+                    if ob_size > 0 and impulse_move > ob_size * 1.5:
+                        # Volume confirmation
+                        volume_confirmed = next_candle["volume"] > current["volume"] * 1.2
+                        
+                        if volume_confirmed:
+                            # Check if zone was respected
+                            tested = False
+                            bounced = False
+                            touch_count = 0
+                            
+                            for j in range(i + 2, min(i + 10, len(df))):
+                                test_candle = df.iloc[j]
+                                
+                                # Price tested the zone
+                                if (test_candle["low"] <= current["high"] and 
+                                    test_candle["low"] >= current["low"]):
+                                    tested = True
+                                    touch_count += 1
+                                    
+                                    # Price bounced (closed above zone)
+                                    if test_candle["close"] > current["high"]:
+                                        bounced = True
+                            
+                            # Calculate strength (0-100)
+                            impulse_strength = min(50, (impulse_move / ob_size) * 20)
+                            volume_strength = min(30, (next_candle["volume"] / current["volume"]) * 15)
+                            respect_strength = 20 if bounced else (10 if tested else 0)
+                            
+                            total_strength = impulse_strength + volume_strength + respect_strength
+                            
+                            # Only add if strength >= 50
+                            if total_strength >= 50:
+                                order_blocks.append({
+                                    "type": "demand",
+                                    "zone_top": float(current["high"]),
+                                    "zone_bottom": float(current["low"]),
+                                    "zone_mid": float((current["high"] + current["low"]) / 2),
+                                    "timestamp": current["timestamp"],
+                                    "strength": float(total_strength),
+                                    "tested": tested,
+                                    "respected": bounced,
+                                    "touch_count": touch_count,
+                                    "mitigated": False,
+                                    "volume_ratio": float(next_candle["volume"] / current["volume"]),
+                                    "impulse_size": float(impulse_move)
+                                })
+                
+                # BEARISH ORDER BLOCK
+                elif current["close"] > current["open"]:  # Up candle
+                    impulse_move = current["open"] - next_candle["close"]
+                    ob_size = current["high"] - current["low"]
+                    
+                    if ob_size > 0 and impulse_move > ob_size * 1.5:
+                        volume_confirmed = next_candle["volume"] > current["volume"] * 1.2
+                        
+                        if volume_confirmed:
+                            tested = False
+                            bounced = False
+                            touch_count = 0
+                            
+                            for j in range(i + 2, min(i + 10, len(df))):
+                                test_candle = df.iloc[j]
+                                
+                                if (test_candle["high"] >= current["low"] and 
+                                    test_candle["high"] <= current["high"]):
+                                    tested = True
+                                    touch_count += 1
+                                    
+                                    if test_candle["close"] < current["low"]:
+                                        bounced = True
+                            
+                            impulse_strength = min(50, (impulse_move / ob_size) * 20)
+                            volume_strength = min(30, (next_candle["volume"] / current["volume"]) * 15)
+                            respect_strength = 20 if bounced else (10 if tested else 0)
+                            
+                            total_strength = impulse_strength + volume_strength + respect_strength
+                            
+                            if total_strength >= 50:
+                                order_blocks.append({
+                                    "type": "supply",
+                                    "zone_top": float(current["high"]),
+                                    "zone_bottom": float(current["low"]),
+                                    "zone_mid": float((current["high"] + current["low"]) / 2),
+                                    "timestamp": current["timestamp"],
+                                    "strength": float(total_strength),
+                                    "tested": tested,
+                                    "respected": bounced,
+                                    "touch_count": touch_count,
+                                    "mitigated": False,
+                                    "volume_ratio": float(next_candle["volume"] / current["volume"]),
+                                    "impulse_size": float(impulse_move)
+                                })
+            
+            # Sort by strength
+            order_blocks = sorted(order_blocks, key=lambda x: x["strength"], reverse=True)[:10]
+            
+            demand_count = sum(1 for ob in order_blocks if ob["type"] == "demand")
+            supply_count = sum(1 for ob in order_blocks if ob["type"] == "supply")
+            
+            log.info(f"Identified {len(order_blocks)} order blocks (Demand: {demand_count}, Supply: {supply_count})")
+            if order_blocks:
+                log.info(f"   Top OB: {order_blocks[0]['type'].upper()} at {order_blocks[0]['zone_mid']:.2f} (Strength: {order_blocks[0]['strength']:.0f})")
+            
+            return order_blocks
+            
+        except Exception as e:
+            log.error(f"Order block identification error: {str(e)}")
+            import traceback
+            log.error(traceback.format_exc())
+            return []
+    
+    def identify_fair_value_gaps(
+        self,
+        df: pd.DataFrame,
+        min_gap_pct: float = None
+    ) -> List[Dict]:
+        """
+        Enhanced Fair Value Gaps with fill tracking and classification.
+        
+        Improvements:
+        - Gap size classification (large/medium/small)
+        - Fill percentage tracking
+        - Confidence scoring
+        - Only returns valid (unfilled) FVGs
+        """
+        if min_gap_pct is None:
+            min_gap_pct = self.config.FVG_MIN_SIZE * 100  # Convert to percentage
+        
+        fvgs = []
+        
+        try:
+            if len(df) < 3:
+                return []
+            
+            for i in range(1, len(df) - 1):
+                candle_1 = df.iloc[i - 1]
+                candle_2 = df.iloc[i]
+                candle_3 = df.iloc[i + 1]
+                
+                # BULLISH FVG
+                bullish_gap = candle_3["low"] - candle_1["high"]
+                gap_pct = (bullish_gap / candle_1["high"]) * 100
+                
+                if bullish_gap > 0 and gap_pct >= min_gap_pct:
+                    # Classify FVG size
+                    if gap_pct >= 1.0:
+                        gap_class = 'large'
+                        confidence = 90
+                    elif gap_pct >= 0.5:
+                        gap_class = 'medium'
+                        confidence = 75
+                    else:
+                        gap_class = 'small'
+                        confidence = 60
+                    
+                    # Track fill percentage
+                    filled_pct = 0
+                    fully_filled = False
+                    
+                    for j in range(i + 2, min(i + 20, len(df))):
+                        future = df.iloc[j]
+                        
+                        if future["low"] <= candle_1["high"]:
+                            fill_level = candle_1["high"]
+                            filled_pct = ((candle_3["low"] - fill_level) / bullish_gap) * 100
+                            
+                            if future["low"] <= candle_3["low"]:
+                                fully_filled = True
+                                break
+                    
+                    if not fully_filled:  # Only add valid FVGs
+                        fvgs.append({
+                            "type": "bullish",
+                            "gap_top": float(candle_3["low"]),
+                            "gap_bottom": float(candle_1["high"]),
+                            "gap_mid": float((candle_3["low"] + candle_1["high"]) / 2),
+                            "gap_size": float(bullish_gap),
+                            "gap_pct": float(gap_pct),
+                            "classification": gap_class,
+                            "timestamp": candle_2["timestamp"],
+                            "confidence": confidence,
+                            "filled_pct": float(filled_pct),
+                            "fully_filled": fully_filled,
+                            "valid": True
+                        })
+                
+                # BEARISH FVG
+                bearish_gap = candle_1["low"] - candle_3["high"]
+                gap_pct = (bearish_gap / candle_1["low"]) * 100
+                
+                if bearish_gap > 0 and gap_pct >= min_gap_pct:
+                    if gap_pct >= 1.0:
+                        gap_class = 'large'
+                        confidence = 90
+                    elif gap_pct >= 0.5:
+                        gap_class = 'medium'
+                        confidence = 75
+                    else:
+                        gap_class = 'small'
+                        confidence = 60
+                    
+                    filled_pct = 0
+                    fully_filled = False
+                    
+                    for j in range(i + 2, min(i + 20, len(df))):
+                        future = df.iloc[j]
+                        
+                        if future["high"] >= candle_3["high"]:
+                            fill_level = candle_3["high"]
+                            filled_pct = ((fill_level - candle_1["low"]) / bearish_gap) * 100
+                            
+                            if future["high"] >= candle_1["low"]:
+                                fully_filled = True
+                                break
+                    
+                    if not fully_filled:
+                        fvgs.append({
+                            "type": "bearish",
+                            "gap_top": float(candle_1["low"]),
+                            "gap_bottom": float(candle_3["high"]),
+                            "gap_mid": float((candle_1["low"] + candle_3["high"]) / 2),
+                            "gap_size": float(bearish_gap),
+                            "gap_pct": float(gap_pct),
+                            "classification": gap_class,
+                            "timestamp": candle_2["timestamp"],
+                            "confidence": confidence,
+                            "filled_pct": float(filled_pct),
+                            "fully_filled": fully_filled,
+                            "valid": True
+                        })
+            
+            bullish_count = sum(1 for fvg in fvgs if fvg["type"] == "bullish")
+            bearish_count = sum(1 for fvg in fvgs if fvg["type"] == "bearish")
+            
+            log.info(f"Identified {len(fvgs)} valid FVGs (Bullish: {bullish_count}, Bearish: {bearish_count})")
+            if fvgs:
+                large_fvgs = [fvg for fvg in fvgs if fvg["classification"] == "large"]
+                log.info(f"   Large FVGs: {len(large_fvgs)}")
+            
+            return fvgs
+            
+        except Exception as e:
+            log.error(f"FVG identification error: {str(e)}")
+            import traceback
+            log.error(traceback.format_exc())
+            return []
@@ -0,0 +1,105 @@
+"""Tests for the namespaced TTL cache."""
+import asyncio
+import pytest
+
+from src.utils import cache as cache_module
+from src.utils.cache import TTLCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Controllable monotonic clock."""
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_namespace_ttls(clock):
+    """Each namespace expires on its own TTL."""
+    cache = TTLCache(ttls={"quotes": 1.0, "funds": 30.0})
+    cache.set("quotes", "a", 1)
+    cache.set("funds", "all", 2)
+
+    clock[0] += 5
+    assert cache.get("quotes", "a") is None
+    assert cache.get("funds", "all") == 2
+    assert cache.peek("quotes", "a") == 1
+
+    stats = cache.stats()["namespaces"]
+    assert stats["quotes"]["misses"] == 1
+    assert stats["funds"]["hits"] == 1
+
+
+def test_lru_eviction():
+    """Least recently used entries are evicted past max_entries."""
+    cache = TTLCache(max_entries=2)
+    cache.set("quotes", "a", 1)
+    cache.set("quotes", "b", 2)
+    cache.get("quotes", "a")
+    cache.set("quotes", "c", 3)
+
+    assert cache.peek("quotes", "b") is None
+    assert cache.peek("quotes", "a") == 1
+    assert len(cache) == 2
+    assert cache.stats()["namespaces"]["quotes"]["evictions"] == 1
+
+
+def test_stale_while_revalidate(clock):
+    """A stale value is served at once while one background refresh updates it."""
+    cache = TTLCache(ttls={"positions": 10.0}, stale_ttls={"positions": 20.0})
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        return len(calls)
+
+    async def scenario():
+        assert await cache.get_or_fetch("positions", "all", fetch) == 1
+        clock[0] += 15
+        stale = await asyncio.gather(*[cache.get_or_fetch("positions", "all", fetch) for _ in range(3)])
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        return stale
+
+    assert asyncio.run(scenario()) == [1, 1, 1]
+    assert len(calls) == 2
+    assert cache.get("positions", "all") == 2
+    assert cache.stats()["namespaces"]["positions"]["stale_hits"] == 3
+
+
+def test_stale_not_served_when_disallowed(clock):
+    """Callers that need fresh data wait for a fetch once the TTL is over."""
+    cache = TTLCache(ttls={"positions": 10.0}, stale_ttls={"positions": 20.0})
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        return len(calls)
+
+    async def scenario():
+        await cache.get_or_fetch("positions", "all", fetch)
+        clock[0] += 15
+        return await cache.get_or_fetch("positions", "all", fetch, allow_stale=False)
+
+    assert asyncio.run(scenario()) == 2
+    assert cache.stats()["namespaces"]["positions"]["stale_hits"] == 0
+
+
+def test_failed_fetch_falls_back(clock):
+    """Failed or rejected fetches return the expired value instead of nothing."""
+    cache = TTLCache(ttls={"funds": 1.0})
+    cache.set("funds", "all", {"status": "success"})
+    clock[0] += 60
+
+    async def failure():
+        return {"status": "failure"}
+
+    async def error():
+        raise ConnectionError("down")
+
+    is_success = lambda response: response.get("status") == "success"
+    assert asyncio.run(cache.get_or_fetch("funds", "all", failure, is_success)) == {"status": "success"}
+    assert asyncio.run(cache.get_or_fetch("funds", "all", error)) == {"status": "success"}
+
+    with pytest.raises(ConnectionError):
+        asyncio.run(cache.get_or_fetch("funds", "other", error))
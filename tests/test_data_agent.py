@@ -142,3 +142,118 @@ class TestDataAgentAsync:
         # Test concurrent operations
         pass
 
+
+
+def test_process_market_data_records_ticks(data_agent):
+    """Feed messages update latest_data and the bounded tick store."""
+    for price in ('100.00', '101.00', '102.00'):
+        data_agent._process_market_data({'type': 'Ticker Data', 'security_id': 13, 'LTP': price})
+
+    assert data_agent.latest_data['13']['LTP'] == '102.00'
+    assert data_agent.get_recent_ticks(13)['ltp'].tolist() == [100.0, 101.0, 102.0]
+    assert len(data_agent.get_recent_ticks(99)) == 0
+
+
+def test_live_candles_seed_once(data_agent):
+    """History seeds the aggregator once; later calls are served from memory."""
+    start = pd.Timestamp.now().floor('D') - pd.Timedelta(days=1) + pd.Timedelta(hours=3, minutes=45)
+    history = pd.DataFrame({
+        'open': [100.0] * 30, 'high': [101.0] * 30, 'low': [99.0] * 30,
+        'close': [100.5] * 30, 'volume': [10.0] * 30,
+        'timestamp': pd.date_range(start, periods=30, freq='min'),
+    })
+    data_agent.fetch_historical_data = Mock(return_value=history)
+    data_agent.candles.gaps = Mock(return_value=[])
+
+    first = data_agent.get_live_candles(13, 'NSE_FNO', 'FUTIDX', timeframe='15')
+    second = data_agent.get_live_candles(13, 'NSE_FNO', 'FUTIDX', timeframe='5')
+
+    assert len(first) == 2
+    assert len(second) == 6
+    assert data_agent.fetch_historical_data.call_count == 1
+    assert data_agent.fetch_historical_data.call_args.kwargs['timeframe'] == '1'
+
+
+def test_concurrent_requests_coalesce(data_agent, monkeypatch):
+    """Threads and asyncio tasks asking for positions at once share one API call."""
+    import asyncio
+    import threading
+
+    calls = []
+
+    async def slow_positions():
+        calls.append(1)
+        await asyncio.sleep(0.2)
+        return {"status": "success", "data": [{"securityId": "13"}]}
+
+    monkeypatch.setattr(data_agent.dhan.aio, "get_positions", slow_positions)
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(data_agent.get_positions())) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+
+    async def tasks():
+        return await asyncio.gather(*[data_agent.get_positions_async() for _ in range(3)])
+
+    results.extend(asyncio.run(tasks()))
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert len(results) == 6
+    assert all(r["data"] == [{"securityId": "13"}] for r in results)
+    assert data_agent._inflight.stats()["joined"] == 5
+
+
+def test_option_chain_retries_back_off(data_agent, monkeypatch):
+    """Failed option chain attempts wait with the client's jittered backoff before retrying."""
+    import asyncio
+    from src.agents import data_agent as data_agent_module
+
+    attempts = []
+    delays = []
+
+    async def flaky_chain(**kwargs):
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise ConnectionError("reset")
+        return {"status": "success", "data": {"data": {"last_price": 25000.0, "oc": {
+            "25000.000000": {"ce": {"last_price": 120.0, "oi": 10}},
+        }}}}
+
+    def fake_backoff(attempt, retry_after=None):
+        delays.append(attempt)
+        return 0.0
+
+    monkeypatch.setattr(data_agent.dhan.aio, "option_chain", flaky_chain)
+    monkeypatch.setattr(data_agent_module, "backoff_delay", fake_backoff)
+
+    df = asyncio.run(data_agent.fetch_option_chain_async(13, "IDX_I", "2025-10-30"))
+
+    assert len(attempts) == 3
+    assert delays == [0, 1]
+    assert df["strike"].tolist() == [25000.0]
+
+
+def test_unsubscribe_releases_ticks_and_candles(data_agent):
+    """Securities dropped from the feed free their tick buffer and candles."""
+    class Feed:
+        instruments = [(2, "111", 17), (2, "222", 17)]
+
+        def unsubscribe_symbols(self, symbols):
+            self.instruments = [i for i in self.instruments if i not in symbols]
+
+        def subscribe_symbols(self, symbols):
+            self.instruments = self.instruments + list(symbols)
+
+    data_agent.market_feed = Feed()
+    data_agent.is_running = True
+    for security_id in ("111", "222"):
+        data_agent.tick_store.record({"security_id": security_id, "LTP": "100"}, timestamp=1.0)
+        data_agent.candles.on_tick(security_id, 1.0, 100.0)
+
+    assert data_agent.update_subscriptions([(2, "222", 21)], [(2, "111", 17), (2, "222", 17)])
+
+    assert data_agent.tick_store.securities() == ["222"]
+    assert data_agent.candles.securities() == ["222"]
@@ -0,0 +1,178 @@
+"""Tests for the pooled Dhan REST client."""
+import asyncio
+import threading
+import pytest
+from aiohttp import web
+from dhanhq import DhanContext
+
+from src.utils import dhan_client
+from src.utils.dhan_client import DhanClient, AsyncDhanClient, endpoint_category
+from src.utils import rate_limiter
+from src.utils.rate_limiter import TokenBucket, PRIORITY_ORDER, PRIORITY_DASHBOARD
+
+FAST_LIMITS = {name: (1000.0, 100) for name in rate_limiter.RATE_LIMITS}
+
+
+@pytest.fixture
+def dhan_server(monkeypatch):
+    """Local stand-in for the Dhan API; yields the list of received requests."""
+    received = []
+    state = {"in_flight": 0, "peak": 0}
+
+    async def positions(request):
+        received.append((request.method, request.path, None, dict(request.headers)))
+        return web.json_response([{"securityId": "13"}])
+
+    async def option_chain(request):
+        body = await request.json()
+        received.append((request.method, request.path, body, dict(request.headers)))
+        state["in_flight"] += 1
+        state["peak"] = max(state["peak"], state["in_flight"])
+        await asyncio.sleep(0.05)
+        state["in_flight"] -= 1
+        return web.json_response({"data": {"oc": {}}})
+
+    async def rejected(request):
+        return web.json_response({"errorCode": "DH-906", "errorType": "Order_Error", "errorMessage": "bad"}, status=400)
+
+    async def flaky(request):
+        received.append((request.method, request.path, None, dict(request.headers)))
+        if request.path.endswith("orders") and len(received) == 1:
+            return web.json_response({"errorType": "Rate_Limit"}, status=429)
+        return web.json_response({"errorType": "Server"}, status=503)
+
+    app = web.Application()
+    app.router.add_get("/v2/positions", positions)
+    app.router.add_post("/v2/optionchain", option_chain)
+    app.router.add_post("/v2/super/orders", rejected)
+    app.router.add_get("/v2/fundlimit", flaky)
+    app.router.add_post("/v2/orders", flaky)
+
+    loop = asyncio.new_event_loop()
+    runner = web.AppRunner(app)
+    loop.run_until_complete(runner.setup())
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    loop.run_until_complete(site.start())
+    port = site._server.sockets[0].getsockname()[1]
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+
+    monkeypatch.setattr(dhan_client, "API_BASE_URL", f"http://127.0.0.1:{port}/v2")
+    yield received, state
+
+    asyncio.run_coroutine_threadsafe(runner.cleanup(), loop).result(5)
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(5)
+
+
+@pytest.fixture
+def client():
+    context = DhanContext("1000", "token-abc")
+    client = DhanClient(context, AsyncDhanClient(context, rate_limits=FAST_LIMITS))
+    yield client
+    client.close()
+
+
+def test_endpoint_category():
+    """Paths map to their limits category."""
+    assert endpoint_category("/super/orders") == "orders"
+    assert endpoint_category("/optionchain/expirylist") == "option_chain"
+    assert endpoint_category("/charts/intraday") == "history"
+    assert endpoint_category("/unknown") == "default"
+
+
+def test_sync_facade_returns_dhanhq_shape(dhan_server, client):
+    """Sync calls go through the pool and keep the dhanhq response format."""
+    received, _ = dhan_server
+
+    response = client.get_positions()
+
+    assert response == {"status": "success", "remarks": "", "data": [{"securityId": "13"}]}
+    assert received[0][3]["access-token"] == "token-abc"
+    assert received[0][3]["client-id"] == "1000"
+
+
+def test_error_response(dhan_server, client):
+    """Non-2xx responses carry the Dhan error fields."""
+    response = client.run(client.aio.post_super_order({"securityId": "1"}))
+
+    assert response["status"] == "failure"
+    assert response["status_code"] == 400
+    assert response["remarks"]["error_code"] == "DH-906"
+    assert client.aio.stats["orders"]["errors"] == 1
+
+
+def test_async_from_other_loop_respects_concurrency(dhan_server, client):
+    """Awaiting from another loop works and the option chain limit caps in-flight requests."""
+    received, state = dhan_server
+
+    async def burst():
+        return await asyncio.gather(*[
+            client.aio.option_chain(13, "IDX_I", "2025-01-30") for _ in range(6)
+        ])
+
+    responses = asyncio.run(burst())
+
+    assert all(r["status"] == "success" for r in responses)
+    assert received[0][2]["dhanClientId"] == "1000"
+    assert state["peak"] <= dhan_client.ENDPOINT_LIMITS["option_chain"]["concurrency"]
+
+
+def test_retry_with_backoff(dhan_server, client, monkeypatch):
+    """5xx reads are retried; order POSTs are retried only on 429."""
+    received, _ = dhan_server
+    monkeypatch.setattr(rate_limiter, "BACKOFF_BASE_SECONDS", 0.001)
+
+    order = client.run(client.aio.request("POST", "/orders", {"securityId": "1"}))
+    assert order["status_code"] == 503
+    assert len(received) == 2
+
+    funds = client.get_fund_limits()
+    assert funds["status_code"] == 503
+    assert len(received) == 2 + 1 + dhan_client.MAX_RETRIES
+    assert client.aio.scheduler.bucket("orders").metrics()["throttled"] == 1
+
+
+def test_bucket_serves_by_priority():
+    """Queued requests are granted highest priority first, at the bucket rate."""
+    async def scenario():
+        bucket = TokenBucket("quotes", rate=50.0, burst=1)
+        order = []
+
+        async def call(name, priority):
+            await bucket.acquire(priority)
+            order.append(name)
+
+        await bucket.acquire()
+        await asyncio.gather(
+            call("dashboard", PRIORITY_DASHBOARD),
+            call("background", rate_limiter.PRIORITY_BACKGROUND),
+            call("order", PRIORITY_ORDER),
+        )
+        return order, bucket.metrics()
+
+    order, metrics = asyncio.run(scenario())
+
+    assert order == ["order", "background", "dashboard"]
+    assert metrics["granted"] == 4
+    assert metrics["max_queue_depth"] == 3
+    assert metrics["max_wait_ms"] >= 40
+
+
+def test_priority_context_reaches_client_loop():
+    """request_priority set by a sync caller is visible to the coroutine on the client loop."""
+    context = DhanContext("1000", "token-abc")
+    client = AsyncDhanClient(context)
+
+    async def read_priority():
+        return rate_limiter.current_priority("quotes")
+
+    with rate_limiter.request_priority(PRIORITY_DASHBOARD):
+        assert client.run_sync(read_priority()) == PRIORITY_DASHBOARD
+    assert client.run_sync(read_priority()) == rate_limiter.PRIORITY_BACKGROUND
+
+
+def test_min_request_interval():
+    """Polling rounds are sized to the category's bucket rate."""
+    assert rate_limiter.min_request_interval("option_chain", 3) == pytest.approx(9.0)
+    assert rate_limiter.min_request_interval("quotes", 2) == pytest.approx(2.0)
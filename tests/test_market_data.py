@@ -0,0 +1,457 @@
+"""Tests for live market data structures."""
+import asyncio
+import threading
+import time
+import pytest
+import numpy as np
+import pandas as pd
+
+from src.utils.tick_store import TickRingBuffer, TickStore
+from src.utils.candle_aggregator import CandleAggregator, resample_candles, SESSION_ANCHOR_SECONDS
+from src.utils.feed_supervisor import FeedSupervisor
+from src.utils.subscription_manager import SubscriptionManager, make_instrument
+from dhanhq import MarketFeed
+
+
+class TestTickRingBuffer:
+    """Test the per-security ring buffer."""
+
+    def test_append_and_latest(self):
+        """Ticks come back in chronological order."""
+        buffer = TickRingBuffer(depth=5)
+        for i in range(3):
+            buffer.append(float(i), 100.0 + i, volume=i)
+
+        assert len(buffer) == 3
+        assert buffer.latest()['ltp'].tolist() == [100.0, 101.0, 102.0]
+        assert buffer.latest(2)['timestamp'].tolist() == [1.0, 2.0]
+        assert buffer.last()['ltp'] == 102.0
+
+    def test_drop_oldest_when_full(self):
+        """The oldest ticks are overwritten once the buffer wraps."""
+        buffer = TickRingBuffer(depth=4)
+        for i in range(10):
+            buffer.append(float(i), float(i))
+
+        assert len(buffer) == 4
+        assert buffer.total == 10
+        assert buffer.latest()['ltp'].tolist() == [6.0, 7.0, 8.0, 9.0]
+        assert buffer.latest(3)['ltp'].tolist() == [7.0, 8.0, 9.0]
+
+    def test_segments_are_views(self):
+        """segments() returns views into the buffer, not copies."""
+        buffer = TickRingBuffer(depth=4)
+        for i in range(6):
+            buffer.append(float(i), float(i))
+
+        older, newer = buffer.segments()
+        assert np.concatenate([older, newer])['ltp'].tolist() == [2.0, 3.0, 4.0, 5.0]
+        assert np.shares_memory(older, buffer._data)
+        assert np.shares_memory(newer, buffer._data)
+
+
+class TestTickStore:
+    """Test parsing feed messages into the store."""
+
+    def test_record_feed_messages(self):
+        """Quote/full messages append ticks; OI messages carry forward."""
+        store = TickStore(depth=10)
+        assert not store.record({'type': 'OI Data', 'security_id': 37054, 'OI': 1200})
+        assert store.record({
+            'type': 'Full Data', 'security_id': 37054, 'LTP': '24510.50', 'volume': 5000,
+            'depth': [{'bid_price': '24510.00', 'ask_price': '24511.00'}],
+        }, timestamp=1.0)
+        assert store.record({'type': 'Ticker Data', 'security_id': 37054, 'LTP': '24512.00'}, timestamp=2.0)
+
+        ticks = store.get(37054).latest()
+        assert ticks['ltp'].tolist() == [24510.5, 24512.0]
+        assert ticks['oi'].tolist() == [1200, 1200]
+        assert ticks['volume'].tolist() == [5000, 5000]
+        assert ticks['ask'][-1] == 24511.0
+        assert store.securities() == ['37054']
+
+    def test_discard_releases_buffer(self):
+        """Discarded securities free their buffer and start fresh if they return."""
+        store = TickStore(depth=8)
+        store.record({'type': 'Quote Data', 'security_id': 37054, 'LTP': '100', 'OI': 50}, timestamp=1.0)
+
+        assert store.discard(37054)
+        assert store.get(37054) is None and store.securities() == []
+        assert not store.discard(37054)
+
+        store.record({'type': 'Ticker Data', 'security_id': 37054, 'LTP': '101'}, timestamp=2.0)
+        assert store.get(37054).latest()['oi'].tolist() == [0]
+
+
+# 2024-01-02 09:15 IST
+OPEN_EPOCH = 1704153600 + SESSION_ANCHOR_SECONDS
+
+
+def minute_history(start_epoch, n):
+    """1-minute history frame shaped like fetch_historical_data output."""
+    close = 100.0 + np.arange(n)
+    return pd.DataFrame({
+        'open': close - 0.5,
+        'high': close + 1.0,
+        'low': close - 1.0,
+        'close': close,
+        'volume': np.full(n, 10.0),
+        'timestamp': pd.to_datetime(start_epoch + 60 * np.arange(n), unit='s'),
+    })
+
+
+class TestCandleAggregator:
+    """Test tick-to-candle aggregation."""
+
+    def test_ticks_build_candles(self):
+        """OHLC follows ticks and volume is the delta of cumulative day volume."""
+        candles = CandleAggregator()
+        ticks = [(0, 100.0, 1000), (20, 103.0, 1010), (40, 99.0, 1030), (70, 101.0, 1035)]
+        for offset, price, volume in ticks:
+            candles.on_tick('13', OPEN_EPOCH + offset, price, volume)
+
+        one = candles.get_candles('13', 1)
+        assert one[['open', 'high', 'low', 'close']].iloc[0].tolist() == [100.0, 103.0, 99.0, 99.0]
+        assert one['volume'].tolist() == [30.0, 5.0]
+        assert one['timestamp'].iloc[0] == pd.to_datetime(OPEN_EPOCH, unit='s')
+
+        five = candles.get_candles('13', 5)
+        assert len(five) == 1
+        assert five['close'].iloc[0] == 101.0
+        assert len(candles.get_candles('13', 1, include_partial=False)) == 1
+
+    def test_resample_aligns_to_session_open(self):
+        """15-minute buckets start at 09:15 IST."""
+        frame = resample_candles(minute_history(OPEN_EPOCH, 30), 15)
+
+        assert len(frame) == 2
+        assert frame['timestamp'].iloc[0] == pd.to_datetime(OPEN_EPOCH, unit='s')
+        assert frame['open'].iloc[0] == 99.5
+        assert frame['close'].iloc[0] == 114.0
+        assert frame['volume'].tolist() == [150.0, 150.0]
+
+    def test_discard_releases_series(self):
+        """A discarded security's candles, seed flag and volume baseline are dropped."""
+        candles = CandleAggregator()
+        candles.seed('13', minute_history(OPEN_EPOCH, 5))
+        candles.on_tick('13', OPEN_EPOCH + 5 * 60, 105.0, 1000)
+
+        assert candles.discard('13')
+        assert candles.securities() == []
+        assert not candles.is_seeded('13')
+        assert candles.get_candles('13', 1).empty
+
+        candles.on_tick('13', OPEN_EPOCH + 6 * 60, 106.0, 1200)
+        assert candles.get_candles('13', 1)['volume'].tolist() == [0.0]
+
+    def test_seed_keeps_forming_candle_live(self):
+        """History fills completed candles without clobbering the live one."""
+        candles = CandleAggregator()
+        candles.on_tick('13', OPEN_EPOCH + 10 * 60 + 5, 500.0, 0)
+        candles.seed('13', minute_history(OPEN_EPOCH, 11))
+
+        one = candles.get_candles('13', 1)
+        assert len(one) == 11
+        assert one['close'].iloc[-1] == 500.0
+        assert one['close'].iloc[-2] == 109.0
+        assert candles.is_seeded('13')
+
+    def test_gaps(self):
+        """In-session holes and a silent feed are reported; overnight jumps are not."""
+        candles = CandleAggregator()
+        history = pd.concat([
+            minute_history(OPEN_EPOCH - 86400 + 374 * 60, 1),
+            minute_history(OPEN_EPOCH, 3),
+            minute_history(OPEN_EPOCH + 10 * 60, 2),
+        ])
+        candles.seed('13', history)
+
+        gaps = candles.gaps('13', now=OPEN_EPOCH + 20 * 60 + 30)
+        assert gaps == [
+            (OPEN_EPOCH + 3 * 60, OPEN_EPOCH + 10 * 60),
+            (OPEN_EPOCH + 12 * 60, OPEN_EPOCH + 20 * 60),
+        ]
+        assert candles.gaps('13', now=OPEN_EPOCH + 12 * 60 + 5) == [gaps[0]]
+
+    def test_gaps_bounded_to_sessions(self):
+        """Pre-open candles, weekends and backfilled ranges do not produce gaps."""
+        candles = CandleAggregator()
+        candles.seed('13', pd.concat([
+            minute_history(OPEN_EPOCH - 10 * 60, 1),
+            minute_history(OPEN_EPOCH + 5 * 60, 2),
+        ]))
+
+        now = OPEN_EPOCH + 30 * 60
+        assert candles.gaps('13', now=now) == [
+            (OPEN_EPOCH, OPEN_EPOCH + 5 * 60),
+            (OPEN_EPOCH + 7 * 60, OPEN_EPOCH + 30 * 60),
+        ]
+
+        saturday = OPEN_EPOCH + 4 * 86400
+        assert candles.gaps('13', now=saturday + 60 * 60) == [(OPEN_EPOCH, OPEN_EPOCH + 5 * 60)]
+
+        candles.mark_backfilled('13', [(OPEN_EPOCH, OPEN_EPOCH + 5 * 60), (OPEN_EPOCH + 7 * 60, OPEN_EPOCH + 20 * 60)])
+        assert candles.gaps('13', now=now) == [(OPEN_EPOCH + 20 * 60, OPEN_EPOCH + 30 * 60)]
+
+
+class TestCandleStore:
+    """Test the on-disk candle cache."""
+
+    @pytest.fixture
+    def store(self, tmp_path):
+        from src.utils.candle_store import CandleStore
+        return CandleStore(tmp_path / "candles.db")
+
+    def test_closed_days_fetched_once(self, store):
+        """Past days are cached; the current day is always refetched."""
+        calls = []
+
+        def fetch(start, end, interval):
+            calls.append((start, end, interval))
+            return minute_history(OPEN_EPOCH, 30)
+
+        today = pd.Timestamp('2024-01-03').date()
+        first = store.get_candles('13', 'NSE_FNO', 5, '2024-01-02', '2024-01-03', fetch, today=today)
+        second = store.get_candles('13', 'NSE_FNO', 5, '2024-01-02', '2024-01-02', fetch, today=today)
+
+        assert calls == [('2024-01-02', '2024-01-04', 5)]
+        assert len(first) == len(second) == 30
+        assert second['timestamp'].iloc[0] == pd.to_datetime(OPEN_EPOCH, unit='s')
+
+        store.get_candles('13', 'NSE_FNO', 5, '2024-01-02', '2024-01-03', fetch, today=today)
+        assert calls[-1] == ('2024-01-03', '2024-01-04', 5)
+
+    def test_oi_request_refetches_days_without_oi(self, store):
+        """Days stored without open interest are a miss for OI requests, not the other way round."""
+        calls = []
+
+        def fetch(start, end, interval):
+            calls.append(start)
+            return minute_history(OPEN_EPOCH, 5).assign(open_interest=1500.0)
+
+        today = pd.Timestamp('2024-01-10').date()
+        plain = store.get_candles('13', 'NSE_FNO', 1, '2024-01-02', '2024-01-02',
+                                  lambda *a: minute_history(OPEN_EPOCH, 5), today=today)
+        with_oi = store.get_candles('13', 'NSE_FNO', 1, '2024-01-02', '2024-01-02', fetch, today=today, oi=True)
+        store.get_candles('13', 'NSE_FNO', 1, '2024-01-02', '2024-01-02', fetch, today=today, oi=True)
+        store.get_candles('13', 'NSE_FNO', 1, '2024-01-02', '2024-01-02', fetch, today=today)
+
+        assert 'open_interest' not in plain.columns
+        assert calls == ['2024-01-02']
+        assert with_oi['open_interest'].tolist() == [1500.0] * 5
+
+    def test_store_without_oi_column_is_migrated(self, tmp_path):
+        """A store created before OI tracking gains the column; its days count as fetched without OI."""
+        import sqlite3
+        from src.utils.candle_store import CandleStore
+
+        path = tmp_path / "old.db"
+        with sqlite3.connect(path) as conn:
+            conn.execute(
+                "CREATE TABLE candle_days (security_id TEXT NOT NULL, exchange_segment TEXT NOT NULL, "
+                "interval INTEGER NOT NULL, day TEXT NOT NULL, rows INTEGER NOT NULL, fetched_at TEXT NOT NULL, "
+                "PRIMARY KEY (security_id, exchange_segment, interval, day)) WITHOUT ROWID"
+            )
+            conn.execute("INSERT INTO candle_days VALUES ('13', 'NSE_FNO', 1, '2024-01-02', 5, 'x')")
+        conn.close()
+
+        store = CandleStore(path)
+        assert store.cached_days('13', 'NSE_FNO', 1) == [pd.Timestamp('2024-01-02').date()]
+        assert store.cached_days('13', 'NSE_FNO', 1, oi=True) == []
+
+    def test_missing_ranges_skip_weekends(self, store):
+        """A Friday-to-Monday hole is one fetch; failed fetches are not cached."""
+        today = pd.Timestamp('2024-01-20').date()
+        ranges = store.missing_ranges('13', 'NSE_FNO', 1, '2024-01-11', '2024-01-16', today=today)
+        assert [(a.isoformat(), b.isoformat()) for a, b in ranges] == [('2024-01-11', '2024-01-16')]
+
+        store.get_candles('13', 'NSE_FNO', 1, '2024-01-11', '2024-01-16', lambda *a: None, today=today)
+        assert store.cached_days('13', 'NSE_FNO', 1) == []
+
+    def test_non_native_interval_resampled(self, store):
+        """3-minute candles come from the cached 1-minute series."""
+        calls = []
+
+        def fetch(start, end, interval):
+            calls.append(interval)
+            return minute_history(OPEN_EPOCH, 30)
+
+        today = pd.Timestamp('2024-01-10').date()
+        frame = store.get_candles('13', 'NSE_FNO', 3, '2024-01-02', '2024-01-02', fetch, today=today)
+
+        assert calls == [1]
+        assert len(frame) == 10
+        assert frame['volume'].iloc[0] == 30.0
+
+
+class FakeSocket:
+    async def ping(self):
+        future = asyncio.get_running_loop().create_future()
+        future.set_result(None)
+        return future
+
+    async def close(self):
+        pass
+
+
+class FakeFeed:
+    """MarketFeed stand-in replaying a script of messages, errors and silences."""
+
+    def __init__(self, script):
+        self.script = list(script)
+        self.instruments = [(2, "13", 17)]
+        self.ws = None
+        self.connect_calls = 0
+
+    async def connect(self):
+        self.connect_calls += 1
+        self.ws = FakeSocket()
+
+    async def get_instrument_data(self):
+        item = self.script.pop(0) if self.script else "silence"
+        if item == "silence":
+            await asyncio.sleep(1)
+        if isinstance(item, Exception):
+            raise item
+        return item
+
+
+class TestFeedSupervisor:
+    """Test reconnects, stall detection and gap reporting."""
+
+    def run(self, supervisor, until):
+        async def scenario():
+            await asyncio.wait_for(supervisor.run(lambda: not until()), 5)
+        asyncio.run(scenario())
+
+    def test_reconnect_reports_gap(self):
+        """A dropped connection reconnects (resubscribing) and reports the outage window."""
+        feed = FakeFeed([{"security_id": "13"}, {"security_id": "13"}, ConnectionError("reset"), {"security_id": "13"}])
+        received, gaps = [], []
+        backfilled = threading.Event()
+        supervisor = FeedSupervisor(
+            feed, received.append,
+            on_reconnect=lambda start, end: (gaps.append((start, end)), backfilled.set()),
+            backoff_base=0.001,
+        )
+
+        self.run(supervisor, until=lambda: len(received) == 3)
+
+        assert backfilled.wait(2)
+        assert feed.connect_calls == 2
+        metrics = supervisor.metrics()
+        assert metrics["reconnects"] == 1
+        assert metrics["messages"] == 3
+        assert metrics["last_error"] == "reset"
+        assert metrics["last_tick_age_sec"] < 1
+        start, end = gaps[0]
+        assert start <= end
+
+    def test_stalled_feed_reconnects(self):
+        """Silence past stale_seconds during market hours forces a reconnect."""
+        feed = FakeFeed([{"security_id": "13"}])
+        supervisor = FeedSupervisor(
+            feed, lambda message: None,
+            heartbeat_seconds=0.02, stale_seconds=0.05, backoff_base=0.001,
+            is_market_open=lambda: True,
+        )
+
+        self.run(supervisor, until=lambda: supervisor.reconnects >= 1)
+
+        assert supervisor.stalls >= 1
+        assert feed.connect_calls >= 2
+
+    def test_quiet_market_is_not_stalled(self):
+        """Outside market hours a silent but responsive socket stays connected."""
+        feed = FakeFeed([])
+        supervisor = FeedSupervisor(
+            feed, lambda message: None,
+            heartbeat_seconds=0.01, stale_seconds=0.02, is_market_open=lambda: False,
+        )
+        deadline = [None]
+
+        def until():
+            deadline[0] = deadline[0] or time.monotonic() + 0.2
+            return time.monotonic() > deadline[0]
+
+        self.run(supervisor, until=until)
+
+        assert supervisor.stalls == 0
+        assert feed.connect_calls == 1
+
+
+class TestSubscriptionManager:
+    """Test group diffing and option window re-centring."""
+
+    def manager(self, calls):
+        running = []
+
+        def start(instruments):
+            calls.append(("start", instruments, []))
+            running.append(True)
+            return True
+
+        def update(add, remove):
+            calls.append(("update", add, remove))
+            return True
+
+        return SubscriptionManager(start, update, lambda: bool(running), strikes_each_side=1)
+
+    def test_groups_sync_as_one_batch(self):
+        """The first sync starts the feed; later syncs send only the difference."""
+        calls = []
+        manager = self.manager(calls)
+        futures = make_instrument("NSE_FNO", 52168)
+        manager.set_group("futures", [futures])
+        manager.sync()
+        manager.set_group("positions", [make_instrument("NSE_FNO", "40001"), make_instrument("NSE_FNO", 40002)])
+        manager.sync()
+        manager.set_group("positions", [make_instrument("NSE_FNO", 40002)])
+        manager.set_group("futures", [futures])
+
+        assert manager.sync() == {"subscribed": 0, "unsubscribed": 1}
+        assert calls[0] == ("start", [futures], [])
+        assert calls[1][1] == [(2, "40001", 17), (2, "40002", 17)]
+        assert calls[2] == ("update", [], [(2, "40001", 17)])
+        assert manager.sync() == {"subscribed": 0, "unsubscribed": 0}
+        assert len(calls) == 3
+
+    def test_recenter_with_hysteresis(self):
+        """With the default hysteresis the ATM window moves only once spot is two strikes away."""
+        calls = []
+        manager = self.manager(calls)
+        strikes = np.arange(24800.0, 25400.0, 50.0)
+        resolved = []
+
+        def resolve(symbol, expiry, window):
+            resolved.append(window.tolist())
+            return [int(strike) for strike in window]
+
+        assert manager.recenter_options("NIFTY", "2025-10-28", 25010.0, strikes, resolve)
+        assert not manager.recenter_options("NIFTY", "2025-10-28", 25060.0, strikes, resolve)
+        assert manager.recenter_options("NIFTY", "2025-10-28", 25110.0, strikes, resolve)
+
+        assert resolved == [[24950.0, 25000.0, 25050.0], [25050.0, 25100.0, 25150.0]]
+        manager.sync()
+        assert {sid for _, sid, _ in manager.subscribed()} == {"25050", "25100", "25150"}
+        assert manager.metrics()["option_center"] == 25100.0
+
+    def test_no_churn_around_strike_midpoint(self):
+        """Spot oscillating across a strike midpoint never re-centres the window."""
+        calls = []
+        manager = self.manager(calls)
+        strikes = np.arange(24800.0, 25400.0, 50.0)
+        resolve = lambda symbol, expiry, window: [int(strike) for strike in window]
+
+        assert manager.recenter_options("NIFTY", "2025-10-28", 25000.0, strikes, resolve)
+        for spot in [25024.0, 25026.0, 24974.0, 24976.0] * 5:
+            assert not manager.recenter_options("NIFTY", "2025-10-28", spot, strikes, resolve)
+        assert manager.metrics()["recenters"] == 1
+
+    def test_feed_exchange_codes(self):
+        """Segments map to their own feed exchange; unknown segments are rejected."""
+        assert make_instrument("IDX_I", 13)[0] == MarketFeed.IDX
+        assert make_instrument("NSE_EQ", 2885)[0] == MarketFeed.NSE
+        assert make_instrument("NSE_FNO", 52168)[0] == MarketFeed.NSE_FNO
+        with pytest.raises(ValueError):
+            make_instrument("NSE_XYZ", 1)
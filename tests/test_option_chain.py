@@ -0,0 +1,211 @@
+"""Tests for the flat option chain parser."""
+import sys
+import time
+from datetime import date, datetime
+import numpy as np
+import pandas as pd
+
+from src.config import config
+from src.agents.options_agent import OptionsAnalysisAgent
+from src.utils.option_chain import parse_option_chain, greeks_coverage, OPTION_CHAIN_COLUMNS
+from src.utils.option_chain_poller import OptionChainPoller, diff_chains, chains_equal
+from src.utils.option_chain_archive import OptionChainArchive, ARCHIVE_FIELDS
+
+
+def side(ltp, oi, previous_oi, greeks=None):
+    data = {"last_price": ltp, "oi": oi, "previous_oi": previous_oi, "volume": 100, "implied_volatility": 12.5}
+    if greeks is not None:
+        data["greeks"] = greeks
+    return data
+
+
+OC = {
+    "25100.000000": {
+        "ce": side(80.0, 1500, 1000, {"delta": 0.45, "theta": -12.0, "gamma": 0.001, "vega": 11.0}),
+        "pe": side(95.0, 2500, 3000, {"delta": -0.55, "theta": -10.0, "gamma": 0.001, "vega": 11.5}),
+    },
+    "25000.000000": {
+        "ce": side(140.0, 1000, 900, {"delta": 0.6, "theta": -13.0, "gamma": 0.0012, "vega": 10.0}),
+        "pe": side(50.0, 3000, 2000),
+    },
+    "25200.000000": {"ce": side(40.0, 800, 800, {})},
+}
+
+
+def test_parse_flat_columns():
+    """Strikes are sorted, every column is float64 and missing greeks are NaN."""
+    df = parse_option_chain(OC)
+
+    assert list(df.columns) == OPTION_CHAIN_COLUMNS
+    assert (df.dtypes == np.float64).all()
+    assert df["strike"].tolist() == [25000.0, 25100.0, 25200.0]
+    assert df["call_oi_change"].tolist() == [100.0, 500.0, 0.0]
+    assert df["put_oi_change"].tolist() == [1000.0, -500.0, 0.0]
+    assert df.loc[1, "call_delta"] == 0.45
+    assert df.loc[1, "put_theta"] == -10.0
+    assert np.isnan(df.loc[0, "put_delta"])
+    assert np.isnan(df.loc[2, "call_vega"])
+    assert df.loc[2, "put_ltp"] == 0.0
+    assert greeks_coverage(df) == (2, 1)
+
+
+def test_parse_empty():
+    """An empty chain keeps the schema."""
+    df = parse_option_chain({})
+
+    assert df.empty
+    assert list(df.columns) == OPTION_CHAIN_COLUMNS
+
+
+def test_analysis_reads_flat_greeks():
+    """Theta metrics are derived from the flat greek columns."""
+    df = parse_option_chain(OC)
+
+    analysis = OptionsAnalysisAgent(config).analyze_option_chain(df, 25090.0, {})
+
+    assert df["call_has_valid_greeks"].tolist() == [True, True, False]
+    assert df["put_has_valid_greeks"].tolist() == [False, True, False]
+    assert df.loc[1, "call_theta_hourly"] == -12.0 / 6.5
+    assert np.isnan(df.loc[2, "call_quality_score"])
+    assert analysis["call_analysis"]["atm_strike"] == 25100.0
+    assert analysis["call_analysis"]["delta"] == 0.45
+    assert analysis["put_analysis"]["theta_daily"] == -10.0
+
+
+def test_diff_chains_aligns_strikes():
+    """Changes are matched by strike; new strikes have NaN changes."""
+    previous = parse_option_chain(OC)
+    oc = {**OC, "25300.000000": {"ce": side(20.0, 100, 0, {})}}
+    oc["25100.000000"] = {**OC["25100.000000"], "ce": side(85.0, 1800, 1000, {"delta": 0.47})}
+    current = parse_option_chain(oc)
+
+    diff = diff_chains(previous, current)
+
+    assert diff["strike"].tolist() == [25000.0, 25100.0, 25200.0, 25300.0]
+    assert diff.loc[1, "call_oi_change"] == 300.0
+    assert diff.loc[1, "call_ltp_change"] == 5.0
+    assert diff.loc[0, "put_oi_change"] == 0.0
+    assert np.isnan(diff.loc[3, "call_oi_change"])
+
+
+def test_poller_publishes_changes():
+    """Polls store snapshots, keep diff history and publish only significant changes."""
+    snapshots = [parse_option_chain(OC), parse_option_chain(OC)]
+    changed = dict(OC)
+    changed["25000.000000"] = {**OC["25000.000000"], "pe": side(55.0, 3400, 2000)}
+    snapshots.append(parse_option_chain(changed))
+    events = []
+    poller = OptionChainPoller(fetch=lambda expiry: snapshots.pop(0), expiries=lambda: ["2025-10-28"])
+    poller.subscribe(events.append)
+
+    for _ in range(3):
+        poller.poll_once("2025-10-28")
+
+    assert len(events) == 1
+    assert events[0]["changes"]["strike"].tolist() == [25000.0]
+    assert events[0]["changes"].loc[0, "put_oi_change"] == 400.0
+    assert len(poller.oi_flow("2025-10-28")) == 2 * len(OC)
+
+    latest = poller.latest("2025-10-28", max_age=60)
+    latest["call_ltp"] = 0.0
+    assert poller.latest("2025-10-28")["put_ltp"].iloc[0] == 55.0
+    assert poller.latest("2025-10-28")["call_ltp"].iloc[0] == 140.0
+    assert poller.latest("2025-11-04") is None
+
+
+def test_archive_load_day_and_replay(tmp_path):
+    """Snapshots round-trip as a strike x field x timestamp array and replay in order."""
+    archive = OptionChainArchive(tmp_path)
+    first = parse_option_chain({k: v for k, v in OC.items() if k != "25200.000000"})
+    first.attrs["spot_price"] = 25080.0
+    second = parse_option_chain(OC)
+    second.attrs["spot_price"] = 25095.0
+
+    archive.append("NIFTY", "2025-10-28", first, datetime(2025, 10, 27, 9, 20))
+    archive.append("NIFTY", "2025-10-28", second, datetime(2025, 10, 27, 9, 21))
+    day = archive.load_day("NIFTY", "2025-10-28", "2025-10-27", fields=["call_oi", "put_ltp"])
+
+    assert archive.days("NIFTY", "2025-10-28") == ["2025-10-27"]
+    assert day["data"].shape == (3, 2, 2)
+    assert day["strikes"].tolist() == [25000.0, 25100.0, 25200.0]
+    assert day["spot_price"].tolist() == [25080.0, 25095.0]
+    assert day["data"][1, 0].tolist() == [1500.0, 1500.0]
+    assert np.isnan(day["data"][2, 0, 0]) and day["data"][2, 0, 1] == 800.0
+
+    archive.append("NIFTY", "2025-10-28", first, datetime(2025, 10, 27, 9, 22))
+    replay = list(archive.iter_snapshots("NIFTY", "2025-10-28", "2025-10-27"))
+
+    assert [ts.minute for ts, _ in replay] == [20, 21, 22]
+    pd.testing.assert_frame_equal(replay[1][1], second)
+    assert replay[2][1].attrs["spot_price"] == 25080.0
+
+
+def test_archive_disabled_without_pyarrow(tmp_path, monkeypatch):
+    """Archiving is skipped, not fatal, when pyarrow is not installed."""
+    monkeypatch.setitem(sys.modules, "pyarrow", None)
+    archive = OptionChainArchive(tmp_path)
+    chain = parse_option_chain(OC)
+
+    assert not archive.enabled
+    assert not archive.append("NIFTY", "2025-10-28", chain, datetime(2025, 10, 27, 9, 20))
+    assert archive.load_day("NIFTY", "2025-10-28", "2025-10-27")["data"].shape == (0, len(ARCHIVE_FIELDS), 0)
+    assert list(archive.iter_snapshots("NIFTY", "2025-10-28", "2025-10-27")) == []
+
+
+def test_poller_paused_outside_market_hours(monkeypatch):
+    """The poller makes no requests while the market is closed and resumes at the open."""
+    from src.utils import helpers
+
+    class Clock(datetime):
+        current = datetime(2025, 10, 25, 11, 0)  # Saturday
+
+        @classmethod
+        def now(cls, tz=None):
+            return cls.current
+
+    monkeypatch.setattr(helpers, "datetime", Clock)
+    fetched = []
+
+    def fetch(expiry):
+        fetched.append(expiry)
+        return parse_option_chain(OC)
+
+    poller = OptionChainPoller(fetch=fetch, expiries=lambda: ["2025-10-28"], interval=0.01, closed_recheck_seconds=0.01)
+    poller.start()
+    try:
+        time.sleep(0.1)
+        assert fetched == []
+
+        Clock.current = datetime(2025, 10, 27, 10, 0)  # Monday, session open
+        deadline = time.monotonic() + 2
+        while not fetched and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert fetched
+    finally:
+        poller.stop()
+
+
+def test_chains_equal():
+    """Unchanged polls compare equal, so the archive can skip them."""
+    chain = parse_option_chain(OC)
+    assert chains_equal(chain, parse_option_chain(OC))
+
+    changed = dict(OC)
+    changed["25000.000000"] = {**OC["25000.000000"], "pe": side(55.0, 3400, 2000)}
+    assert not chains_equal(chain, parse_option_chain(changed))
+    assert not chains_equal(chain, chain.iloc[1:])
+
+
+def test_archive_prunes_old_days(tmp_path):
+    """Day directories older than the retention window are deleted when a new day opens."""
+    archive = OptionChainArchive(tmp_path, retention_days=5)
+    chain = parse_option_chain(OC)
+    archive.append("NIFTY", "2025-10-07", chain, datetime(2025, 10, 1, 9, 20))
+    archive.append("NIFTY", "2025-10-28", chain, datetime(2025, 10, 20, 9, 20))
+    archive.append("NIFTY", "2025-10-28", chain, datetime(2025, 10, 27, 9, 20))
+
+    assert archive.days("NIFTY", "2025-10-28") == ["2025-10-27"]
+    assert not (tmp_path / "NIFTY" / "2025-10-07").exists()
+    assert archive.prune(date(2025, 10, 30)) == 0
+    assert archive.prune(date(2025, 11, 5)) == 1
+    assert not (tmp_path / "NIFTY").exists()
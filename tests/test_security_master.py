@@ -0,0 +1,340 @@
+"""Tests for SecurityMaster."""
+import pytest
+import pandas as pd
+from datetime import date, datetime
+
+from src.utils.security_master import SecurityMaster
+
+
+SCRIP_ROWS = [
+    # exch, segment, security_id, instrument, custom_symbol, expiry, strike, option_type
+    ("NSE", "D", 40001, "OPTIDX", "NIFTY 28 OCT 26200 CALL", "28/10/25 14:30", 26200.0, "CE"),
+    ("NSE", "D", 40002, "OPTIDX", "NIFTY 28 OCT 26200 PUT", "28/10/25 14:30", 26200.0, "PE"),
+    ("NSE", "D", 40003, "OPTIDX", "NIFTY 28 OCT 26250 CALL", "28/10/25 14:30", 26250.0, "CE"),
+    ("NSE", "D", 40004, "OPTIDX", "NIFTY 04 NOV 26200 CALL", "04/11/25 14:30", 26200.0, "CE"),
+    ("NSE", "D", 50001, "OPTIDX", "BANKNIFTY 25 NOV 58000 PUT", "25/11/25 14:30", 58000.0, "PE"),
+    ("NSE", "D", 37054, "FUTIDX", "NIFTY OCT FUT", "28/10/25 14:30", -0.01, "XX"),
+    ("NSE", "D", 37055, "FUTIDX", "NIFTY NOV FUT", "25/11/25 14:30", -0.01, "XX"),
+    ("NSE", "D", 37056, "FUTIDX", "NIFTY DEC FUT", "30/12/25 14:30", -0.01, "XX"),
+    ("NSE", "D", 52175, "FUTIDX", "BANKNIFTY NOV FUT", "25/11/25 14:30", -0.01, "XX"),
+    ("NSE", "E", 2885, "EQUITY", "Reliance Industries", None, None, None),
+    ("NSE", "I", 13, "INDEX", "Nifty 50", None, None, None),
+]
+
+
+@pytest.fixture
+def scrip_master_csv(tmp_path):
+    """Write a small scrip master CSV."""
+    df = pd.DataFrame(SCRIP_ROWS, columns=[
+        "SEM_EXM_EXCH_ID", "SEM_SEGMENT", "SEM_SMST_SECURITY_ID", "SEM_INSTRUMENT_NAME",
+        "SEM_CUSTOM_SYMBOL", "SEM_EXPIRY_DATE", "SEM_STRIKE_PRICE", "SEM_OPTION_TYPE",
+    ])
+    path = tmp_path / "api-scrip-master.csv"
+    df.to_csv(path, index=False)
+    return path
+
+
+@pytest.fixture
+def master(scrip_master_csv):
+    """Create SecurityMaster from the sample CSV."""
+    return SecurityMaster(csv_path=str(scrip_master_csv))
+
+
+class TestOptionIndex:
+    """Test structured option lookups."""
+
+    def test_index_built_on_load(self, master):
+        """Every option row is indexed, futures and equities are not."""
+        assert len(master._option_index) == 5
+        assert master.df.loc[master.df['SEM_SMST_SECURITY_ID'] == 40001, 'strike'].iloc[0] == 26200.0
+
+    def test_lookup_call_and_put(self, master):
+        """Index lookup resolves calls and puts."""
+        assert master.get_option_security_id("NIFTY", 26200, "CALL", "2025-10-28") == 40001
+        assert master.get_option_security_id("NIFTY", 26200.0, "PE", "2025-10-28") == 40002
+        assert master.get_option_security_id("BANKNIFTY", 58000, "PUT", "2025-11-25") == 50001
+
+    def test_lookup_distinguishes_expiry(self, master):
+        """Same strike on a different expiry maps to a different contract."""
+        assert master.get_option_security_id("NIFTY", 26200, "CALL", "2025-11-04") == 40004
+
+    def test_lookup_direct_probe(self, master):
+        """lookup_option is a pure index probe."""
+        assert master.lookup_option("nifty", 26250, "CALL", date(2025, 10, 28)) == 40003
+        assert master.lookup_option("NIFTY", 99999, "CALL", date(2025, 10, 28)) is None
+
+    def test_missing_contract(self, master):
+        """Unknown contracts fall through to the string scan and return None."""
+        assert master.get_option_security_id("NIFTY", 12345, "CALL", "2025-10-28") is None
+
+    def test_invalid_option_type(self, master):
+        """Invalid option types are rejected."""
+        assert master.get_option_security_id("NIFTY", 26200, "XX", "2025-10-28") is None
+
+    def test_string_fallback_without_expiry_column(self, tmp_path):
+        """Rows without a parseable expiry are still found by the legacy scan."""
+        df = pd.DataFrame({
+            "SEM_SMST_SECURITY_ID": [40001],
+            "SEM_CUSTOM_SYMBOL": ["NIFTY 28 OCT 26200 CALL"],
+        })
+        path = tmp_path / "no-expiry.csv"
+        df.to_csv(path, index=False)
+
+        master = SecurityMaster(csv_path=str(path))
+        assert master._option_index == {}
+        assert master.get_option_security_id("NIFTY", 26200, "CALL", "2025-10-28") == 40001
+
+
+class TestSnapshotCache:
+    """Test the binary scrip master snapshot."""
+
+    def test_snapshot_written_and_reused(self, scrip_master_csv):
+        """First load writes a snapshot, second load reads it back."""
+        from src.utils.scrip_master_cache import load_scrip_master, _snapshot_paths
+
+        first = load_scrip_master(scrip_master_csv)
+        data_path, meta_path = _snapshot_paths(scrip_master_csv)
+        assert data_path.exists() and meta_path.exists()
+
+        second = load_scrip_master(scrip_master_csv)
+        pd.testing.assert_frame_equal(first, second)
+        assert second['SEM_SMST_SECURITY_ID'].dtype == 'int64'
+        assert isinstance(second['SEM_SEGMENT'].dtype, pd.CategoricalDtype)
+
+    def test_snapshot_invalidated_on_csv_change(self, scrip_master_csv):
+        """A modified CSV is re-parsed instead of served from the snapshot."""
+        from src.utils.scrip_master_cache import load_scrip_master
+
+        load_scrip_master(scrip_master_csv)
+        with open(scrip_master_csv, 'a') as f:
+            f.write("NSE,D,40009,OPTIDX,NIFTY 28 OCT 26300 CALL,28/10/25 14:30,26300.0,CE\n")
+
+        master = SecurityMaster(csv_path=str(scrip_master_csv))
+        assert master.get_option_security_id("NIFTY", 26300, "CALL", "2025-10-28") == 40009
+
+    def test_unused_columns_dropped(self, tmp_path):
+        """Columns the app never reads are not loaded."""
+        from src.utils.scrip_master_cache import load_scrip_master
+
+        path = tmp_path / "extra.csv"
+        pd.DataFrame({
+            "SEM_SMST_SECURITY_ID": [1],
+            "SEM_CUSTOM_SYMBOL": ["NIFTY NOV FUT"],
+            "SEM_LOT_UNITS": [75],
+        }).to_csv(path, index=False)
+
+        df = load_scrip_master(path)
+        assert "SEM_LOT_UNITS" not in df.columns
+
+
+class TestLazySecurityMaster:
+    """Test background loading via the proxy."""
+
+    def test_background_load_and_status(self, scrip_master_csv):
+        """The proxy loads in a thread and reports its state."""
+        from src.utils.security_master import LazySecurityMaster
+
+        proxy = LazySecurityMaster(csv_path=str(scrip_master_csv))
+        assert proxy.status()["state"] == "idle"
+
+        proxy.start_background_load().join(timeout=10)
+        status = proxy.status()
+        assert status["state"] == "ready"
+        assert status["records"] == len(SCRIP_ROWS)
+        assert status["load_seconds"] is not None
+        assert proxy.get_option_security_id("NIFTY", 26200, "CALL", "2025-10-28") == 40001
+
+    @pytest.mark.asyncio
+    async def test_wait_ready(self, scrip_master_csv):
+        """wait_ready awaits the load without blocking the loop."""
+        from src.utils.security_master import LazySecurityMaster
+
+        proxy = LazySecurityMaster(csv_path=str(scrip_master_csv))
+        assert await proxy.wait_ready(timeout=10)
+        assert proxy.is_ready
+
+    def test_missing_file_marks_failed(self, tmp_path):
+        """A missing CSV leaves the proxy in the failed state."""
+        from src.utils.security_master import LazySecurityMaster
+
+        proxy = LazySecurityMaster(csv_path=str(tmp_path / "missing.csv"))
+        proxy.ensure_loaded(timeout=10)
+        assert proxy.status()["state"] == "failed"
+        assert proxy.get_option_security_id("NIFTY", 26200, "CALL", "2025-10-28") is None
+
+    def test_load_error_raises_clearly(self, scrip_master_csv, monkeypatch):
+        """When building the master raises, proxied calls raise RuntimeError carrying the load error."""
+        from src.utils import security_master as module
+
+        def broken(*args, **kwargs):
+            raise ValueError("corrupt scrip master")
+
+        monkeypatch.setattr(module, "SecurityMaster", broken)
+        proxy = module.LazySecurityMaster(csv_path=str(scrip_master_csv))
+        proxy.ensure_loaded(timeout=10)
+
+        assert proxy.status()["state"] == "failed"
+        assert proxy.status()["error"] == "corrupt scrip master"
+        with pytest.raises(RuntimeError, match="corrupt scrip master"):
+            proxy.get_option_security_id("NIFTY", 26200, "CALL", "2025-10-28")
+
+
+class TestFuturesCalendar:
+    """Test futures contract resolution and rollover."""
+
+    def test_calendar_per_underlying(self, master):
+        """BANKNIFTY futures do not leak into the NIFTY calendar."""
+        expiries, records = master._futures_calendar["NIFTY"]
+        assert [r['security_id'] for r in records] == [37054, 37055, 37056]
+        assert list(expiries) == sorted(expiries)
+        assert [r['security_id'] for r in master._futures_calendar["BANKNIFTY"][1]] == [52175]
+
+    def test_current_and_next(self, master):
+        """Binary search picks the first expiry after the reference time."""
+        current = master._futures_after("NIFTY", datetime(2025, 10, 20))
+        assert current['security_id'] == 37054
+        assert master.get_next_futures_contract("NIFTY", current['expiry_date'])['security_id'] == 37055
+        assert master._futures_after("NIFTY", datetime(2026, 1, 1)) is None
+
+    def test_rollover_contract(self, master):
+        """The next contract is used inside the rollover window."""
+        assert master.get_rollover_contract("NIFTY", 1, datetime(2025, 10, 26))['security_id'] == 37054
+        assert master.get_rollover_contract("NIFTY", 1, datetime(2025, 10, 28, 9, 15))['security_id'] == 37055
+
+    def test_apply_rollover_updates_config(self, master):
+        """apply_futures_rollover rewrites the instrument configs."""
+        from src.config import Config
+
+        original = (Config.NIFTY_CONFIG["futures_security_id"], Config.BANKNIFTY_CONFIG["futures_security_id"])
+        try:
+            Config.NIFTY_CONFIG["futures_security_id"] = 37054
+            Config.BANKNIFTY_CONFIG["futures_security_id"] = 52175
+            changed = master.apply_futures_rollover(rollover_days=1, now=datetime(2025, 10, 28, 9, 15))
+            assert list(changed) == ["NIFTY"]
+            assert Config.NIFTY_CONFIG["futures_security_id"] == 37055
+            assert Config.BANKNIFTY_CONFIG["futures_security_id"] == 52175
+        finally:
+            Config.NIFTY_CONFIG["futures_security_id"], Config.BANKNIFTY_CONFIG["futures_security_id"] = original
+
+
+class TestResolveChain:
+    """Test bulk option chain resolution."""
+
+    def test_resolve_chain(self, master):
+        """Calls and puts are resolved for every strike in input order."""
+        resolved = master.resolve_chain("NIFTY", "2025-10-28", [26250, 26200, 26300])
+        assert resolved['strike'].tolist() == [26250.0, 26200.0, 26300.0]
+        assert resolved['call_security_id'].tolist() == [40003, 40001, pd.NA]
+        assert resolved['put_security_id'].tolist() == [pd.NA, 40002, pd.NA]
+
+    def test_attach_security_ids(self, master):
+        """IDs are attached to the chain as nullable integer columns."""
+        chain = pd.DataFrame({'strike': [26200.0, 26250.0], 'call_ltp': [120.0, 95.0]})
+        master.attach_security_ids(chain, "NIFTY", "2025-10-28")
+        assert chain['call_security_id'].tolist() == [40001, 40003]
+        assert str(chain['put_security_id'].dtype) == 'Int64'
+
+
+class TestScripMasterDelta:
+    """Test incremental scrip master updates."""
+
+    DELTA = {
+        "from_version": "v1",
+        "to_version": "v2",
+        "added": [{
+            "SEM_EXM_EXCH_ID": "NSE", "SEM_SEGMENT": "D", "SEM_SMST_SECURITY_ID": 40010,
+            "SEM_INSTRUMENT_NAME": "OPTIDX", "SEM_CUSTOM_SYMBOL": "NIFTY 28 OCT 26400 PUT",
+            "SEM_EXPIRY_DATE": "28/10/25 14:30", "SEM_STRIKE_PRICE": 26400.0, "SEM_OPTION_TYPE": "PE",
+        }],
+        "changed": [{
+            "SEM_EXM_EXCH_ID": "NSE", "SEM_SEGMENT": "D", "SEM_SMST_SECURITY_ID": 40003,
+            "SEM_INSTRUMENT_NAME": "OPTIDX", "SEM_CUSTOM_SYMBOL": "NIFTY 28 OCT 26350 CALL",
+            "SEM_EXPIRY_DATE": "28/10/25 14:30", "SEM_STRIKE_PRICE": 26350.0, "SEM_OPTION_TYPE": "CE",
+        }],
+        "removed": [40002],
+    }
+
+    def test_apply_delta_frame(self, master):
+        """Added, changed and removed rows are applied by security ID."""
+        from src.utils.scrip_master_cache import apply_delta
+
+        patched = apply_delta(master.df, self.DELTA)
+        ids = patched['SEM_SMST_SECURITY_ID']
+        assert 40010 in ids.values and 40002 not in ids.values
+        assert (ids == 40003).sum() == 1
+        assert patched.loc[ids == 40003, 'strike'].iloc[0] == 26350.0
+        assert isinstance(patched['SEM_SEGMENT'].dtype, pd.CategoricalDtype)
+        assert len(master.df) == len(SCRIP_ROWS)
+
+    def test_hot_swap(self, scrip_master_csv):
+        """The proxy swaps to the patched index and persists the version."""
+        from src.utils.security_master import LazySecurityMaster
+
+        proxy = LazySecurityMaster(csv_path=str(scrip_master_csv))
+        old_master = proxy.ensure_loaded(timeout=10)
+        assert proxy.apply_delta(self.DELTA)
+
+        assert proxy.get_option_security_id("NIFTY", 26400, "PUT", "2025-10-28") == 40010
+        assert proxy.lookup_option("NIFTY", 26200, "PUT", date(2025, 10, 28)) is None
+        assert proxy.lookup_option("NIFTY", 26350, "CALL", date(2025, 10, 28)) == 40003
+        assert old_master.lookup_option("NIFTY", 26200, "PUT", date(2025, 10, 28)) == 40002
+        assert proxy.version == "v2"
+
+        reloaded = SecurityMaster(csv_path=str(scrip_master_csv))
+        assert reloaded.lookup_option("NIFTY", 26400, "PUT", date(2025, 10, 28)) == 40010
+
+
+class TestSymbolSearch:
+    """Test the prefix/trigram instrument search."""
+
+    def test_prefix_search_paginated(self, master):
+        """Prefix hits are returned alphabetically and paginate consistently."""
+        first = master.search_instruments("nifty 28", limit=2, offset=0)
+        second = master.search_instruments("nifty 28", limit=2, offset=2)
+        assert first["match"] == "prefix" and first["total"] == 3
+        assert [r["SEM_CUSTOM_SYMBOL"] for r in first["results"]] == [
+            "NIFTY 28 OCT 26200 CALL", "NIFTY 28 OCT 26200 PUT"
+        ]
+        assert [r["SEM_SMST_SECURITY_ID"] for r in second["results"]] == [40003]
+
+    def test_fuzzy_fallback(self, master):
+        """Queries without a prefix match fall back to trigram ranking."""
+        result = master.search_instruments("BANKNIFY NOV FUT")
+        assert result["match"] == "fuzzy"
+        assert result["results"][0]["SEM_SMST_SECURITY_ID"] == 52175
+
+    def test_suggestions(self, master):
+        """Unknown contracts get close suggestions."""
+        suggestions = master.suggest_symbols("NIFTY 28 OCT 26300 CALL", limit=2)
+        assert "NIFTY 28 OCT 26200 CALL" in suggestions
+
+    def test_search_options_uses_prefix(self, master):
+        """search_options no longer matches other underlyings by substring."""
+        results = master.search_options("NIFTY", "2025-10-28")
+        assert results['SEM_SMST_SECURITY_ID'].tolist() == [40001, 40002, 40003]
+
+
+class TestPartitions:
+    """Test segment/underlying partitioning."""
+
+    def test_exchange_segments(self, master):
+        """Rows are mapped to Dhan exchange segments."""
+        segments = dict(zip(master.df['SEM_SMST_SECURITY_ID'], master.df['exchange_segment']))
+        assert segments[40001] == "NSE_FNO"
+        assert segments[2885] == "NSE_EQ"
+        assert segments[13] == "IDX_I"
+
+    def test_get_partition(self, master):
+        """Partitions isolate one underlying's derivatives."""
+        nifty = master.get_partition("NSE_FNO", "NIFTY")
+        assert sorted(nifty['SEM_SMST_SECURITY_ID']) == [37054, 37055, 37056, 40001, 40002, 40003, 40004]
+        assert master.get_partition(underlying="BANKNIFTY")['SEM_SMST_SECURITY_ID'].tolist() == [50001, 52175]
+        assert master.partition_sizes()["NSE_EQ/-"] == 1
+
+    def test_drop_unused_segments(self, scrip_master_csv):
+        """Only the configured segments are kept in memory."""
+        master = SecurityMaster(csv_path=str(scrip_master_csv), segments=["NSE_FNO"])
+        assert set(master.df['exchange_segment']) == {"NSE_FNO"}
+        assert master.get_option_security_id("NIFTY", 26200, "CALL", "2025-10-28") == 40001
+        assert master._futures_calendar["BANKNIFTY"][1][0]['security_id'] == 52175
+        assert master.search_instruments("Reliance")["total"] == 0
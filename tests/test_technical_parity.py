@@ -0,0 +1,150 @@
+"""Parity of the vectorised technical analysis with the original loop implementations."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.agents.technical_analysis_agent import TechnicalAnalysisAgent
+from src.config import Config
+from legacy_technical import LegacyTechnicalAnalysis, minute_candles
+
+
+@pytest.fixture
+def agents():
+    cfg = Config()
+    return TechnicalAnalysisAgent(cfg), LegacyTechnicalAnalysis(cfg)
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_volume_profile_matches_legacy(agents, seed):
+    """Identical profile, levels and floats on a day of 1-minute candles."""
+    agent, legacy = agents
+    df = minute_candles(1, seed=seed)
+
+    for sessions in (24, len(df)):
+        for value_area in (70, 100):
+            expected = legacy.calculate_volume_profile(df, value_area=value_area, sessions=sessions)
+            result = agent.calculate_volume_profile(df, value_area=value_area, sessions=sessions)
+            assert result == expected
+            assert list(result["volume_profile"]) == list(expected["volume_profile"])
+
+
+def test_volume_profile_edge_cases_match_legacy(agents):
+    """Zero-range candles, one-sided levels, untouched bins and colliding bin keys."""
+    agent, legacy = agents
+    frames = [
+        # Doji bars, only bullish candles and a gap that leaves bins untouched
+        pd.DataFrame({
+            "open": [100.0, 100.0, 150.0, 151.0],
+            "high": [100.0, 110.0, 160.0, 151.0],
+            "low": [100.0, 99.0, 149.0, 151.0],
+            "close": [100.0, 108.0, 159.0, 151.0],
+            "volume": [500, 1200, 800, 300],
+        }),
+        # A 0.3 point range: 50 bins whose rounded mid prices collide
+        pd.DataFrame({
+            "open": [100.0, 100.2, 100.1],
+            "high": [100.3, 100.25, 100.2],
+            "low": [100.0, 100.05, 100.1],
+            "close": [100.2, 100.1, 100.15],
+            "volume": [1000, 2000, 1500],
+        }),
+    ]
+    for df in frames:
+        expected = legacy.calculate_volume_profile(df, sessions=len(df))
+        result = agent.calculate_volume_profile(df, sessions=len(df))
+        assert result == expected
+        assert list(result["volume_profile"]) == list(expected["volume_profile"])
+        for level, data in expected["volume_profile"].items():
+            for field in ("total_volume", "buy_volume", "sell_volume", "delta"):
+                assert isinstance(result["volume_profile"][level][field], int) == isinstance(data[field], int)
+
+    flat = frames[0].assign(high=100.0, low=100.0)
+    assert agent.calculate_volume_profile(flat, sessions=4) == legacy.calculate_volume_profile(flat, sessions=4) == {}
+
+
+def order_block_candles(seed):
+    """1-minute candles with frequent engulfing impulses so both OB types and zone tests occur."""
+    df = minute_candles(2, seed=seed)
+    rng = np.random.default_rng(seed)
+    flips = rng.random(len(df)) < 0.3
+    df.loc[flips, "close"] = df.loc[flips, "open"] + rng.normal(0, 15, flips.sum())
+    df["high"] = df[["open", "high", "close"]].max(axis=1)
+    df["low"] = df[["open", "low", "close"]].min(axis=1)
+    return df
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2, 3])
+def test_order_blocks_match_legacy(agents, seed):
+    """Identical order blocks (values, types, order) for several lookbacks."""
+    agent, legacy = agents
+    df = order_block_candles(seed)
+
+    for lookback in (5, 20, len(df) - 10, len(df) - 9):
+        expected = legacy.identify_order_blocks(df, lookback)
+        result = agent.identify_order_blocks(df, lookback)
+        assert result == expected
+        assert [[type(value) for value in ob.values()] for ob in result] == \
+            [[type(value) for value in ob.values()] for ob in expected]
+    assert {ob["type"] for ob in agent.identify_order_blocks(df, 5)} == {"demand", "supply"}
+
+
+def test_order_blocks_edge_cases_match_legacy(agents):
+    """Zero volume (infinite volume ratio), NaN prices and every lookback window."""
+    agent, legacy = agents
+    df = order_block_candles(5).iloc[:300].reset_index(drop=True)
+    df.loc[df.sample(60, random_state=1).index, "volume"] = 0
+    df.loc[df.sample(5, random_state=2).index, "low"] = np.nan
+
+    infinite = 0
+    with np.errstate(divide="ignore"):
+        for lookback in range(3, len(df) - 9, 7):
+            expected = legacy.identify_order_blocks(df, lookback)
+            assert agent.identify_order_blocks(df, lookback) == expected
+            infinite += sum(np.isinf(ob["volume_ratio"]) for ob in expected)
+    assert infinite > 0
+
+
+def gap_candles(seed):
+    """1-minute candles with frequent jumps so bullish/bearish gaps open, get entered and get filled."""
+    df = minute_candles(3, seed=seed)
+    rng = np.random.default_rng(seed)
+    jumps = rng.normal(0, 25, len(df)) * (rng.random(len(df)) < 0.1)
+    shift = np.cumsum(jumps)
+    for column in ("open", "high", "low", "close"):
+        df[column] = df[column] + shift
+    return df
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_fair_value_gaps_match_legacy(agents, seed):
+    """Identical bullish and bearish FVGs, fill tracking and ordering."""
+    agent, legacy = agents
+    df = gap_candles(seed)
+
+    for min_gap_pct in (None, 0.0, 0.05, 0.5):
+        expected = legacy.identify_fair_value_gaps(df, min_gap_pct)
+        result = agent.identify_fair_value_gaps(df, min_gap_pct)
+        assert result == expected
+        assert [[type(value) for value in fvg.values()] for fvg in result] == \
+            [[type(value) for value in fvg.values()] for fvg in expected]
+
+    gaps = agent.identify_fair_value_gaps(df, 0.0)
+    assert {fvg["type"] for fvg in gaps} == {"bullish", "bearish"}
+    assert any(fvg["filled_pct"] != 0 for fvg in gaps)
+
+
+def test_fair_value_gaps_edge_cases_match_legacy(agents):
+    """NaN prices, gaps in the last candles, inverted candles and tiny frames."""
+    agent, legacy = agents
+    df = gap_candles(4).iloc[:500].reset_index(drop=True)
+    df.loc[df.sample(15, random_state=3).index, "high"] = np.nan
+    df.loc[df.sample(15, random_state=4).index, "low"] = np.nan
+    # Inverted candles (low above high) can open a bullish and a bearish gap on the same triple
+    price = df["close"].iloc[100]
+    df.loc[100:102, ["high", "low"]] = [[price - 1000, price + 1000], [price, price], [price - 2000, price + 2000]]
+
+    both = [fvg["type"] for fvg in legacy.identify_fair_value_gaps(df, 0.0) if fvg["timestamp"] == df["timestamp"].iloc[101]]
+    assert both == ["bullish", "bearish"]
+
+    for frame in (df, df.tail(25), df.head(3), df.head(2)):
+        assert agent.identify_fair_value_gaps(frame, 0.0) == legacy.identify_fair_value_gaps(frame, 0.0)
@@ -0,0 +1,125 @@
+"""Tests for the rolling volume profile accumulator."""
+from datetime import date
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.agents.technical_analysis_agent import TechnicalAnalysisAgent
+from src.config import Config
+from src.utils.candle_aggregator import resample_candles
+from src.utils.volume_profile import VolumeProfileAccumulator, SessionProfiles, accumulate
+from legacy_technical import minute_candles
+
+
+@pytest.fixture
+def candles():
+    return resample_candles(minute_candles(5, seed=7), 15)
+
+
+def window_state(acc, df):
+    """Bins of acc's grid accumulated from scratch over df's last window."""
+    window = df.tail(acc.window)
+    return accumulate(
+        acc._lows, acc._highs, window["low"].to_numpy(), window["high"].to_numpy(),
+        window["volume"].to_numpy(), (window["close"] > window["open"]).to_numpy(),
+    )
+
+
+def test_first_sync_matches_full_calculation(candles):
+    """Right after a (re)build the profile equals calculate_volume_profile."""
+    acc = VolumeProfileAccumulator(window=24, value_area_pct=70)
+    assert acc.sync(candles.iloc[:40]) == 24
+
+    expected = TechnicalAnalysisAgent(Config()).calculate_volume_profile(candles.iloc[:40], 70, 24)
+    assert acc.snapshot() == expected
+    assert acc.levels()["poc"] == expected["poc"]
+
+
+def test_rolling_updates_match_recalculation(candles):
+    """Adding and expiring candles one at a time tracks a from-scratch accumulation."""
+    acc = VolumeProfileAccumulator(window=24, value_area_pct=70)
+    acc.sync(candles.iloc[:24])
+
+    for end in range(25, len(candles) + 1):
+        # Only a candle outside the current grid re-bins
+        rebins = acc.rebins
+        latest = candles.iloc[end - 1]
+        outside = latest["low"] < acc._lows[0] or latest["high"] > acc._highs[-1]
+        assert acc.sync(candles.iloc[:end]) == 1
+        assert acc.rebins == rebins + outside
+
+        state = window_state(acc, candles.iloc[:end])
+        assert np.allclose(acc._state["total"], state["total"], rtol=0, atol=1e-6)
+        assert (acc._state["touches"] == state["touches"]).all()
+        assert int(np.argmax(acc._state["total"])) == acc._poc
+
+    assert len(acc) == 24
+    assert acc.rebins < (len(candles) - 24) / 4
+
+
+def test_forming_candle_and_rewritten_history(candles):
+    """The newest candle is replaced in place; a rewritten history resets the profile."""
+    acc = VolumeProfileAccumulator(window=24, value_area_pct=70)
+    frame = candles.iloc[:30].copy()
+    acc.sync(frame)
+    updates = acc.updates
+
+    frame.loc[frame.index[-1], ["high", "volume"]] = [frame["high"].iloc[-1] + 1, frame["volume"].iloc[-1] + 500]
+    assert acc.sync(frame) == 1
+    assert acc.updates == updates + 1
+    assert acc.sync(frame) == 0
+    assert np.allclose(acc._state["total"], window_state(acc, frame)["total"], rtol=0, atol=1e-6)
+
+    backfilled = candles.iloc[:31].drop(candles.index[27])
+    assert acc.sync(backfilled) == 24
+    assert acc.snapshot() == TechnicalAnalysisAgent(Config()).calculate_volume_profile(backfilled, 70, 24)
+
+
+def test_session_profiles_cache_days_and_sum_composites():
+    """Days are built once; composites equal one accumulation over the same grid."""
+    df = minute_candles(6, seed=11)
+    profiles = SessionProfiles(bin_size=5, max_days=4, value_area_pct=70)
+
+    assert profiles.update("X", df) == 4
+    assert len(profiles.sessions("X")) == 4
+    assert profiles.update("X", df) == 0
+
+    # Only the session in progress is rebuilt when its candles change
+    live = df.copy()
+    live.loc[live.index[-1], "volume"] += 1000
+    assert profiles.update("X", live) == 1
+
+    composite = profiles.composite("X", 3)
+    days = profiles.sessions("X")[-3:]
+    assert composite["session_dates"] == days and composite["sessions_analyzed"] == 3
+
+    candles = live[live["timestamp"].dt.date.isin(days)]
+    lows = np.array([level["price_low"] for level in composite["volume_profile"].values()])
+    state = accumulate(
+        lows, lows + 5, candles["low"].to_numpy(), candles["high"].to_numpy(),
+        candles["volume"].to_numpy(dtype=float), (candles["close"] > candles["open"]).to_numpy(),
+    )
+    totals = np.array([level["total_volume"] for level in composite["volume_profile"].values()], dtype=float)
+    assert np.allclose(totals, state["total"])
+    assert np.isclose(composite["total_volume"], candles["volume"].sum())
+
+
+def test_developing_and_naked_pocs():
+    """The developing POC ends at the day's POC; only untraded prior POCs are naked."""
+    day = lambda d, low, high: pd.DataFrame({
+        "timestamp": pd.date_range(f"2025-01-0{d} 09:15", periods=3, freq="min"),
+        "open": [low, low + 1, high - 1],
+        "high": [low + 2, high, high],
+        "low": [low, low, high - 2],
+        "close": [low + 1, high - 1, high - 1],
+        "volume": [100, 100, 5000],
+    })
+    profiles = SessionProfiles(bin_size=1, max_days=10, value_area_pct=70)
+    profiles.update("X", pd.concat([day(6, 100, 110), day(7, 120, 130), day(8, 108, 115)], ignore_index=True))
+
+    assert profiles.developing_poc("X")[-1]["poc"] == profiles.day_profile("X")["poc"]
+    assert profiles.developing_poc("X")[0]["timestamp"] == pd.Timestamp("2025-01-08 09:15")
+
+    # Day 1's POC (~109.5) is revisited on day 3; day 2's (~129.5) is not
+    naked = profiles.naked_pocs("X")
+    assert [entry["date"] for entry in naked] == [date(2025, 1, 7)]
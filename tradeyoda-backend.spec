@@ -38,10 +38,12 @@ a = Analysis(
         # Data processing
         'pandas',
         'numpy',
+        'pyarrow',
         'ta',
         
         # HTTP and networking
         'requests',
+        'aiohttp',
         'websockets',
         
         # Logging
@@ -78,6 +80,21 @@ a = Analysis(
         'src.utils.logger',
         'src.utils.licensing_client',
         'src.utils.security_master',
+        'src.utils.scrip_master_cache',
+        'src.utils.symbol_index',
+        'src.utils.tick_store',
+        'src.utils.candle_aggregator',
+        'src.utils.candle_store',
+        'src.utils.dhan_client',
+        'src.utils.rate_limiter',
+        'src.utils.single_flight',
+        'src.utils.cache',
+        'src.utils.option_chain',
+        'src.utils.option_chain_poller',
+        'src.utils.option_chain_archive',
+        'src.utils.feed_supervisor',
+        'src.utils.subscription_manager',
+        'src.utils.volume_profile',
         'src.utils.credentials_store',
         'src.utils.helpers',
         'src.utils.theta_calculator',              # Added